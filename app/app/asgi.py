@@ -0,0 +1,22 @@
+"""
+ASGI config for app project.
+
+Django 2.1 only handles WSGI, so the WSGI application runs in a thread
+pool of ASGI_THREADS workers behind an ASGI bridge. Serve it with
+an ASGI server such as uvicorn:
+
+    uvicorn app.asgi:application
+"""
+
+import os
+
+from django.core.wsgi import get_wsgi_application
+
+from core.asgi import WSGIBridge
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+
+application = WSGIBridge(
+    get_wsgi_application(),
+    threads=int(os.environ.get('ASGI_THREADS', 0)) or None
+)
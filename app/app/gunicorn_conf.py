@@ -0,0 +1,85 @@
+"""
+Gunicorn config for app project.
+
+Every value is read from the environment so the same image serves any
+machine size:
+
+    gunicorn -c app/gunicorn_conf.py app.wsgi:application
+
+For more information on these settings, see
+https://docs.gunicorn.org/en/stable/settings.html
+"""
+
+import multiprocessing
+import os
+
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+# Threads overlap the database round trips of a worker, the pooled
+# database backend shares its connections between them
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_class = 'gthread' if threads > 1 else 'sync'
+
+# Database connections a worker can hold: its whole pool, or else one
+# per request thread and per image and password rehash thread
+if os.environ.get('DB_POOL_MODE') == 'pool':
+    worker_connections = int(os.environ.get('DB_POOL_SIZE', 10))
+else:
+    worker_connections = threads + int(
+        os.environ.get('IMAGE_PIPELINE_WORKERS', 2)
+    ) + int(os.environ.get('PASSWORD_REHASH_WORKERS', 1))
+
+# Two processes per core plus one, so a core always has a worker that
+# is not blocked on I/O, capped so the workers together stay within
+# DB_MAX_CONNECTIONS. It defaults to 90 of the 100 max_connections of
+# PostgreSQL, leaving some for migrations, shells and superusers, so 4
+# threads with a pool of 10 connections allow at most 9 workers
+db_max_connections = int(os.environ.get('DB_MAX_CONNECTIONS', 90))
+workers = int(os.environ.get('WEB_CONCURRENCY', max(1, min(
+    multiprocessing.cpu_count() * 2 + 1,
+    db_max_connections // max(1, worker_connections)
+))))
+
+# Restart workers after a number of requests, with jitter so they do
+# not all restart at once, to bound slow memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(
+    os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', max_requests // 10)
+)
+
+# Workers silent for longer are killed, and on reload or shutdown get
+# graceful_timeout seconds to finish their requests
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Seconds an idle keep alive connection stays open, kept above the
+# idle timeout of a load balancer in front so it never reuses a
+# connection the worker already closed
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 75))
+
+# Loading the application before forking shares its memory between
+# workers, but reloads with HUP then need a full restart to pick up code
+preload_app = os.environ.get('GUNICORN_PRELOAD', '0') == '1'
+
+# The heartbeat file of each worker lives in memory, docker's /tmp can
+# be a slow overlay that makes workers look stuck
+worker_tmp_dir = os.environ.get('GUNICORN_WORKER_TMP_DIR', '/dev/shm')
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    """
+        Close the database connections opened while preloading, before
+        workers are forked with a copy of them.
+    """
+    if preload_app:
+        from django.db import connections
+
+        from core.db.pool import close_pools
+
+        connections.close_all()
+        close_pools()
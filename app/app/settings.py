@@ -1,12 +1,32 @@
 import os
+import sys
+
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
-SECRET_KEY = '8%c3!3xz8vagvj+y1ykwqt)(*s07g)ei^m8_y01#*8wesip7&y'
+# DEBUG keeps every SQL query of a request in memory, so it is off
+# unless DJANGO_DEBUG=1, and production sets its own secret key and
+# host names
+DEBUG = os.environ.get('DJANGO_DEBUG', '0') == '1'
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if SECRET_KEY is None:
+    if not DEBUG:
+        raise ImproperlyConfigured('DJANGO_SECRET_KEY must be set')
+    SECRET_KEY = '8%c3!3xz8vagvj+y1ykwqt)(*s07g)ei^m8_y01#*8wesip7&y'
 
-DEBUG = True
+ALLOWED_HOSTS = [
+    host.strip()
+    for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+    if host.strip()
+]
 
-ALLOWED_HOSTS = []
+if not DEBUG:
+    # TLS ends at the proxy in front of the app server
+    SECURE_PROXY_SSL_HEADER = ('HTTP_X_FORWARDED_PROTO', 'https')
+    SESSION_COOKIE_SECURE = True
+    CSRF_COOKIE_SECURE = True
 
 
 # Application definition
@@ -18,6 +38,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles', 
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'core',
@@ -26,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.ProfilingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -62,12 +84,70 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.postgresql',
         'HOST': os.environ.get('DB_HOST'),
+        'PORT': os.environ.get('DB_PORT', ''),
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# none keeps a persistent connection per thread, pool shares a process
+# wide pool between threads, and pgbouncer connects through a
+# transaction pooling pgbouncer at DB_HOST
+DB_POOL_MODE = os.environ.get('DB_POOL_MODE', 'none')
+
+if DB_POOL_MODE == 'pool':
+    DATABASES['default'].update({
+        'ENGINE': 'core.db.backends.pooled',
+        # Connections go back to the pool at the end of each request
+        'CONN_MAX_AGE': 0,
+        'POOL': {
+            'MAX_SIZE': int(os.environ.get('DB_POOL_SIZE', 10)),
+            'MAX_LIFETIME': int(os.environ.get('DB_POOL_MAX_LIFETIME', 3600)),
+            'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            'CHECK_INTERVAL': int(
+                os.environ.get('DB_POOL_CHECK_INTERVAL', 30)
+            ),
+        },
+    })
+elif DB_POOL_MODE == 'pgbouncer':
+    # Named cursors do not survive transaction pooling
+    DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+
+
+# Password hashing
+
+# The first hasher hashes new passwords, the others verify the older
+# hashes until they are upgraded after a login
+PASSWORD_HASHER = os.environ.get('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CHOICES.items()
+    if name != PASSWORD_HASHER
+]
+
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.environ.get('PASSWORD_PBKDF2_ITERATIONS', 120000)
+)
+PASSWORD_ARGON2_TIME_COST = int(os.environ.get('PASSWORD_ARGON2_TIME_COST', 2))
+PASSWORD_ARGON2_MEMORY_COST = int(
+    os.environ.get('PASSWORD_ARGON2_MEMORY_COST', 512)
+)
+PASSWORD_ARGON2_PARALLELISM = int(
+    os.environ.get('PASSWORD_ARGON2_PARALLELISM', 2)
+)
+PASSWORD_BCRYPT_ROUNDS = int(os.environ.get('PASSWORD_BCRYPT_ROUNDS', 12))
+
+# Threads upgrading outdated hashes after logins
+PASSWORD_REHASH_WORKERS = int(os.environ.get('PASSWORD_REHASH_WORKERS', 1))
+
+AUTHENTICATION_BACKENDS = ['user.backends.BackgroundRehashBackend']
+
 
 # Password validation
 
@@ -108,4 +188,147 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = '/vol/web/media'
 STATIC_ROOT = '/vol/web/static'
 
+# Uploaded files are named by their content to store them once
+DEFAULT_FILE_STORAGE = 'core.storage.ContentAddressedStorage'
+
+# Seconds a stored file is kept after an upload matched it, so the row
+# referencing it can commit before the file is released
+MEDIA_RELEASE_GRACE = int(os.environ.get('MEDIA_RELEASE_GRACE', 600))
+
+# How media files are sent: 'sendfile' through the app server, or
+# 'x-accel-redirect' (nginx) and 'x-sendfile' (Apache) by the web server
+MEDIA_SERVE_MODE = os.environ.get('MEDIA_SERVE_MODE', 'sendfile')
+MEDIA_ACCEL_PREFIX = os.environ.get('MEDIA_ACCEL_PREFIX', '/protected-media/')
+
+# Largest recipe image upload accepted, in bytes and in pixels
+RECIPE_IMAGE_MAX_UPLOAD_SIZE = int(
+    os.environ.get('RECIPE_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(
+    os.environ.get('RECIPE_IMAGE_MAX_PIXELS', 40 * 1000 * 1000)
+)
+
+# Number of threads resizing uploaded recipe images
+IMAGE_PIPELINE_WORKERS = int(os.environ.get('IMAGE_PIPELINE_WORKERS', 2))
+
 AUTH_USER_MODEL = 'core.User'
+
+
+# Django REST framework
+
+REST_FRAMEWORK = {
+    'DEFAULT_PAGINATION_CLASS': 'recipe.pagination.KeysetPagination',
+    'PAGE_SIZE': int(os.environ.get('API_PAGE_SIZE', 50)),
+    'DEFAULT_RENDERER_CLASSES': (
+        'recipe.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_THROTTLE_RATES': {
+        # Login attempts for each email
+        'login': os.environ.get('LOGIN_THROTTLE_RATE', '10/min'),
+    },
+}
+
+
+# Caches
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    },
+    # Login attempts have to be counted in a cache every worker process
+    # shares, or each process allows the whole rate. The database cache
+    # needs the table made by createcachetable.
+    'throttle': {
+        'BACKEND': os.environ.get(
+            'THROTTLE_CACHE_BACKEND',
+            'django.core.cache.backends.db.DatabaseCache'
+        ),
+        'LOCATION': os.environ.get(
+            'THROTTLE_CACHE_LOCATION', 'cache_throttle'
+        ),
+    },
+}
+
+THROTTLE_CACHE_ALIAS = os.environ.get('THROTTLE_CACHE_ALIAS', 'throttle')
+
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 500))
+
+
+# Bulk endpoints
+
+BULK_MAX_ITEMS = int(os.environ.get('BULK_MAX_ITEMS', 1000))
+BULK_BATCH_SIZE = int(os.environ.get('BULK_BATCH_SIZE', 500))
+
+
+# Rows serialized at a time by the streaming export
+
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+
+
+# Cache of list responses, keyed by the data version of each user
+
+RESPONSE_CACHE_ALIAS = os.environ.get('RESPONSE_CACHE_ALIAS', 'default')
+RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', 300))
+
+
+# Tag and ingredient autocomplete
+
+AUTOCOMPLETE_LIMIT = int(os.environ.get('AUTOCOMPLETE_LIMIT', 10))
+AUTOCOMPLETE_MAX_LIMIT = int(os.environ.get('AUTOCOMPLETE_MAX_LIMIT', 50))
+AUTOCOMPLETE_CACHE_SIZE = int(os.environ.get('AUTOCOMPLETE_CACHE_SIZE', 2048))
+AUTOCOMPLETE_CACHE_TTL = int(os.environ.get('AUTOCOMPLETE_CACHE_TTL', 60))
+
+
+# Token authentication cache
+
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 1024))
+TOKEN_CACHE_TTL = int(os.environ.get('TOKEN_CACHE_TTL', 30))
+TOKEN_CACHE_ALIAS = os.environ.get('TOKEN_CACHE_ALIAS') or None
+
+
+# Request profiling and metrics
+
+# Fraction of the requests run under cProfile, and the X-Profile header
+# value profiling a request on demand
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_KEY = os.environ.get('PROFILING_KEY') or None
+# Directory receiving the .prof files, logged when unset
+PROFILING_DIR = os.environ.get('PROFILING_DIR') or None
+# Runs of one statement flagged as N+1, and seconds flagged as slow
+PROFILING_N_PLUS_ONE = int(os.environ.get('PROFILING_N_PLUS_ONE', 5))
+PROFILING_SLOW_REQUEST = float(os.environ.get('PROFILING_SLOW_REQUEST', 1))
+
+# Bearer token required to read /metrics, which is closed without one
+# unless DEBUG is on
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN') or None
+METRICS_CACHES = {
+    'autocomplete': 'recipe.autocomplete.cache',
+    'response': 'recipe.cache.response_cache',
+    'token': 'user.authentication.token_cache',
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.profiling': {
+            'handlers': ['console'],
+            'level': os.environ.get(
+                'PROFILING_LOG_LEVEL',
+                # Keep the flagged requests of the tests out of their output
+                'ERROR' if sys.argv[1:2] == ['test'] else 'WARNING'
+            ),
+            'propagate': False,
+        },
+    },
+}
@@ -0,0 +1,262 @@
+import asyncio
+import sys
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+# Request bodies larger than this are spooled to a temporary file
+MAX_MEMORY_BODY = 1024 * 1024
+
+# Response messages a worker thread can produce ahead of the client
+MAX_QUEUED_MESSAGES = 16
+
+
+class ClientDisconnected(Exception):
+    """
+        The client went away while the response was being sent.
+    """
+
+
+def max_body_size():
+    """
+        Return the largest request body accepted: an image upload with
+        room for the multipart framing.
+    """
+    from recipe.uploads import CHUNK_SIZE, max_upload_size
+    return max_upload_size() + CHUNK_SIZE
+
+
+class WSGIBridge:
+    """
+        ASGI application running a WSGI application in a thread pool.
+
+        The event loop receives request bodies and sends responses, so
+        slow clients only hold a coroutine. A thread is held while the
+        WSGI application handles the request and produces the body,
+        which is queued for the event loop to send. Streaming responses
+        larger than the queue hold the thread until the client has read
+        all but the last MAX_QUEUED_MESSAGES chunks. Request bodies over
+        max_body_size() bytes are refused with 413.
+    """
+    def __init__(self, application, threads=None, max_body_size=None):
+        self.application = application
+        self.max_body_size = max_body_size
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads,
+            thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise ValueError(f'Unsupported ASGI scope {scope["type"]}')
+
+    async def lifespan(self, receive, send):
+        """
+            Acknowledge the startup and shutdown of the server.
+        """
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        """
+            Handle a request with the WSGI application in the pool.
+        """
+        limit = self.max_body_size or max_body_size()
+        if self.content_length(scope) > limit:
+            await self.too_large(send)
+            return
+
+        body = tempfile.SpooledTemporaryFile(max_size=MAX_MEMORY_BODY)
+        received = 0
+        while True:
+            message = await receive()
+            if message['type'] == 'http.disconnect':
+                body.close()
+                return
+
+            chunk = message.get('body', b'')
+            received += len(chunk)
+            if received > limit:
+                body.close()
+                await self.too_large(send)
+                return
+
+            body.write(chunk)
+            if not message.get('more_body', False):
+                break
+        body.seek(0)
+
+        loop = asyncio.get_event_loop()
+        environ = self.environ(scope, body)
+        messages = asyncio.Queue(maxsize=MAX_QUEUED_MESSAGES)
+        disconnected = threading.Event()
+        worker = loop.run_in_executor(
+            self.executor, self.run, environ, messages, disconnected, loop
+        )
+        try:
+            while True:
+                message = await messages.get()
+                if message is None:
+                    break
+
+                try:
+                    await send(message)
+                except Exception:
+                    # Let the thread stop and wait for it to finish
+                    disconnected.set()
+                    while await messages.get() is not None:
+                        pass
+                    raise
+
+            await worker
+        finally:
+            body.close()
+
+    def content_length(self, scope):
+        """
+            Return the declared size of the request body.
+        """
+        for name, value in scope.get('headers', []):
+            if name.lower() == b'content-length':
+                try:
+                    return int(value)
+                except ValueError:
+                    return 0
+
+        return 0
+
+    async def too_large(self, send):
+        """
+            Refuse a request whose body is over the size limit.
+        """
+        await send({
+            'type': 'http.response.start',
+            'status': 413,
+            'headers': [
+                (b'content-type', b'text/plain'),
+                (b'connection', b'close'),
+            ],
+        })
+        await send({
+            'type': 'http.response.body',
+            'body': b'Request body too large',
+        })
+
+    def run(self, environ, messages, disconnected, loop):
+        """
+            Run the WSGI application in the worker thread and queue its
+            response for the event loop to send.
+        """
+        def send_message(message):
+            if disconnected.is_set():
+                raise ClientDisconnected()
+            # Only waits for the client when the queue is full
+            asyncio.run_coroutine_threadsafe(
+                messages.put(message), loop
+            ).result()
+
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            if exc_info and response.get('started'):
+                raise exc_info[1].with_traceback(exc_info[2])
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [
+                (name.lower().encode('latin1'), value.encode('latin1'))
+                for name, value in headers
+            ]
+
+        def start():
+            if not response.get('started'):
+                response['started'] = True
+                send_message({
+                    'type': 'http.response.start',
+                    'status': response['status'],
+                    'headers': response['headers'],
+                })
+
+        try:
+            iterable = self.application(environ, start_response)
+            try:
+                for chunk in iterable:
+                    if chunk:
+                        start()
+                        send_message({
+                            'type': 'http.response.body',
+                            'body': chunk,
+                            'more_body': True,
+                        })
+            finally:
+                if hasattr(iterable, 'close'):
+                    iterable.close()
+
+            start()
+            send_message({'type': 'http.response.body', 'body': b''})
+        except ClientDisconnected:
+            pass
+        finally:
+            # Tell the event loop the response is over
+            asyncio.run_coroutine_threadsafe(
+                messages.put(None), loop
+            ).result()
+
+    def environ(self, scope, body):
+        """
+            Return the WSGI environ of an ASGI HTTP scope.
+        """
+        server = scope.get('server') or ('localhost', 80)
+        client = scope.get('client') or ('', 0)
+        root_path = scope.get('root_path', '')
+        path = scope['path']
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': root_path.encode('utf-8').decode('latin1'),
+            'PATH_INFO': path.encode('utf-8').decode('latin1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin1'),
+            'SERVER_NAME': server[0],
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+            'REMOTE_ADDR': client[0],
+            'REMOTE_PORT': str(client[1]),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': body,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False,
+        }
+
+        for name, value in scope.get('headers', []):
+            name = name.decode('latin1').upper().replace('-', '_')
+            value = value.decode('latin1')
+            if name == 'CONTENT_TYPE':
+                key = 'CONTENT_TYPE'
+            elif name == 'CONTENT_LENGTH':
+                key = 'CONTENT_LENGTH'
+            else:
+                key = f'HTTP_{name}'
+
+            # Repeated headers are joined like a WSGI server does, with
+            # the separator of the Cookie header for cookies
+            if key in environ and key.startswith('HTTP_'):
+                separator = '; ' if key == 'HTTP_COOKIE' else ','
+                environ[key] = f'{environ[key]}{separator}{value}'
+            else:
+                environ[key] = value
+
+        return environ
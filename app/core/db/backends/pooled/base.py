@@ -0,0 +1,80 @@
+from django.db.backends.postgresql import base
+from psycopg2 import extensions
+
+from core.db.pool import ConnectionPool, PoolTimeout, get_pool
+
+
+Database = base.Database
+
+
+def check_connection(connection):
+    """
+        Run a trivial query on a connection, raising when it is broken.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    if not connection.autocommit:
+        connection.rollback()
+
+
+def reset_connection(connection):
+    """
+        Roll back what a returned connection left in progress.
+    """
+    if connection.closed:
+        raise Database.InterfaceError('Connection already closed')
+
+    status = connection.get_transaction_status()
+    if status != extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """
+        PostgreSQL backend taking its connections from a process wide
+        pool instead of opening one for every request.
+
+        Closing the connection, which Django does at the end of every
+        request when CONN_MAX_AGE is 0, returns it to the pool. Pool
+        options are read from the POOL dictionary of the database
+        settings: MAX_SIZE, MAX_LIFETIME, TIMEOUT and CHECK_INTERVAL.
+    """
+    def get_pool(self, conn_params):
+        """
+            Return the connection pool of the database alias.
+        """
+        options = self.settings_dict.get('POOL', {})
+
+        return get_pool(self.alias, lambda: ConnectionPool(
+            connect=lambda: Database.connect(**conn_params),
+            max_size=options.get('MAX_SIZE', 10),
+            max_lifetime=options.get('MAX_LIFETIME', 3600),
+            timeout=options.get('TIMEOUT', 30),
+            check_interval=options.get('CHECK_INTERVAL', 30),
+            check=check_connection,
+            reset=reset_connection
+        ))
+
+    def get_new_connection(self, conn_params):
+        self.pool = self.get_pool(conn_params)
+        try:
+            connection = self.pool.checkout()
+        except PoolTimeout as exc:
+            raise Database.OperationalError(str(exc)) from exc
+
+        # Same isolation level handling as a new connection
+        options = self.settings_dict['OPTIONS']
+        try:
+            self.isolation_level = options['isolation_level']
+        except KeyError:
+            self.isolation_level = connection.isolation_level
+        else:
+            if self.isolation_level != connection.isolation_level:
+                connection.set_session(isolation_level=self.isolation_level)
+
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.checkin(self.connection)
@@ -0,0 +1,242 @@
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    """
+        Raised when no connection is returned to a full pool in time.
+    """
+
+
+class ConnectionPool:
+    """
+        Thread safe pool of database connections.
+
+        Connections are created on demand up to max_size and reused
+        last in first out, so idle connections beyond the load expire.
+        Connections older than max_lifetime are closed instead of being
+        reused. Connections idle for longer than check_interval are
+        checked before being handed out. Connections whose reset fails
+        when returned are discarded.
+    """
+    def __init__(self, connect, max_size=10, max_lifetime=3600, timeout=30,
+                 check_interval=30, check=None, reset=None, close=None,
+                 timer=time.monotonic):
+        self.connect = connect
+        self.max_size = max_size
+        self.max_lifetime = max_lifetime
+        self.timeout = timeout
+        self.check_interval = check_interval
+        self.check = check
+        self.reset = reset
+        self.close = close or (lambda connection: connection.close())
+        self.timer = timer
+
+        self._idle = deque()
+        self._created = {}
+        self._size = 0
+        self._condition = threading.Condition()
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'discarded': 0,
+            'waits': 0,
+            'wait_time': 0.0,
+            'timeouts': 0,
+        }
+
+    def checkout(self):
+        """
+            Return a connection, waiting for one when the pool is full.
+        """
+        while True:
+            with self._condition:
+                connection, last_used = self._take()
+
+            if connection is None:
+                # A slot was reserved to open a new connection
+                connection = self._create()
+            elif not self._usable(connection, last_used):
+                self.discard(connection)
+                continue
+
+            with self._condition:
+                self._stats['checkouts'] += 1
+            return connection
+
+    def _take(self):
+        """
+            Take an idle connection or reserve a slot, waiting while the
+            pool is full. Must be called holding the condition.
+        """
+        started = None
+        try:
+            while True:
+                while self._idle:
+                    connection, last_used = self._idle.pop()
+                    if self._expired(connection):
+                        self._discard(connection)
+                        continue
+                    return connection, last_used
+
+                if self._size < self.max_size:
+                    self._size += 1
+                    return None, None
+
+                now = self.timer()
+                if started is None:
+                    started = now
+                    self._stats['waits'] += 1
+
+                remaining = self.timeout - (now - started)
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeout(
+                        f'No connection available after {self.timeout} s'
+                    )
+                self._condition.wait(remaining)
+        finally:
+            if started is not None:
+                self._stats['wait_time'] += self.timer() - started
+
+    def _create(self):
+        """
+            Open a new connection in a reserved slot.
+        """
+        try:
+            connection = self.connect()
+        except Exception:
+            with self._condition:
+                self._size -= 1
+                self._condition.notify()
+            raise
+
+        with self._condition:
+            self._created[connection] = self.timer()
+            self._stats['created'] += 1
+
+        return connection
+
+    def _usable(self, connection, last_used):
+        """
+            Return whether an idle connection passes its health check.
+        """
+        if self.check is None or \
+                self.timer() - last_used < self.check_interval:
+            return True
+
+        try:
+            self.check(connection)
+        except Exception:
+            return False
+
+        return True
+
+    def _expired(self, connection):
+        """
+            Return whether a connection outlived its maximum lifetime.
+        """
+        if not self.max_lifetime:
+            return False
+
+        created = self._created.get(connection, self.timer())
+        return self.timer() - created >= self.max_lifetime
+
+    def checkin(self, connection):
+        """
+            Return a connection to the pool.
+        """
+        if self.reset is not None:
+            try:
+                self.reset(connection)
+            except Exception:
+                self.discard(connection)
+                return
+
+        with self._condition:
+            if connection not in self._created:
+                # Not from this pool, or already discarded
+                return
+            if self._expired(connection):
+                self._discard(connection)
+            else:
+                self._idle.append((connection, self.timer()))
+            self._condition.notify()
+
+    def discard(self, connection):
+        """
+            Close a connection and free its slot.
+        """
+        with self._condition:
+            self._discard(connection)
+            self._condition.notify()
+
+    def _discard(self, connection):
+        if self._created.pop(connection, None) is None:
+            return
+
+        self._size -= 1
+        self._stats['discarded'] += 1
+        try:
+            self.close(connection)
+        except Exception:
+            pass
+
+    def close_all(self):
+        """
+            Close the idle connections.
+        """
+        with self._condition:
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+            self._condition.notify_all()
+
+    def stats(self):
+        """
+            Return the counters and the current size of the pool.
+        """
+        with self._condition:
+            stats = dict(self._stats)
+            stats.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'max_size': self.max_size,
+            })
+            return stats
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, factory):
+    """
+        Return the pool of a database alias, created by factory once.
+    """
+    with _pools_lock:
+        if alias not in _pools:
+            _pools[alias] = factory()
+        return _pools[alias]
+
+
+def pool_stats():
+    """
+        Return the stats of every pool by database alias.
+    """
+    with _pools_lock:
+        pools = dict(_pools)
+
+    return {alias: pool.stats() for alias, pool in pools.items()}
+
+
+def close_pools():
+    """
+        Close the idle connections of every pool.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+
+    for pool in pools:
+        pool.close_all()
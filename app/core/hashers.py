@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.contrib.auth import hashers
+
+
+class PBKDF2PasswordHasher(hashers.PBKDF2PasswordHasher):
+    """
+        PBKDF2 hasher whose iteration count is set by
+        PASSWORD_PBKDF2_ITERATIONS.
+    """
+    @property
+    def iterations(self):
+        return getattr(
+            settings, 'PASSWORD_PBKDF2_ITERATIONS',
+            hashers.PBKDF2PasswordHasher.iterations
+        )
+
+
+class Argon2PasswordHasher(hashers.Argon2PasswordHasher):
+    """
+        Argon2 hasher whose costs are set by PASSWORD_ARGON2_TIME_COST,
+        PASSWORD_ARGON2_MEMORY_COST (in KiB) and
+        PASSWORD_ARGON2_PARALLELISM. Requires argon2-cffi.
+    """
+    @property
+    def time_cost(self):
+        return getattr(
+            settings, 'PASSWORD_ARGON2_TIME_COST',
+            hashers.Argon2PasswordHasher.time_cost
+        )
+
+    @property
+    def memory_cost(self):
+        return getattr(
+            settings, 'PASSWORD_ARGON2_MEMORY_COST',
+            hashers.Argon2PasswordHasher.memory_cost
+        )
+
+    @property
+    def parallelism(self):
+        return getattr(
+            settings, 'PASSWORD_ARGON2_PARALLELISM',
+            hashers.Argon2PasswordHasher.parallelism
+        )
+
+
+class BCryptSHA256PasswordHasher(hashers.BCryptSHA256PasswordHasher):
+    """
+        bcrypt hasher whose log2 work factor is set by
+        PASSWORD_BCRYPT_ROUNDS. Requires bcrypt.
+    """
+    @property
+    def rounds(self):
+        return getattr(
+            settings, 'PASSWORD_BCRYPT_ROUNDS',
+            hashers.BCryptSHA256PasswordHasher.rounds
+        )
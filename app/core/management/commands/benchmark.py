@@ -0,0 +1,526 @@
+import glob
+import json
+import os
+import platform
+import subprocess
+import time
+import tracemalloc
+import uuid
+from io import BytesIO
+
+import django
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from core import seeding
+from core.models import Tag, Recipe, RecipeImageDerivative, UserDataVersion
+from core.storage import delete_unused, reference_count
+from recipe import images, uploads
+from user.throttling import LoginRateThrottle
+
+
+BENCHMARK_PASSWORD = 'benchmark-password'
+
+
+def percentile(values, value):
+    """
+        Return the nearest rank percentile of sorted values.
+    """
+    return values[min(len(values) - 1, int(len(values) * value / 100))]
+
+
+def consume(response):
+    """
+        Read the whole body of a streaming response and return it.
+    """
+    if response.streaming:
+        b''.join(response.streaming_content)
+
+    return response
+
+
+class Command(BaseCommand):
+    """
+        Django command that seeds a dataset and measures every endpoint
+        of the user and recipe APIs against it.
+
+        Each endpoint is requested through the whole middleware and
+        authentication stack, and its query count, latency percentiles
+        and peak memory are written as JSON. Compare two commits with:
+            python manage.py benchmark --output before.json
+            git checkout other-branch
+            python manage.py benchmark --compare before.json
+
+        Requests commit as they do in production, so the work run after
+        the commit happens too. The users of the run are numbered under
+        their own email prefix, and they are deleted once measured,
+        with their data and files, unless --keep is given.
+    """
+    help = 'Benchmark the API endpoints on a seeded dataset.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=10,
+            help='Number of users to seed'
+        )
+        parser.add_argument(
+            '--recipes', type=int, default=200,
+            help='Number of recipes of each user'
+        )
+        parser.add_argument(
+            '--tags', type=int, default=30,
+            help='Number of tags of each user'
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=100,
+            help='Number of ingredients of each user'
+        )
+        parser.add_argument(
+            '--tags-per-recipe', type=int, default=3,
+            help='Average number of tags of a recipe'
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8,
+            help='Average number of ingredients of a recipe'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=30,
+            help='Number of timed requests to each endpoint'
+        )
+        parser.add_argument(
+            '--warmup', type=int, default=3,
+            help='Number of untimed requests to each endpoint first'
+        )
+        parser.add_argument(
+            '--random-seed', type=int, default=0,
+            help='Seed of the generated dataset'
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write the JSON results to'
+        )
+        parser.add_argument(
+            '--compare',
+            help='JSON results of an earlier run to compare with'
+        )
+        parser.add_argument(
+            '--threshold', type=float, default=10,
+            help='Percent of p95 latency growth reported as a regression'
+        )
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with an error when a regression is found'
+        )
+        parser.add_argument(
+            '--keep', action='store_true',
+            help='Keep the seeded dataset'
+        )
+
+    def handle(self, *args, **options):
+        prefix = f'benchmark-{uuid.uuid4().hex[:8]}'
+        try:
+            start = time.perf_counter()
+            user = self._seed(options, prefix)
+            self.stdout.write(
+                f'Seeded in {time.perf_counter() - start:.1f} s'
+            )
+
+            results = {
+                'meta': self._meta(options),
+                'endpoints': {},
+            }
+            for name, request, setup in self._endpoints(user, prefix):
+                results['endpoints'][name] = self._measure(
+                    request, setup, options
+                )
+                self._report(name, results['endpoints'][name])
+        finally:
+            if not options['keep']:
+                self._clean(prefix)
+
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                json.dump(results, f, indent=2, sort_keys=True)
+
+        if options['compare']:
+            with open(options['compare']) as f:
+                baseline = json.load(f)
+            regressions = self._compare(baseline, results, options)
+            if regressions and options['fail_on_regression']:
+                raise CommandError(
+                    f'{len(regressions)} endpoints regressed: '
+                    f'{", ".join(regressions)}'
+                )
+
+    def _meta(self, options):
+        """
+            Return what identifies the run and its dataset.
+        """
+        try:
+            commit = subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                universal_newlines=True
+            ).stdout.strip() or None
+        except OSError:
+            commit = None
+
+        return {
+            'commit': commit,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'dataset': {
+                name: options[name] for name in (
+                    'users', 'recipes', 'tags', 'ingredients',
+                    'tags_per_recipe', 'ingredients_per_recipe',
+                    'random_seed',
+                )
+            },
+            'repeat': options['repeat'],
+        }
+
+    def _seed(self, options, prefix):
+        """
+            Create users with their tags, ingredients and recipes, and
+            return the user whose data the endpoints request.
+        """
+        user_ids = seeding.seed(
+            users=options['users'],
+            recipes=options['recipes'],
+            tags=options['tags'],
+            ingredients=options['ingredients'],
+            tags_per_recipe=options['tags_per_recipe'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+            random_seed=options['random_seed'],
+            email_prefix=prefix,
+            password=BENCHMARK_PASSWORD
+        )
+        if not user_ids:
+            raise CommandError('Expected at least one user')
+
+        return get_user_model().objects.get(pk=user_ids[0])
+
+    def _clean(self, prefix):
+        """
+            Delete the users of the run with their data, and the files
+            only they referenced.
+        """
+        # Derivatives generated after their recipe is gone would be left
+        images.wait_for_derivatives()
+
+        users = get_user_model().objects.filter(email__startswith=f'{prefix}-')
+        for recipe_id in Recipe.objects.filter(
+            user__in=users
+        ).values_list('id', flat=True):
+            for path in glob.glob(os.path.join(
+                uploads.upload_dir('partial'), f'{recipe_id}-*.part'
+            )):
+                os.remove(path)
+
+        names = set(Recipe.objects.filter(
+            user__in=users
+        ).exclude(image='').values_list('image', flat=True))
+        names.update(RecipeImageDerivative.objects.filter(
+            recipe__user__in=users
+        ).values_list('file', flat=True))
+        users.delete()
+
+        # Released files are kept for the grace period of duplicate
+        # uploads, the files of the run are deleted right away
+        for name in names:
+            if not reference_count(name):
+                delete_unused(name, timezone.now())
+
+    def _endpoints(self, user, prefix):
+        """
+            Return the name, request and untimed setup of each endpoint.
+        """
+        # Requests have to pass the host validation of the settings
+        host = next((
+            host for host in settings.ALLOWED_HOSTS
+            if host != '*' and not host.startswith('.')
+        ), 'localhost')
+        client = APIClient(HTTP_HOST=host)
+        token = Token.objects.create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        anonymous = APIClient(HTTP_HOST=host)
+
+        recipe = Recipe.objects.filter(user=user).order_by('id').first()
+        tag_ids = ','.join(map(str, Tag.objects.filter(
+            user=user
+        ).values_list('id', flat=True)[:2]))
+        created, created_tags, created_recipes = [], [], []
+        tags = list(Tag.objects.filter(user=user).values('id', 'name')[:50])
+        recipe_ids = list(Recipe.objects.filter(
+            user=user
+        ).values_list('id', flat=True)[:50])
+        image = BytesIO()
+        Image.new('RGB', (64, 64), (200, 120, 40)).save(image, 'PNG')
+        image = image.getvalue()
+        counter = iter(range(10 ** 9))
+
+        def new_recipe():
+            created.append(Recipe.objects.create(
+                user=user, title='deleted', time_minutes=1, price=1
+            ).id)
+
+        def new_tags():
+            created_tags[:] = [tag.id for tag in seeding.insert(Tag, [
+                Tag(user=user, name=f'deleted {next(counter)}')
+                for _ in range(50)
+            ], returning=True)]
+
+        def new_recipes():
+            created_recipes[:] = [
+                recipe.id for recipe in seeding.insert(Recipe, [
+                    Recipe(user=user, title=f'deleted {next(counter)}',
+                           time_minutes=1, price=1)
+                    for _ in range(50)
+                ], returning=True)
+            ]
+
+        def bump():
+            UserDataVersion.objects.bump(user.id)
+
+        def upload():
+            file = BytesIO(image)
+            file.name = 'image.png'
+            return client.post(
+                reverse('recipe:recipe-upload-image', args=[recipe.id]),
+                {'image': file},
+                format='multipart'
+            )
+
+        recipe_url = reverse('recipe:recipe-detail', args=[recipe.id])
+        resumable_url = reverse(
+            'recipe:recipe-upload-image-resumable', args=[recipe.id]
+        )
+        # An interrupted upload to resume, deleted with the dataset
+        upload_id = client.put(
+            resumable_url,
+            image[:len(image) // 2],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-{len(image) // 2 - 1}/{len(image)}'
+        ).data['upload_id']
+        recipe_data = {
+            'title': 'Benchmark recipe',
+            'time_minutes': 10,
+            'price': '5.00',
+            'tags': [],
+            'ingredients': [],
+        }
+
+        return (
+            ('user create', lambda: anonymous.post(reverse('user:create'), {
+                'email': f'{prefix}-new-{next(counter)}@example.com',
+                'password': BENCHMARK_PASSWORD,
+                'name': 'Benchmark',
+            }), None),
+            ('user token', lambda: anonymous.post(reverse('user:token'), {
+                'email': user.email,
+                'password': BENCHMARK_PASSWORD,
+            }), lambda: LoginRateThrottle().reset(user.email)),
+            ('user me', lambda: client.get(reverse('user:me')), None),
+            ('user me update', lambda: client.patch(
+                reverse('user:me'), {'name': 'Benchmark'}
+            ), None),
+            ('tags list', lambda: client.get(
+                reverse('recipe:tag-list')
+            ), None),
+            ('tags list cold', lambda: client.get(
+                reverse('recipe:tag-list')
+            ), bump),
+            ('tags assigned', lambda: client.get(
+                reverse('recipe:tag-list'), {'assigned_only': 1}
+            ), bump),
+            ('tags autocomplete', lambda: client.get(
+                reverse('recipe:tag-autocomplete'), {'q': 'tag 1'}
+            ), bump),
+            ('tags create', lambda: client.post(
+                reverse('recipe:tag-list'),
+                {'name': f'new tag {next(counter)}'}
+            ), None),
+            ('tags bulk', lambda: client.post(
+                reverse('recipe:tag-bulk'),
+                [{'name': f'bulk tag {next(counter)}'} for _ in range(50)],
+                format='json'
+            ), None),
+            ('tags bulk update', lambda: client.patch(
+                reverse('recipe:tag-bulk'), tags, format='json'
+            ), None),
+            ('tags bulk delete', lambda: client.delete(
+                reverse('recipe:tag-bulk'), created_tags, format='json'
+            ), new_tags),
+            ('ingredients list', lambda: client.get(
+                reverse('recipe:ingredient-list')
+            ), None),
+            ('ingredients list cold', lambda: client.get(
+                reverse('recipe:ingredient-list')
+            ), bump),
+            ('ingredients autocomplete', lambda: client.get(
+                reverse('recipe:ingredient-autocomplete'),
+                {'q': 'ingredient 1'}
+            ), bump),
+            ('ingredients bulk', lambda: client.post(
+                reverse('recipe:ingredient-bulk'),
+                [{'name': f'bulk ingredient {next(counter)}'}
+                 for _ in range(50)],
+                format='json'
+            ), None),
+            ('recipes list', lambda: client.get(
+                reverse('recipe:recipe-list')
+            ), None),
+            ('recipes list cold', lambda: client.get(
+                reverse('recipe:recipe-list')
+            ), bump),
+            ('recipes by tags', lambda: client.get(
+                reverse('recipe:recipe-list'), {'tags': tag_ids}
+            ), bump),
+            ('recipes search', lambda: client.get(
+                reverse('recipe:recipe-list'), {'search': 'recipe 1'}
+            ), bump),
+            ('recipes retrieve', lambda: client.get(recipe_url), None),
+            ('recipes create', lambda: client.post(
+                reverse('recipe:recipe-list'), recipe_data, format='json'
+            ), None),
+            ('recipes update', lambda: client.patch(
+                recipe_url, {'title': 'recipe 0'}, format='json'
+            ), None),
+            ('recipes replace', lambda: client.put(
+                recipe_url, dict(recipe_data, title=recipe.title),
+                format='json'
+            ), None),
+            ('recipes delete', lambda: client.delete(reverse(
+                'recipe:recipe-detail', args=[created.pop()]
+            )), new_recipe),
+            ('recipes bulk', lambda: client.post(
+                reverse('recipe:recipe-bulk'),
+                [recipe_data] * 50,
+                format='json'
+            ), None),
+            ('recipes bulk update', lambda: client.patch(
+                reverse('recipe:recipe-bulk'),
+                [{'id': recipe_id, 'price': '6.00'}
+                 for recipe_id in recipe_ids],
+                format='json'
+            ), None),
+            ('recipes bulk delete', lambda: client.delete(
+                reverse('recipe:recipe-bulk'), created_recipes, format='json'
+            ), new_recipes),
+            ('recipes export', lambda: consume(client.get(
+                reverse('recipe:recipe-export')
+            )), None),
+            ('recipes upload image', upload, None),
+            ('recipes resumable offset', lambda: client.get(
+                resumable_url, {'upload_id': upload_id}
+            ), None),
+            ('recipes resumable upload', lambda: client.put(
+                resumable_url,
+                image,
+                content_type='application/octet-stream',
+                HTTP_CONTENT_RANGE=f'bytes 0-{len(image) - 1}/{len(image)}'
+            ), None),
+        )
+
+    def _measure(self, request, setup, options):
+        """
+            Return the query count, latency percentiles and peak memory
+            of an endpoint.
+        """
+        def run():
+            if setup is not None:
+                setup()
+            start = time.perf_counter()
+            response = request()
+            return time.perf_counter() - start, response
+
+        for _ in range(options['warmup']):
+            run()
+
+        timings = sorted(run()[0] * 1000 for _ in range(options['repeat']))
+
+        # Tracing slows every allocation down, so memory and queries
+        # are measured on a separate request
+        if setup is not None:
+            setup()
+        with CaptureQueriesContext(connection) as queries:
+            tracemalloc.start()
+            try:
+                response = request()
+                current, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+
+        return {
+            'status': response.status_code,
+            'queries': len(queries),
+            'p50_ms': round(percentile(timings, 50), 3),
+            'p95_ms': round(percentile(timings, 95), 3),
+            'p99_ms': round(percentile(timings, 99), 3),
+            'mean_ms': round(sum(timings) / len(timings), 3),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def _report(self, name, result):
+        """
+            Print the results of an endpoint.
+        """
+        line = (
+            f'{name:<28} {result["queries"]:>3} queries  '
+            f'p50 {result["p50_ms"]:>8.2f} ms  '
+            f'p95 {result["p95_ms"]:>8.2f} ms  '
+            f'p99 {result["p99_ms"]:>8.2f} ms  '
+            f'{result["peak_memory_kb"]:>8.1f} KB'
+        )
+        if result['status'] >= 400:
+            line = self.style.ERROR(f'{line}  status {result["status"]}')
+        self.stdout.write(line)
+
+    def _compare(self, baseline, results, options):
+        """
+            Print the changes from a baseline run and return the names
+            of the endpoints that regressed.
+        """
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'\nCompared with {baseline["meta"].get("commit") or "baseline"}'
+        ))
+        if baseline['meta'].get('dataset') != results['meta']['dataset']:
+            self.stdout.write(self.style.WARNING(
+                'The baseline was measured on a different dataset'
+            ))
+
+        regressions = []
+        for name, result in results['endpoints'].items():
+            before = baseline['endpoints'].get(name)
+            if before is None:
+                self.stdout.write(f'{name:<28} new')
+                continue
+
+            change = (
+                (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100
+                if before['p95_ms'] else 0
+            )
+            line = (
+                f'{name:<28} queries {before["queries"]:>3} -> '
+                f'{result["queries"]:<3}  p95 {before["p95_ms"]:>8.2f} -> '
+                f'{result["p95_ms"]:>8.2f} ms ({change:+.0f}%)'
+            )
+            if (change > options['threshold']
+                    or result['queries'] > before['queries']):
+                regressions.append(name)
+                self.stdout.write(self.style.ERROR(line))
+            else:
+                self.stdout.write(line)
+
+        return regressions
@@ -0,0 +1,90 @@
+import posixpath
+from datetime import timedelta
+
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from core.storage import (
+    UPLOAD_DIRECTORIES, delete_unused, is_content_addressed,
+    referenced_files
+)
+
+
+class Command(BaseCommand):
+    """
+        Django command that deletes the uploaded files no longer
+        referenced by any row, and the abandoned partial uploads.
+    """
+    help = 'Delete unreferenced uploaded files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--directory', default='uploads/recipe',
+            help='Storage directory holding the content addressed files'
+        )
+        parser.add_argument(
+            '--min-age', type=int, default=3600,
+            help='Seconds a file must be unreferenced for, so that files '
+                 'of uploads still in progress are kept'
+        )
+        parser.add_argument(
+            '--partial-age', type=int, default=24 * 3600,
+            help='Seconds after which partial uploads are abandoned'
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='List the files without deleting them'
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        self.dry_run = options['dry_run']
+        referenced = referenced_files()
+
+        deleted = 0
+        cutoff = now - timedelta(seconds=options['min_age'])
+        for name in self._walk(options['directory']):
+            if not is_content_addressed(name) or name in referenced:
+                continue
+            if default_storage.get_modified_time(name) < cutoff:
+                deleted += self._delete(name, cutoff)
+
+        cutoff = now - timedelta(seconds=options['partial_age'])
+        for directory in UPLOAD_DIRECTORIES:
+            for name in self._walk(directory):
+                if default_storage.get_modified_time(name) < cutoff:
+                    deleted += self._delete(name)
+
+        self.stdout.write(f'Deleted {deleted} unreferenced files')
+
+    def _walk(self, directory):
+        """
+            Yield the names of every file under a storage directory.
+        """
+        if not default_storage.exists(directory):
+            return
+
+        directories, files = default_storage.listdir(directory)
+        for name in files:
+            yield posixpath.join(directory, name)
+        for name in directories:
+            yield from self._walk(posixpath.join(directory, name))
+
+    def _delete(self, name, cutoff=None):
+        """
+            Delete a file unless running dry. With a cutoff, the file is
+            kept if an upload matched it since the files were listed.
+        """
+        if self.dry_run:
+            self.stdout.write(name)
+            return 1
+
+        if cutoff is not None:
+            if not delete_unused(name, cutoff):
+                return 0
+        else:
+            default_storage.delete(name)
+
+        self.stdout.write(name)
+        return 1
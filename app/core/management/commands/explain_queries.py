@@ -0,0 +1,175 @@
+import os
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+
+from core import seeding
+from core.models import Tag, Ingredient, Recipe
+from recipe.autocomplete import match_names
+from recipe.filters import filter_by_related, filter_by_search, MATCH_ALL
+
+
+SEED_EMAIL_PREFIX = 'explain-queries'
+
+
+class Command(BaseCommand):
+    """
+        Django command that prints the query plans and latency of the
+        per user queries made by the recipe API.
+
+        Compare the indexes by running it before and after migrating:
+            python manage.py explain_queries --seed 1000000
+            python manage.py migrate core 0005
+            python manage.py explain_queries > before.txt
+            python manage.py migrate core
+            python manage.py explain_queries > after.txt
+
+        The recipe searches compare the ranked full text search with
+        the substring scans it replaces, which only run on PostgreSQL.
+    """
+    help = 'Print the query plans and latency of the recipe API queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Email of the user to query, defaults to the user '
+                 'with the most recipes'
+        )
+        parser.add_argument(
+            '--seed', type=int, default=0,
+            help='Number of recipes to create for the benchmark user first'
+        )
+        parser.add_argument(
+            '--repeat', type=int, default=20,
+            help='Number of times each query is timed'
+        )
+        parser.add_argument(
+            '--page-size', type=int, default=50,
+            help='Number of rows fetched by the list queries'
+        )
+        parser.add_argument(
+            '--search', default='recipe 42',
+            help='Terms of the recipe search queries'
+        )
+        parser.add_argument(
+            '--prefix', default='ingredient 4',
+            help='Term of the autocomplete queries'
+        )
+
+    def handle(self, *args, **options):
+        if options['seed']:
+            self._seed(options['seed'])
+
+        user = self._get_user(options['user'])
+        page_size = options['page_size']
+        search = options['search']
+        prefix = options['prefix'].upper()
+        tag_ids = list(
+            Tag.objects.filter(user=user).values_list('id', flat=True)[:3]
+        )
+        ingredient_ids = list(
+            Ingredient.objects.filter(user=user)
+            .values_list('id', flat=True)[:3]
+        )
+
+        queries = (
+            ('tags', Tag.objects.filter(
+                user=user
+            ).order_by('-name', 'id')[:page_size]),
+            ('ingredients', Ingredient.objects.filter(
+                user=user
+            ).order_by('-name', 'id')[:page_size]),
+            ('assigned tags', Tag.objects.filter(
+                user=user, recipe__isnull=False
+            ).order_by('-name', 'id').distinct()[:page_size]),
+            ('recipes', Recipe.objects.filter(
+                user=user
+            ).order_by('-id')[:page_size]),
+            ('recipes by tag', filter_by_related(
+                Recipe.objects.filter(user=user), 'tags', tag_ids
+            ).order_by('-id')[:page_size]),
+            ('recipes by ingredient', filter_by_related(
+                Recipe.objects.filter(user=user), 'ingredients', ingredient_ids
+            ).order_by('-id')[:page_size]),
+            ('recipes by all tags', filter_by_related(
+                Recipe.objects.filter(user=user), 'tags', tag_ids, MATCH_ALL
+            ).order_by('-id')[:page_size]),
+            ('tags autocomplete', match_names(
+                Tag.objects.filter(user=user), prefix
+            )[:10]),
+            ('ingredients autocomplete', match_names(
+                Ingredient.objects.filter(user=user), prefix
+            )[:10]),
+            ('recipes by substring search', filter_by_search(
+                Recipe.objects.filter(user=user), search, full_text=False
+            ).order_by('-id')[:page_size]),
+        )
+        if connection.vendor == 'postgresql':
+            queries += (
+                ('recipes by full text search', filter_by_search(
+                    Recipe.objects.filter(user=user), search, full_text=True
+                ).order_by('-rank', '-id')[:page_size]),
+            )
+
+        # Only PostgreSQL can run the query to report the actual timings
+        explain_options = {}
+        if connection.vendor == 'postgresql':
+            explain_options = {'analyze': True, 'buffers': True}
+
+        for name, queryset in queries:
+            timings = self._time(queryset, options['repeat'])
+            self.stdout.write(self.style.MIGRATE_HEADING(name))
+            self.stdout.write(
+                f'median {statistics.median(timings):.2f} ms, '
+                f'max {max(timings):.2f} ms'
+            )
+            self.stdout.write(queryset.explain(**explain_options))
+            self.stdout.write('')
+
+    def _get_user(self, email):
+        """
+            Return the user whose data is queried.
+        """
+        users = get_user_model().objects.all()
+        if email:
+            users = users.filter(email=email)
+        else:
+            users = users.annotate(
+                recipes=Count('recipe')
+            ).order_by('-recipes')
+
+        user = users.first()
+        if user is None:
+            raise CommandError('No user to query, seed some data first')
+
+        return user
+
+    def _time(self, queryset, repeat):
+        """
+            Return the latency of each evaluation of a queryset in ms.
+        """
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(queryset.all())
+            timings.append((time.perf_counter() - start) * 1000)
+
+        return timings
+
+    def _seed(self, count):
+        """
+            Create recipes with tags and ingredients for a single user.
+        """
+        seeding.seed(
+            users=1,
+            recipes=count,
+            tags=200,
+            ingredients=500,
+            email_prefix=SEED_EMAIL_PREFIX,
+            workers=os.cpu_count()
+        )
+        self.stdout.write(f'Seeded {count} recipes')
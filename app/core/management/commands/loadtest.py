@@ -0,0 +1,285 @@
+import asyncio
+import os
+import shlex
+import socket
+import statistics
+import subprocess
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    """
+        Django command that measures the throughput and latency of an
+        endpoint under concurrent keep alive clients.
+
+        Compare the WSGI and ASGI servers by pointing it at each:
+            gunicorn -c app/gunicorn_conf.py app.wsgi:application &
+            uvicorn app.asgi:application --port 8001 &
+            python manage.py loadtest --url http://localhost:8000/...
+            python manage.py loadtest --url http://localhost:8001/...
+
+        With --workers it starts the server once per worker count on
+        the port of the url, and reports how throughput scales.
+    """
+    help = 'Load test an endpoint with concurrent clients.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url', default='http://localhost:8000/api/recipe/recipes/',
+            help='Url requested by every client'
+        )
+        parser.add_argument(
+            '--token',
+            help='Authentication token sent with every request'
+        )
+        parser.add_argument(
+            '--concurrency', type=int, default=50,
+            help='Number of concurrent clients'
+        )
+        parser.add_argument(
+            '--requests', type=int, default=1000,
+            help='Total number of requests'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=30,
+            help='Seconds to wait for each response'
+        )
+        parser.add_argument(
+            '--workers',
+            help='Comma separated worker counts to start the server with, '
+                 'e.g. 1,2,4,8'
+        )
+        parser.add_argument(
+            '--server',
+            default='gunicorn -c app/gunicorn_conf.py app.wsgi:application',
+            help='Command starting the server, given WEB_CONCURRENCY and '
+                 'GUNICORN_BIND in its environment'
+        )
+        parser.add_argument(
+            '--startup-timeout', type=float, default=30,
+            help='Seconds to wait for the server to accept connections'
+        )
+
+    def handle(self, *args, **options):
+        url = urlsplit(options['url'])
+        if url.scheme != 'http' or not url.hostname:
+            raise CommandError('Expected an http:// url')
+
+        if options['workers']:
+            try:
+                counts = [
+                    int(count) for count in options['workers'].split(',')
+                ]
+            except ValueError:
+                raise CommandError('Expected comma separated worker counts')
+            self.sweep(url, counts, options)
+        else:
+            self.report(self.measure(url, options))
+
+    def measure(self, url, options):
+        """
+            Run the test and return its result.
+        """
+        return asyncio.get_event_loop().run_until_complete(
+            self.run(url, options)
+        )
+
+    def sweep(self, url, counts, options):
+        """
+            Run the test against the server started with each number of
+            workers and print the throughput of each.
+        """
+        port = url.port or 80
+        rows = []
+        for count in counts:
+            env = dict(
+                os.environ,
+                WEB_CONCURRENCY=str(count),
+                GUNICORN_BIND=f'{url.hostname}:{port}'
+            )
+            process = subprocess.Popen(
+                shlex.split(options['server']),
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+            try:
+                self.wait_for_server(
+                    url.hostname, port, process, options['startup_timeout']
+                )
+                # Warm up the workers before measuring
+                self.measure(url, dict(
+                    options, requests=options['concurrency']
+                ))
+                result = self.measure(url, options)
+            finally:
+                process.terminate()
+                process.wait()
+
+            self.stdout.write(f'{count} workers:')
+            rows.append((count, self.report(result)))
+
+        self.stdout.write(
+            f'\n{os.cpu_count()} cores\n'
+            f'{"workers":>8} {"requests/s":>11} {"p99 ms":>8} '
+            f'{"speedup":>8} {"efficiency":>11}'
+        )
+        base_count, base = rows[0]
+        for count, summary in rows:
+            speedup = summary['throughput'] / base['throughput']
+            self.stdout.write(
+                f'{count:>8} {summary["throughput"]:>11.1f} '
+                f'{summary["p99"]:>8.2f} {speedup:>8.2f} '
+                f'{speedup * base_count / count:>11.0%}'
+            )
+
+    def wait_for_server(self, host, port, process, timeout):
+        """
+            Wait until the started server accepts connections.
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise CommandError(
+                    f'Server exited with status {process.returncode}'
+                )
+            try:
+                socket.create_connection((host, port), timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+
+        raise CommandError(f'Server not listening after {timeout} seconds')
+
+    async def run(self, url, options):
+        """
+            Return the latencies, errors and duration of the test.
+        """
+        path = url.path or '/'
+        if url.query:
+            path = f'{path}?{url.query}'
+        headers = [f'Host: {url.netloc}', 'Connection: keep-alive']
+        if options['token']:
+            headers.append(f'Authorization: Token {options["token"]}')
+        request = (
+            f'GET {path} HTTP/1.1\r\n' + '\r\n'.join(headers) + '\r\n\r\n'
+        ).encode('latin1')
+
+        remaining = [options['requests']]
+        latencies, errors = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*[
+            self.client(
+                url, request, remaining, latencies, errors,
+                options['timeout']
+            )
+            for _ in range(options['concurrency'])
+        ])
+
+        return {
+            'latencies': latencies,
+            'errors': errors,
+            'duration': time.perf_counter() - start,
+        }
+
+    async def client(self, url, request, remaining, latencies, errors,
+                     timeout):
+        """
+            Send requests over one connection until all are sent.
+        """
+        reader = writer = None
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.open_connection(
+                        url.hostname, url.port or 80
+                    )
+
+                sent = time.perf_counter()
+                writer.write(request)
+                status, keep_alive = await asyncio.wait_for(
+                    self.read_response(reader),
+                    timeout
+                )
+                latencies.append((time.perf_counter() - sent) * 1000)
+                if status >= 400:
+                    errors.append(status)
+            except (OSError, asyncio.TimeoutError,
+                    asyncio.IncompleteReadError) as exc:
+                errors.append(type(exc).__name__)
+                keep_alive = False
+
+            if not keep_alive and writer is not None:
+                writer.close()
+                reader = writer = None
+
+        if writer is not None:
+            writer.close()
+
+    async def read_response(self, reader):
+        """
+            Read a response and return its status and whether the
+            connection can be reused.
+        """
+        status_line = await reader.readuntil(b'\r\n')
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await reader.readuntil(b'\r\n')
+            if line == b'\r\n':
+                break
+            name, _, value = line.decode('latin1').partition(':')
+            headers[name.strip().lower()] = value.strip().lower()
+
+        if headers.get('transfer-encoding') == 'chunked':
+            while True:
+                line = await reader.readuntil(b'\r\n')
+                size = int(line.split(b';')[0], 16)
+                await reader.readexactly(size + 2)
+                if size == 0:
+                    break
+        elif 'content-length' in headers:
+            await reader.readexactly(int(headers['content-length']))
+        else:
+            await reader.read()
+            return status, False
+
+        return status, headers.get('connection') != 'close'
+
+    def report(self, result):
+        """
+            Print the throughput and latency percentiles, and return
+            them.
+        """
+        latencies = sorted(result['latencies'])
+        if not latencies:
+            raise CommandError('No response received')
+
+        def percentile(value):
+            return latencies[min(
+                len(latencies) - 1,
+                int(len(latencies) * value / 100)
+            )]
+
+        throughput = len(latencies) / result['duration']
+        self.stdout.write(
+            f'{len(latencies)} responses in {result["duration"]:.2f} s, '
+            f'{throughput:.1f} requests/s'
+        )
+        self.stdout.write(
+            f'latency median {statistics.median(latencies):.2f} ms, '
+            f'p95 {percentile(95):.2f} ms, p99 {percentile(99):.2f} ms, '
+            f'max {latencies[-1]:.2f} ms'
+        )
+        if result['errors']:
+            self.stdout.write(self.style.ERROR(
+                f'{len(result["errors"])} errors: '
+                f'{sorted(set(map(str, result["errors"])))}'
+            ))
+
+        return {'throughput': throughput, 'p99': percentile(99)}
@@ -0,0 +1,97 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core import seeding
+
+
+class Command(BaseCommand):
+    """
+        Django command that fills the database with users, tags,
+        ingredients and recipes for load tests and staging.
+
+        Every user gets the same password, hashed once. On PostgreSQL
+        the rows are written with COPY by parallel worker processes:
+            python manage.py seed_data --users 1000 --recipes 1000
+    """
+    help = 'Seed the database with generated recipes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--users', type=int, default=100,
+            help='Number of users to create'
+        )
+        parser.add_argument(
+            '--recipes', type=int, default=1000,
+            help='Number of recipes of each user'
+        )
+        parser.add_argument(
+            '--tags', type=int, default=30,
+            help='Number of tags of each user'
+        )
+        parser.add_argument(
+            '--ingredients', type=int, default=100,
+            help='Number of ingredients of each user'
+        )
+        parser.add_argument(
+            '--tags-per-recipe', type=int, default=3,
+            help='Average number of tags of a recipe'
+        )
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8,
+            help='Average number of ingredients of a recipe'
+        )
+        parser.add_argument(
+            '--random-seed', type=int, default=0,
+            help='Seed of the generated data'
+        )
+        parser.add_argument(
+            '--prefix', default='seed',
+            help='Prefix of the emails of the users'
+        )
+        parser.add_argument(
+            '--password', default=seeding.SEED_PASSWORD,
+            help='Password of every user'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Number of processes writing recipes, PostgreSQL only'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=seeding.BATCH_SIZE,
+            help='Number of recipes written per transaction'
+        )
+
+    def handle(self, *args, **options):
+        if options['users'] < 1 or options['batch_size'] < 1:
+            raise CommandError('Expected positive --users and --batch-size')
+
+        start = time.perf_counter()
+        user_ids = seeding.seed(
+            users=options['users'],
+            recipes=options['recipes'],
+            tags=options['tags'],
+            ingredients=options['ingredients'],
+            tags_per_recipe=options['tags_per_recipe'],
+            ingredients_per_recipe=options['ingredients_per_recipe'],
+            random_seed=options['random_seed'],
+            email_prefix=options['prefix'],
+            password=options['password'],
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            progress=self.progress
+        )
+
+        duration = time.perf_counter() - start
+        recipes = len(user_ids) * options['recipes']
+        self.stdout.write(self.style.SUCCESS(
+            f'Seeded {len(user_ids)} users and {recipes} recipes in '
+            f'{duration:.1f} s ({recipes / duration:.0f} recipes/s)'
+        ))
+
+    def progress(self, done, total):
+        """
+            Print the number of recipes written so far.
+        """
+        self.stdout.write(f'{done} of {total} recipes')
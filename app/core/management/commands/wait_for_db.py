@@ -1,26 +1,130 @@
+import random
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 from django.db import connections
 from django.db.utils import OperationalError
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
 
 
 class Command(BaseCommand):
     """
         Django command that will pause execution
         unitl the database is available.
+
+        Each database is probed with a real query, retrying with an
+        exponential backoff and jitter until the overall timeout.
+        Several databases are probed in parallel.
     """
+    help = 'Wait until the databases accept queries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--database', action='append', dest='databases',
+            help='Alias of a database to wait for, can be repeated, '
+                 'defaults to the default database'
+        )
+        parser.add_argument(
+            '--timeout', type=float, default=60,
+            help='Seconds to wait for the databases overall'
+        )
+        parser.add_argument(
+            '--initial-delay', type=float, default=0.1,
+            help='Seconds to wait after the first failed probe'
+        )
+        parser.add_argument(
+            '--max-delay', type=float, default=5,
+            help='Maximum seconds to wait between probes'
+        )
+
     def handle(self, *args, **options):
         self.stdout.write('Waiting for database...')
 
-        db_conn = None
-        while not db_conn:
-            try:
-                db_conn = connections['default']
-            except OperationalError:
+        aliases = options['databases'] or ['default']
+        deadline = time.monotonic() + options['timeout']
+        with ThreadPoolExecutor(max_workers=len(aliases)) as executor:
+            results = list(executor.map(
+                lambda alias: self.wait(
+                    alias,
+                    deadline,
+                    options['initial_delay'],
+                    options['max_delay']
+                ),
+                aliases
+            ))
+
+        unavailable = [
+            alias for alias, available in zip(aliases, results)
+            if not available
+        ]
+        if unavailable:
+            raise CommandError(
+                f'Database unavailable after {options["timeout"]} '
+                f'seconds: {", ".join(unavailable)}'
+            )
+
+        self.stdout.write('Database available!')
+
+    def wait(self, alias, deadline, initial_delay, max_delay):
+        """
+            Probe a database until it answers or the deadline passes.
+        """
+        backoff = initial_delay
+        try:
+            while True:
+                try:
+                    self.probe(alias, deadline - time.monotonic())
+                    return True
+                except OperationalError:
+                    pass
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+
+                # Full jitter keeps restarting containers from probing
+                # in lockstep
+                delay = min(random.uniform(0, backoff), remaining)
                 self.stdout.write(
-                    'Database unavailable, waiting 1 second...'
+                    f'Database {alias} unavailable, '
+                    f'waiting {delay:.2f} seconds...'
                 )
-                time.sleep(1)
+                time.sleep(delay)
+                backoff = min(max_delay, backoff * 2)
+        finally:
+            # Connections belong to the probing thread
+            connections[alias].close()
 
-        self.stdout.write('Database available!')
+    def probe(self, alias, timeout):
+        """
+            Run a query on a database, raising OperationalError when it
+            cannot be reached.
+
+            On PostgreSQL connecting gives up after the seconds left, so
+            an unreachable host cannot block past the deadline for the
+            whole TCP connect timeout.
+        """
+        connection = connections[alias]
+        settings_dict = connection.settings_dict
+        if connection.vendor == 'postgresql':
+            options = settings_dict.get('OPTIONS', {})
+            connect_timeout = max(1, int(timeout))
+            if options.get('connect_timeout'):
+                connect_timeout = min(
+                    connect_timeout, int(options['connect_timeout'])
+                )
+            # A copy, the settings dict is shared by every thread
+            connection.settings_dict = dict(
+                settings_dict,
+                OPTIONS=dict(options, connect_timeout=connect_timeout)
+            )
+
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        except OperationalError:
+            connection.close()
+            raise
+        finally:
+            connection.settings_dict = settings_dict
@@ -0,0 +1,169 @@
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import time
+from contextlib import ExitStack
+from functools import partial
+
+from django.conf import settings
+from django.db import connections
+
+from core.profiling import RequestProfile, activate, metrics
+
+
+logger = logging.getLogger('core.profiling')
+
+
+class ProfilingMiddleware:
+    """
+        Middleware recording the latency, the SQL queries and the time
+        spent serializing and rendering of each request.
+
+        Every request is added to the metrics served at /metrics and
+        logged as JSON, flagged when it runs N+1 or repeated identical
+        queries. A sample of the requests, and those sending the
+        PROFILING_KEY in an X-Profile header, also run under cProfile.
+
+        The body of streaming responses is produced after the
+        middleware returns, so its queries are not counted.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0)
+        self.key = getattr(settings, 'PROFILING_KEY', None)
+        self.directory = getattr(settings, 'PROFILING_DIR', None)
+        self.threshold = getattr(settings, 'PROFILING_N_PLUS_ONE', 5)
+        self.slow = getattr(settings, 'PROFILING_SLOW_REQUEST', 1)
+
+    def __call__(self, request):
+        profile = RequestProfile()
+        request.profile = profile
+        on_demand = bool(self.key) and (
+            request.META.get('HTTP_X_PROFILE') == self.key
+        )
+        profiler = None
+        if on_demand or random.random() < self.sample_rate:
+            profiler = cProfile.Profile()
+
+        with ExitStack() as stack:
+            stack.enter_context(activate(profile))
+            for connection in connections.all():
+                stack.enter_context(
+                    connection.execute_wrapper(
+                        partial(self.record_query, profile)
+                    )
+                )
+            if profiler is not None:
+                profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+
+        record = self.summarize(request, profile, response)
+        metrics.observe(record)
+        if profiler is not None:
+            record['profile'] = self.save_profile(profiler, record)
+        if on_demand:
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={record[key] * 1000:.1f}'
+                for name, key in (
+                    ('total', 'duration'),
+                    ('db', 'sql_time'),
+                    ('serialize', 'serialize_time'),
+                    ('render', 'render_time'),
+                )
+            )
+
+        flagged = (
+            record['n_plus_one'] or record['duplicate_queries']
+            or record['duration'] >= self.slow
+        )
+        logger.log(
+            logging.WARNING if flagged else logging.INFO,
+            json.dumps(record, default=str)
+        )
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """
+            Name the request after the view and its action.
+        """
+        actions = getattr(view_func, 'actions', None)
+        view_class = getattr(view_func, 'cls', None)
+        if view_class is not None and actions:
+            action = actions.get(request.method.lower(), 'unknown')
+            request.profile.view = f'{view_class.__name__}.{action}'
+        elif view_class is not None:
+            request.profile.view = view_class.__name__
+        else:
+            request.profile.view = getattr(
+                view_func, '__name__', type(view_func).__name__
+            )
+
+    def process_template_response(self, request, response):
+        """
+            Time the rendering of the response, which follows.
+        """
+        profile = request.profile
+        start = time.perf_counter()
+
+        def rendered(response):
+            profile.sections['render'] += time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def record_query(self, profile, execute, sql, params, many, context):
+        """
+            Execute wrapper recording the duration of each query.
+        """
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            profile.record_query(sql, params, time.perf_counter() - start)
+
+    def summarize(self, request, profile, response):
+        """
+            Return the structured record of a handled request.
+        """
+        return {
+            'view': profile.view or 'unresolved',
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration': time.perf_counter() - profile.start,
+            'sql_queries': len(profile.queries),
+            'sql_time': profile.sql_time,
+            'serialize_time': profile.sections['serialize'],
+            'render_time': profile.sections['render'],
+            'n_plus_one': profile.n_plus_one(self.threshold),
+            'duplicate_queries': profile.duplicate_queries(),
+        }
+
+    def save_profile(self, profiler, record):
+        """
+            Write the cProfile stats to PROFILING_DIR, or return the
+            slowest functions when it is not set.
+        """
+        if self.directory:
+            os.makedirs(self.directory, exist_ok=True)
+            path = os.path.join(
+                self.directory,
+                f'{time.time():.6f}-{record["view"]}.prof'
+            )
+            profiler.dump_stats(path)
+            return path
+
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats(
+            'cumulative'
+        ).print_stats(20)
+        return output.getvalue()
@@ -0,0 +1,31 @@
+# Generated by Django 2.1.15 on 2026-10-17 04:05
+
+import core.models
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RecipeImageDerivative',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50)),
+                ('format', models.CharField(max_length=10)),
+                ('file', models.FileField(upload_to=core.models.recipe_image_derivative_file_path)),
+                ('width', models.PositiveIntegerField()),
+                ('height', models.PositiveIntegerField()),
+                ('recipe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='image_derivatives', to='core.Recipe')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='recipeimagederivative',
+            unique_together={('recipe', 'name', 'format')},
+        ),
+    ]
@@ -0,0 +1,169 @@
+# Generated by Django 2.1.15 on 2026-10-17 04:22
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+
+# Search document of a recipe: the title weighted A, the tag names B
+# and the ingredient names C
+SEARCH_FUNCTIONS = [
+    """
+    CREATE FUNCTION core_recipe_search_vector(integer, text)
+    RETURNS tsvector AS $$
+        SELECT
+            setweight(to_tsvector('english', coalesce($2, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(t.name, ' ')
+                FROM core_tag t
+                JOIN core_recipe_tags rt ON rt.tag_id = t.id
+                WHERE rt.recipe_id = $1
+            ), '')), 'B') ||
+            setweight(to_tsvector('english', coalesce((
+                SELECT string_agg(i.name, ' ')
+                FROM core_ingredient i
+                JOIN core_recipe_ingredients ri ON ri.ingredient_id = i.id
+                WHERE ri.recipe_id = $1
+            ), '')), 'C')
+    $$ LANGUAGE sql STABLE
+    """,
+    """
+    CREATE FUNCTION core_recipe_search_update() RETURNS trigger AS $$
+    BEGIN
+        NEW.search_vector := core_recipe_search_vector(NEW.id, NEW.title);
+        RETURN NEW;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    # Recomputes the recipes of the changed through table rows
+    """
+    CREATE FUNCTION core_recipe_search_linked() RETURNS trigger AS $$
+    BEGIN
+        UPDATE core_recipe SET search_vector = NULL
+        WHERE id IN (SELECT recipe_id FROM changed);
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+    # Recomputes the recipes of a renamed tag or ingredient, the through
+    # table and its column are the trigger arguments
+    """
+    CREATE FUNCTION core_recipe_search_renamed() RETURNS trigger AS $$
+    BEGIN
+        EXECUTE format(
+            'UPDATE core_recipe SET search_vector = NULL WHERE id IN '
+            '(SELECT recipe_id FROM %I WHERE %I = $1)',
+            TG_ARGV[0], TG_ARGV[1]
+        ) USING NEW.id;
+        RETURN NULL;
+    END
+    $$ LANGUAGE plpgsql
+    """,
+]
+
+SEARCH_TRIGGERS = [
+    """
+    CREATE TRIGGER core_recipe_search_update
+    BEFORE INSERT OR UPDATE ON core_recipe
+    FOR EACH ROW EXECUTE PROCEDURE core_recipe_search_update()
+    """,
+    """
+    CREATE TRIGGER core_recipe_tags_search_insert
+    AFTER INSERT ON core_recipe_tags REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_recipe_search_linked()
+    """,
+    """
+    CREATE TRIGGER core_recipe_tags_search_delete
+    AFTER DELETE ON core_recipe_tags REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_recipe_search_linked()
+    """,
+    """
+    CREATE TRIGGER core_recipe_ingr_search_insert
+    AFTER INSERT ON core_recipe_ingredients REFERENCING NEW TABLE AS changed
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_recipe_search_linked()
+    """,
+    """
+    CREATE TRIGGER core_recipe_ingr_search_delete
+    AFTER DELETE ON core_recipe_ingredients REFERENCING OLD TABLE AS changed
+    FOR EACH STATEMENT EXECUTE PROCEDURE core_recipe_search_linked()
+    """,
+    """
+    CREATE TRIGGER core_tag_search_renamed
+    AFTER UPDATE OF name ON core_tag
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE PROCEDURE core_recipe_search_renamed('core_recipe_tags', 'tag_id')
+    """,
+    """
+    CREATE TRIGGER core_ingr_search_renamed
+    AFTER UPDATE OF name ON core_ingredient
+    FOR EACH ROW WHEN (OLD.name IS DISTINCT FROM NEW.name)
+    EXECUTE PROCEDURE core_recipe_search_renamed(
+        'core_recipe_ingredients', 'ingredient_id'
+    )
+    """,
+]
+
+SEARCH_INDEX = [
+    # Fill the vectors of the existing recipes through the trigger
+    'UPDATE core_recipe SET search_vector = NULL',
+    'CREATE INDEX core_recipe_search_idx '
+    'ON core_recipe USING gin (search_vector)',
+]
+
+DROP_SEARCH = [
+    'DROP INDEX IF EXISTS core_recipe_search_idx',
+    'DROP TRIGGER IF EXISTS core_ingr_search_renamed ON core_ingredient',
+    'DROP TRIGGER IF EXISTS core_tag_search_renamed ON core_tag',
+    'DROP TRIGGER IF EXISTS core_recipe_ingr_search_delete '
+    'ON core_recipe_ingredients',
+    'DROP TRIGGER IF EXISTS core_recipe_ingr_search_insert '
+    'ON core_recipe_ingredients',
+    'DROP TRIGGER IF EXISTS core_recipe_tags_search_delete '
+    'ON core_recipe_tags',
+    'DROP TRIGGER IF EXISTS core_recipe_tags_search_insert '
+    'ON core_recipe_tags',
+    'DROP TRIGGER IF EXISTS core_recipe_search_update ON core_recipe',
+    'DROP FUNCTION IF EXISTS core_recipe_search_renamed()',
+    'DROP FUNCTION IF EXISTS core_recipe_search_linked()',
+    'DROP FUNCTION IF EXISTS core_recipe_search_update()',
+    'DROP FUNCTION IF EXISTS core_recipe_search_vector(integer, text)',
+]
+
+
+def create_search(apps, schema_editor):
+    """
+        Create the search triggers and index on PostgreSQL, other
+        databases search with plain substring matches.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    # No params, so psycopg2 leaves the %I placeholders of format() alone
+    for statement in SEARCH_FUNCTIONS + SEARCH_TRIGGERS + SEARCH_INDEX:
+        schema_editor.execute(statement, params=None)
+
+
+def drop_search(apps, schema_editor):
+    """
+        Drop the search triggers and index.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for statement in DROP_SEARCH:
+        schema_editor.execute(statement, params=None)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_userdataversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search, drop_search),
+    ]
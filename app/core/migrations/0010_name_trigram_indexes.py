@@ -0,0 +1,54 @@
+# Generated by Django 2.1.15 on 2026-10-17 04:23
+
+from django.db import migrations
+
+
+# Autocomplete filters by user, then by prefix or trigram similarity of
+# the upper cased name, btree_gin lets both columns share one index
+TRIGRAM_INDEXES = [
+    'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+    'CREATE EXTENSION IF NOT EXISTS btree_gin',
+    'CREATE INDEX core_tag_name_trgm_idx '
+    'ON core_tag USING gin (user_id, UPPER(name) gin_trgm_ops)',
+    'CREATE INDEX core_ingr_name_trgm_idx '
+    'ON core_ingredient USING gin (user_id, UPPER(name) gin_trgm_ops)',
+]
+
+DROP_TRIGRAM_INDEXES = [
+    'DROP INDEX IF EXISTS core_ingr_name_trgm_idx',
+    'DROP INDEX IF EXISTS core_tag_name_trgm_idx',
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    """
+        Create the trigram indexes on PostgreSQL, other databases match
+        names with plain substring scans.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for statement in TRIGRAM_INDEXES:
+        schema_editor.execute(statement)
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    """
+        Drop the trigram indexes, the extensions are left installed.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+
+    for statement in DROP_TRIGRAM_INDEXES:
+        schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recipe_search_vector'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
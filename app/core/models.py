@@ -2,10 +2,12 @@ import uuid
 from os import path
 
 from django.db import models
+from django.contrib.postgres.search import SearchVectorField
 from django.contrib.auth.models import (
     AbstractBaseUser, BaseUserManager, PermissionsMixin
 )
 from django.conf import settings
+from django.utils import timezone
 
 
 def recipe_image_file_path(instance, fileName):
@@ -17,6 +19,15 @@ def recipe_image_file_path(instance, fileName):
     return path.join('uploads/recipe/', fileName)
 
 
+def recipe_image_derivative_file_path(instance, fileName):
+    """
+        Generate file path for a resized recipe image.
+    """
+    ext = fileName.split('.')[-1]
+    fileName = f'{uuid.uuid4()}.{ext}'
+    return path.join('uploads/recipe/derivatives/', fileName)
+
+
 class UserManager(BaseUserManager):
     def create_user(self, email, password=None, **extra_fields):
         """
@@ -76,6 +87,15 @@ class Tag(models.Model):
         on_delete=models.CASCADE,
     )
 
+    class Meta:
+        indexes = [
+            # Listing a user's tags ordered by name
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_tag_user_name_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -90,6 +110,15 @@ class Ingredient(models.Model):
         on_delete=models.CASCADE
     )
 
+    class Meta:
+        indexes = [
+            # Listing a user's ingredients ordered by name
+            models.Index(
+                fields=['user', '-name', 'id'],
+                name='core_ingr_user_name_idx'
+            ),
+        ]
+
     def __str__(self):
         return self.name
 
@@ -109,6 +138,78 @@ class Recipe(models.Model):
     ingredients = models.ManyToManyField('Ingredient')
     tags = models.ManyToManyField('Tag')
     image = models.ImageField(null=True, upload_to=recipe_image_file_path)
+    # Kept up to date by database triggers on PostgreSQL
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            # Listing a user's recipes from the newest
+            models.Index(
+                fields=['user', '-id'],
+                name='core_recipe_user_id_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
+
+
+class RecipeImageDerivative(models.Model):
+    """
+        Resized copy of a recipe image.
+    """
+    recipe = models.ForeignKey(
+        'Recipe',
+        on_delete=models.CASCADE,
+        related_name='image_derivatives'
+    )
+    name = models.CharField(max_length=50)
+    format = models.CharField(max_length=10)
+    file = models.FileField(upload_to=recipe_image_derivative_file_path)
+    width = models.PositiveIntegerField()
+    height = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('recipe', 'name', 'format')
+
+    def __str__(self):
+        return f'{self.recipe_id} {self.name} {self.format}'
+
+
+class UserDataVersionManager(models.Manager):
+    def for_user(self, user):
+        """
+            Return the data version of a user, creating it if needed.
+        """
+        version, _ = self.get_or_create(user_id=user.id)
+        return version
+
+    def bump(self, user_id):
+        """
+            Mark that the data of a user changed.
+        """
+        # Users without a row have no client holding a stale version
+        self.filter(user_id=user_id).update(
+            version=models.F('version') + 1,
+            modified=timezone.now()
+        )
+
+
+class UserDataVersion(models.Model):
+    """
+        Version of the tags, ingredients and recipes of a user, bumped
+        on every change to validate cached responses cheaply.
+    """
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='data_version'
+    )
+    version = models.BigIntegerField(default=0)
+    modified = models.DateTimeField(default=timezone.now)
+
+    objects = UserDataVersionManager()
+
+    def __str__(self):
+        return f'{self.user_id} v{self.version}'
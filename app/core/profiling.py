@@ -0,0 +1,257 @@
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from core.db.pool import pool_stats
+
+
+# Upper bounds in seconds of the request latency histogram
+LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+
+_local = threading.local()
+
+
+class RequestProfile:
+    """
+        Timings and queries of the request handled by a thread.
+    """
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view = None
+        self.queries = []
+        self.sections = defaultdict(float)
+        self._depth = Counter()
+
+    def record_query(self, sql, params, duration):
+        """
+            Record an executed query and its duration in seconds.
+        """
+        self.queries.append((sql, params, duration))
+
+    @contextmanager
+    def section(self, name):
+        """
+            Add the time spent in the block to a named section, blocks
+            nested in a block of the same name are counted once.
+        """
+        self._depth[name] += 1
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._depth[name] -= 1
+            if not self._depth[name]:
+                self.sections[name] += time.perf_counter() - start
+
+    @property
+    def sql_time(self):
+        return sum(duration for sql, params, duration in self.queries)
+
+    def duplicate_queries(self):
+        """
+            Return the queries run more than once with the same
+            parameters and how many times each ran.
+        """
+        counts = Counter(
+            (sql, repr(params)) for sql, params, duration in self.queries
+        )
+        return {sql: count for (sql, params), count in counts.items()
+                if count > 1}
+
+    def n_plus_one(self, threshold):
+        """
+            Return the statements run at least threshold times with
+            different parameters, as a loop over rows would.
+        """
+        statements = defaultdict(set)
+        for sql, params, duration in self.queries:
+            statements[sql].add(repr(params))
+
+        return {sql: len(params) for sql, params in statements.items()
+                if len(params) >= threshold}
+
+
+def current_profile():
+    """
+        Return the profile of the request handled by this thread.
+    """
+    return getattr(_local, 'profile', None)
+
+
+@contextmanager
+def activate(profile):
+    """
+        Make a profile the one of this thread within the block.
+    """
+    previous = current_profile()
+    _local.profile = profile
+    try:
+        yield profile
+    finally:
+        _local.profile = previous
+
+
+@contextmanager
+def timed(name):
+    """
+        Add the time spent in the block to a section of the current
+        request profile, if any.
+    """
+    profile = current_profile()
+    if profile is None:
+        yield
+        return
+
+    with profile.section(name):
+        yield
+
+
+class ProfiledSerializerMixin:
+    """
+        Serializer mixin adding the time spent building representations
+        to the serialize section of the request profile.
+    """
+    def to_representation(self, instance):
+        with timed('serialize'):
+            return super().to_representation(instance)
+
+
+class Metrics:
+    """
+        Thread safe aggregate of the request profiles of the process.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """
+            Forget every recorded request.
+        """
+        with self._lock:
+            self.requests = Counter()
+            self.buckets = defaultdict(lambda: [0] * len(LATENCY_BUCKETS))
+            self.totals = defaultdict(Counter)
+
+    def observe(self, record):
+        """
+            Add the summary of a request to the aggregates.
+        """
+        view = record['view']
+        with self._lock:
+            self.requests[(view, record['method'], record['status'])] += 1
+
+            buckets = self.buckets[view]
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if record['duration'] <= bound:
+                    buckets[index] += 1
+
+            totals = self.totals[view]
+            totals['count'] += 1
+            totals['duration'] += record['duration']
+            totals['sql_queries'] += record['sql_queries']
+            totals['sql_time'] += record['sql_time']
+            totals['serialize_time'] += record['serialize_time']
+            totals['render_time'] += record['render_time']
+            totals['n_plus_one'] += bool(record['n_plus_one'])
+            totals['duplicate_queries'] += bool(record['duplicate_queries'])
+
+    def render(self):
+        """
+            Return the aggregates and the cache and pool stats in the
+            Prometheus text format.
+        """
+        with self._lock:
+            requests = dict(self.requests)
+            buckets = {view: list(counts)
+                       for view, counts in self.buckets.items()}
+            totals = {view: dict(counts)
+                      for view, counts in self.totals.items()}
+
+        lines = [
+            '# HELP app_requests_total Requests handled.',
+            '# TYPE app_requests_total counter',
+        ]
+        for (view, method, status), count in sorted(requests.items()):
+            lines.append(
+                f'app_requests_total{{view="{view}",method="{method}",'
+                f'status="{status}"}} {count}'
+            )
+
+        lines += [
+            '# HELP app_request_duration_seconds Request latency.',
+            '# TYPE app_request_duration_seconds histogram',
+        ]
+        for view in sorted(totals):
+            for bound, count in zip(LATENCY_BUCKETS, buckets[view]):
+                lines.append(
+                    f'app_request_duration_seconds_bucket{{view="{view}",'
+                    f'le="{bound}"}} {count}'
+                )
+            lines += [
+                f'app_request_duration_seconds_bucket{{view="{view}",'
+                f'le="+Inf"}} {totals[view]["count"]}',
+                f'app_request_duration_seconds_sum{{view="{view}"}} '
+                f'{totals[view]["duration"]}',
+                f'app_request_duration_seconds_count{{view="{view}"}} '
+                f'{totals[view]["count"]}',
+            ]
+
+        for name, key, description in (
+            ('sql_queries_total', 'sql_queries', 'SQL queries run.'),
+            ('sql_seconds_total', 'sql_time', 'Time running SQL.'),
+            ('serialize_seconds_total', 'serialize_time',
+             'Time in serializers.'),
+            ('render_seconds_total', 'render_time', 'Time rendering.'),
+            ('n_plus_one_total', 'n_plus_one',
+             'Requests with N+1 queries.'),
+            ('duplicate_queries_total', 'duplicate_queries',
+             'Requests repeating identical queries.'),
+        ):
+            lines += [
+                f'# HELP app_request_{name} {description}',
+                f'# TYPE app_request_{name} counter',
+            ]
+            for view in sorted(totals):
+                lines.append(
+                    f'app_request_{name}{{view="{view}"}} '
+                    f'{totals[view].get(key, 0)}'
+                )
+
+        caches = {
+            name: import_string(path).stats()
+            for name, path in getattr(settings, 'METRICS_CACHES', {}).items()
+        }
+        lines += _gauges('app_cache', 'cache', caches)
+        lines += _gauges('app_db_pool', 'alias', pool_stats())
+
+        return '\n'.join(lines) + '\n'
+
+
+def _gauges(prefix, label, stats):
+    """
+        Return gauge lines of the numeric stats of each labelled source.
+    """
+    lines = []
+    names = sorted({
+        name for values in stats.values() for name, value in values.items()
+        if isinstance(value, (int, float))
+    })
+    for name in names:
+        lines.append(f'# TYPE {prefix}_{name} gauge')
+        for source, values in sorted(stats.items()):
+            if isinstance(values.get(name), (int, float)):
+                lines.append(
+                    f'{prefix}_{name}{{{label}="{source}"}} {values[name]}'
+                )
+
+    return lines
+
+
+metrics = Metrics()
@@ -0,0 +1,318 @@
+import io
+import multiprocessing
+import random
+import re
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection, connections, transaction
+
+from core.db.pool import close_pools
+from core.models import Tag, Ingredient, Recipe
+from recipe.bulk import batched
+
+
+SEED_PASSWORD = 'seed-password'
+
+# Recipes written by a worker in one transaction
+BATCH_SIZE = 5000
+
+
+def seed(users, recipes, tags=30, ingredients=100, tags_per_recipe=3,
+         ingredients_per_recipe=8, random_seed=0, email_prefix='seed',
+         password=SEED_PASSWORD, workers=1, batch_size=BATCH_SIZE,
+         progress=None):
+    """
+        Create users with their tags, ingredients and recipes, and
+        return the ids of the users.
+
+        Every user shares one precomputed password hash. On PostgreSQL
+        the rows are written with COPY and the recipes are split in
+        batches written by a pool of worker processes, other databases
+        use bulk_create in this process. The same random seed builds
+        the same dataset whatever the number of workers.
+    """
+    user_ids = _create_users(users, email_prefix, make_password(password))
+    owners = _create_attributes(user_ids, tags, ingredients)
+
+    tasks = [
+        (f'{random_seed}-{index}', task,
+         tags_per_recipe, ingredients_per_recipe)
+        for index, task in enumerate(_recipe_tasks(
+            owners, recipes, batch_size
+        ))
+    ]
+
+    # Uncommitted users are invisible to other processes, and SQLite
+    # allows a single writer anyway
+    if connection.vendor != 'postgresql' or connection.in_atomic_block:
+        workers = 1
+
+    done = 0
+    if workers > 1 and len(tasks) > 1:
+        # Workers must not share the connections of this process
+        connections.close_all()
+        close_pools()
+        context = multiprocessing.get_context('fork')
+        with context.Pool(workers) as pool:
+            for count in pool.imap_unordered(_seed_recipes, tasks):
+                done += count
+                if progress:
+                    progress(done, len(user_ids) * recipes)
+    else:
+        for task in tasks:
+            done += _seed_recipes(task)
+            if progress:
+                progress(done, len(user_ids) * recipes)
+
+    return user_ids
+
+
+def _create_users(count, email_prefix, password):
+    """
+        Create users numbered after those of an earlier run with the
+        same email prefix, and return their ids.
+    """
+    User = get_user_model()
+    # Number after the highest existing user, deleted users leave gaps
+    pattern = re.compile(rf'^{re.escape(email_prefix)}-(\d+)@example\.com$')
+    emails = User.objects.filter(
+        email__startswith=f'{email_prefix}-'
+    ).values_list('email', flat=True)
+    numbers = [
+        int(match.group(1))
+        for match in map(pattern.match, emails.iterator())
+        if match is not None
+    ]
+    offset = max(numbers, default=-1) + 1
+
+    user_ids = []
+    for batch in batched(range(offset, offset + count), BATCH_SIZE):
+        user_ids.extend(user.pk for user in insert(User, [
+            User(
+                email=f'{email_prefix}-{number}@example.com',
+                name=f'{email_prefix} {number}',
+                password=password
+            )
+            for number in batch
+        ], returning=True))
+
+    return user_ids
+
+
+def _create_attributes(user_ids, tags, ingredients):
+    """
+        Create the tags and ingredients of the users, and return the
+        ids of each user with the ids of their tags and ingredients.
+    """
+    owners = []
+    with transaction.atomic():
+        for batch in batched(user_ids, max(1, BATCH_SIZE // max(
+            tags + ingredients, 1
+        ))):
+            tag_objs = insert(Tag, [
+                Tag(user_id=user_id, name=f'tag {i}')
+                for user_id in batch for i in range(tags)
+            ], returning=True)
+            ingredient_objs = insert(Ingredient, [
+                Ingredient(user_id=user_id, name=f'ingredient {i}')
+                for user_id in batch for i in range(ingredients)
+            ], returning=True)
+
+            for index, user_id in enumerate(batch):
+                owners.append((
+                    user_id,
+                    [obj.pk for obj in
+                     tag_objs[index * tags:(index + 1) * tags]],
+                    [obj.pk for obj in ingredient_objs[
+                        index * ingredients:(index + 1) * ingredients
+                    ]],
+                ))
+
+    return owners
+
+
+def _recipe_tasks(owners, recipes, batch_size):
+    """
+        Yield lists of the recipes to create, at most batch_size each,
+        as the owner, its tag and ingredient ids, the first recipe
+        number and the number of recipes.
+    """
+    task, size = [], 0
+    for user_id, tag_ids, ingredient_ids in owners:
+        start = 0
+        while start < recipes:
+            count = min(recipes - start, batch_size - size)
+            task.append((user_id, tag_ids, ingredient_ids, start, count))
+            size += count
+            start += count
+            if size == batch_size:
+                yield task
+                task, size = [], 0
+
+    if task:
+        yield task
+
+
+def _seed_recipes(task):
+    """
+        Create the recipes of a task with their tags and ingredients,
+        and return the number of recipes.
+    """
+    seed, owners, tags_per_recipe, ingredients_per_recipe = task
+    rng = random.Random(seed)
+
+    recipes, tag_ids, ingredient_ids = [], [], []
+    for user_id, user_tag_ids, user_ingredient_ids, start, count in owners:
+        for number in range(start, start + count):
+            recipes.append(Recipe(
+                user_id=user_id,
+                title=f'recipe {number}',
+                time_minutes=rng.randint(5, 240),
+                price=Decimal(rng.randint(100, 9999)) / 100
+            ))
+            tag_ids.append(
+                fan_out(rng, user_tag_ids, tags_per_recipe)
+            )
+            ingredient_ids.append(
+                fan_out(rng, user_ingredient_ids, ingredients_per_recipe)
+            )
+
+    with transaction.atomic():
+        if connection.vendor == 'postgresql':
+            disable_triggers()
+        insert(Recipe, recipes, returning=True)
+        insert(Recipe.tags.through, [
+            Recipe.tags.through(recipe_id=recipe.pk, tag_id=tag_id)
+            for recipe, ids in zip(recipes, tag_ids) for tag_id in ids
+        ])
+        insert(Recipe.ingredients.through, [
+            Recipe.ingredients.through(
+                recipe_id=recipe.pk, ingredient_id=ingredient_id
+            )
+            for recipe, ids in zip(recipes, ingredient_ids)
+            for ingredient_id in ids
+        ])
+        if connection.vendor == 'postgresql':
+            update_search_vectors([recipe.pk for recipe in recipes])
+
+    return len(recipes)
+
+
+def fan_out(rng, ids, average):
+    """
+        Return a random sample of ids, of a size spread around the
+        average so some rows have none and some have many.
+    """
+    size = min(len(ids), rng.randint(0, 2 * average))
+    return rng.sample(ids, size)
+
+
+def insert(model, objs, returning=False):
+    """
+        Insert new objects, setting their primary keys when returning.
+    """
+    if not objs:
+        return objs
+
+    if connection.vendor == 'postgresql':
+        if returning:
+            for obj, pk in zip(objs, reserve_ids(model, len(objs))):
+                obj.pk = pk
+        copy_objects(model, objs, with_pk=returning)
+        return objs
+
+    model.objects.bulk_create(objs)
+    if returning and objs[0].pk is None:
+        # Single writer, so the last ids are the ones just inserted
+        ids = model.objects.order_by('-pk').values_list(
+            'pk', flat=True
+        )[:len(objs)]
+        for obj, pk in zip(objs, reversed(list(ids))):
+            obj.pk = pk
+
+    return objs
+
+
+def reserve_ids(model, count):
+    """
+        Return primary keys taken from the sequence of a PostgreSQL
+        table, so rows can be copied with their ids known in advance.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT nextval(pg_get_serial_sequence(%s, %s)) '
+            'FROM generate_series(1, %s)',
+            [model._meta.db_table, model._meta.pk.column, count]
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def disable_triggers():
+    """
+        Skip the triggers of the tables until the end of the transaction.
+
+        The search triggers would compute the search vector of every
+        recipe once for its row and again for each of its through
+        tables. The foreign key checks are skipped as well, the ids
+        come from rows of the same transaction. Needs a superuser.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute('SET LOCAL session_replication_role = replica')
+
+
+def update_search_vectors(recipe_ids):
+    """
+        Compute the search vector of recipes in a single query.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'UPDATE core_recipe '
+            'SET search_vector = core_recipe_search_vector(id, title) '
+            'WHERE id = ANY(%s)',
+            [recipe_ids]
+        )
+
+
+def copy_objects(model, objs, with_pk=False):
+    """
+        Write objects to their PostgreSQL table with COPY.
+    """
+    fields = [
+        field for field in model._meta.concrete_fields
+        if with_pk or not field.primary_key
+    ]
+    buffer = io.StringIO()
+    for obj in objs:
+        buffer.write('\t'.join(
+            copy_value(field.get_db_prep_save(
+                field.pre_save(obj, True), connection
+            ))
+            for field in fields
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY {quote(model._meta.db_table)} '
+            f'({", ".join(quote(field.column) for field in fields)}) '
+            f'FROM STDIN',
+            buffer
+        )
+
+
+def copy_value(value):
+    """
+        Return a value in the text format of COPY.
+    """
+    if value is None:
+        return '\\N'
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+
+    return str(value).replace('\\', '\\\\').replace(
+        '\t', '\\t'
+    ).replace('\n', '\\n').replace('\r', '\\r')
@@ -0,0 +1,64 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, m2m_changed
+from django.dispatch import receiver
+
+from core.models import (
+    User, Tag, Ingredient, Recipe, RecipeImageDerivative, UserDataVersion
+)
+from core.storage import release_file
+
+
+def release_after_commit(name):
+    """
+        Release a stored file once the deletion is committed.
+    """
+    if name:
+        transaction.on_commit(lambda: release_file(name))
+
+
+@receiver(post_delete, sender=Recipe)
+def release_recipe_image(sender, instance, **kwargs):
+    """
+        Release the image of a deleted recipe.
+    """
+    release_after_commit(instance.image.name)
+
+
+@receiver(post_delete, sender=RecipeImageDerivative)
+def release_derivative_file(sender, instance, **kwargs):
+    """
+        Release the file of a deleted image derivative.
+    """
+    release_after_commit(instance.file.name)
+
+
+@receiver(post_save, sender=User)
+def create_data_version(sender, instance, created, **kwargs):
+    """
+        Start versioning the data of a new user.
+    """
+    if created:
+        UserDataVersion.objects.create(user=instance)
+
+
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=Ingredient)
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+def bump_data_version(sender, instance, **kwargs):
+    """
+        Bump the data version of the owner of a changed object.
+    """
+    UserDataVersion.objects.bump(instance.user_id)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+@receiver(m2m_changed, sender=Recipe.ingredients.through)
+def bump_data_version_on_link(sender, instance, action, **kwargs):
+    """
+        Bump the data version when recipes are linked or unlinked.
+    """
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        UserDataVersion.objects.bump(instance.user_id)
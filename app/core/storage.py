@@ -0,0 +1,214 @@
+import fcntl
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.utils import timezone
+
+
+CONTENT_ADDRESSED_NAME = re.compile(r'(^|/)[0-9a-f]{2}/[0-9a-f]{64}(\.\w+)?$')
+
+# Directories under the media root holding uploads still in progress
+UPLOAD_DIRECTORIES = ('uploads/partial', 'uploads/tmp')
+
+# Model file fields whose files are shared by content
+FILE_REFERENCES = (
+    ('core', 'Recipe', 'image'),
+    ('core', 'RecipeImageDerivative', 'file'),
+)
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+        File system storage naming files by the hash of their content.
+
+        The directory chosen by upload_to is kept and the file name is
+        replaced by the SHA-256 of the content, so saving a file that is
+        already stored returns the existing name instead of a copy. The
+        matched file is touched, so it is not released before the row
+        referencing it commits.
+    """
+    def save(self, name, content, max_length=None):
+        """
+            Store the content unless it is already stored.
+        """
+        if name is None:
+            name = content.name
+
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.content_name(name, content)
+        if self.claim(name):
+            return name
+
+        return self._save(name, content).replace('\\', '/')
+
+    def get_available_name(self, name, max_length=None):
+        """
+            Keep the content addressed name, a file already stored under
+            it has the same content.
+        """
+        return name
+
+    def _save(self, name, content):
+        """
+            Write the content to a temporary file and link it under its
+            name, so concurrent saves of the same content end up with a
+            single file instead of suffixed copies.
+        """
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+
+        fd, temporary = tempfile.mkstemp(dir=directory, prefix='.')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                for chunk in content.chunks():
+                    f.write(chunk)
+            os.chmod(temporary, self.file_permissions_mode or 0o644)
+
+            while True:
+                try:
+                    os.link(temporary, full_path)
+                    break
+                except FileExistsError:
+                    # Saved meanwhile by an upload of the same content
+                    if self.claim(name):
+                        break
+        finally:
+            os.remove(temporary)
+
+        return name
+
+    def claim(self, name):
+        """
+            Mark a stored file as just used and return whether it exists.
+        """
+        with locked(self, name, exclusive=False) as found:
+            if found:
+                os.utime(self.path(name))
+
+            return found
+
+    def content_name(self, name, content):
+        """
+            Return the content addressed name of a file.
+        """
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        if hasattr(content, 'seek'):
+            content.seek(0)
+
+        digest = digest.hexdigest()
+        extension = os.path.splitext(name)[1].lower()
+
+        return posixpath.join(
+            os.path.dirname(name).replace('\\', '/'),
+            digest[:2],
+            f'{digest}{extension}'
+        )
+
+
+def is_content_addressed(name):
+    """
+        Return whether a file name was given by its content, and so the
+        file behind it never changes.
+    """
+    return CONTENT_ADDRESSED_NAME.search(name) is not None
+
+
+@contextmanager
+def locked(storage, name, exclusive):
+    """
+        Hold a lock on a stored file, yielding whether the file exists.
+
+        Claiming a file takes a shared lock and deleting it an exclusive
+        one, so a file is never deleted between being matched by an
+        upload and being touched.
+    """
+    try:
+        f = open(storage.path(name), 'rb')
+    except FileNotFoundError:
+        yield False
+        return
+
+    with f:
+        fcntl.flock(f, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        # The file may have been deleted while waiting for the lock
+        yield os.path.exists(storage.path(name))
+
+
+def delete_unused(name, cutoff, storage=default_storage):
+    """
+        Delete a stored file unless it was used after the cutoff.
+    """
+    with locked(storage, name, exclusive=True) as found:
+        if not found or storage.get_modified_time(name) >= cutoff:
+            return False
+
+        storage.delete(name)
+        return True
+
+
+def is_upload_in_progress(name):
+    """
+        Return whether a file name is under a directory of uploads
+        still in progress.
+    """
+    name = posixpath.normpath(name).lstrip('/')
+    return any(
+        name == directory or name.startswith(f'{directory}/')
+        for directory in UPLOAD_DIRECTORIES
+    )
+
+
+def reference_count(name):
+    """
+        Return the number of rows referencing a stored file.
+    """
+    return sum(
+        apps.get_model(app_label, model).objects.filter(
+            **{field: name}
+        ).count()
+        for app_label, model, field in FILE_REFERENCES
+    )
+
+
+def referenced_files():
+    """
+        Return the names of every stored file referenced by a row.
+    """
+    names = set()
+    for app_label, model, field in FILE_REFERENCES:
+        names.update(
+            apps.get_model(app_label, model).objects.exclude(
+                **{field: ''}
+            ).exclude(
+                **{f'{field}__isnull': True}
+            ).values_list(field, flat=True)
+        )
+
+    return names
+
+
+def release_file(name, storage=default_storage):
+    """
+        Delete a stored file once no row references it, unless an
+        upload matched it within MEDIA_RELEASE_GRACE seconds. Files
+        kept by the grace period are deleted by collect_media.
+    """
+    if not name or reference_count(name):
+        return False
+
+    grace = timedelta(seconds=getattr(settings, 'MEDIA_RELEASE_GRACE', 0))
+    return delete_unused(name, timezone.now() - grace, storage)
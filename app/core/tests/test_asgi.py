@@ -0,0 +1,193 @@
+import asyncio
+import threading
+
+from django.core.wsgi import get_wsgi_application
+from django.test import SimpleTestCase
+
+from core.asgi import WSGIBridge
+
+
+def run_request(application, scope, body=b'', send=None):
+    """
+        Run an ASGI HTTP request and return the sent messages.
+    """
+    messages = [
+        {'type': 'http.request', 'body': body[:3], 'more_body': True},
+        {'type': 'http.request', 'body': body[3:]},
+    ]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def record(message):
+        if send is not None:
+            await send(message)
+        sent.append(message)
+
+    scope = dict({
+        'type': 'http',
+        'http_version': '1.1',
+        'method': 'GET',
+        'path': '/',
+        'query_string': b'',
+        'headers': [],
+    }, **scope)
+
+    loop = asyncio.new_event_loop()
+    try:
+        loop.run_until_complete(application(scope, receive, record))
+    finally:
+        loop.close()
+
+    return sent
+
+
+class WSGIBridgeTests(SimpleTestCase):
+    """
+        Test the ASGI bridge to WSGI applications.
+    """
+    def test_environ_and_body(self):
+        """
+            Test the request is translated to a WSGI environ.
+        """
+        seen = {}
+
+        def application(environ, start_response):
+            seen.update(environ)
+            seen['body'] = environ['wsgi.input'].read()
+            start_response('201 Created', [('X-Test', 'yes')])
+            return [b'hello ', b'', b'world']
+
+        sent = run_request(WSGIBridge(application), {
+            'method': 'POST',
+            'path': '/api/ré',
+            'query_string': b'a=1',
+            'headers': [
+                (b'content-type', b'text/plain'),
+                (b'accept', b'a'),
+                (b'accept', b'b'),
+            ],
+        }, body=b'payload')
+
+        # Assertions
+        self.assertEqual(seen['REQUEST_METHOD'], 'POST')
+        self.assertEqual(
+            seen['PATH_INFO'],
+            '/api/ré'.encode('utf-8').decode('latin1')
+        )
+        self.assertEqual(seen['QUERY_STRING'], 'a=1')
+        self.assertEqual(seen['CONTENT_TYPE'], 'text/plain')
+        self.assertEqual(seen['HTTP_ACCEPT'], 'a,b')
+        self.assertEqual(seen['body'], b'payload')
+        self.assertEqual(sent[0], {
+            'type': 'http.response.start',
+            'status': 201,
+            'headers': [(b'x-test', b'yes')],
+        })
+        self.assertEqual(
+            b''.join(message.get('body', b'') for message in sent[1:]),
+            b'hello world'
+        )
+        self.assertFalse(sent[-1].get('more_body', False))
+
+    def test_empty_body(self):
+        """
+            Test responses without a body are started and finished.
+        """
+        def application(environ, start_response):
+            start_response('204 No Content', [])
+            return []
+
+        sent = run_request(WSGIBridge(application), {})
+
+        # Assertions
+        self.assertEqual(sent[0]['status'], 204)
+        self.assertEqual(sent[1], {'type': 'http.response.body', 'body': b''})
+
+    def test_cookies_joined(self):
+        """
+            Test repeated cookie headers are joined as one cookie header.
+        """
+        seen = {}
+
+        def application(environ, start_response):
+            seen.update(environ)
+            start_response('204 No Content', [])
+            return []
+
+        run_request(WSGIBridge(application), {
+            'headers': [(b'cookie', b'a=1'), (b'cookie', b'b=2')],
+        })
+
+        # Assertion
+        self.assertEqual(seen['HTTP_COOKIE'], 'a=1; b=2')
+
+    def test_body_too_large(self):
+        """
+            Test bodies over the limit are refused before the
+            application runs.
+        """
+        calls = []
+
+        def application(environ, start_response):
+            calls.append(environ)
+            start_response('204 No Content', [])
+            return []
+
+        bridge = WSGIBridge(application, max_body_size=5)
+        declared = run_request(bridge, {
+            'method': 'POST',
+            'headers': [(b'content-length', b'1000')],
+        }, body=b'payload')
+        streamed = run_request(bridge, {'method': 'POST'}, body=b'payload')
+
+        # Assertions
+        self.assertEqual(declared[0]['status'], 413)
+        self.assertEqual(streamed[0]['status'], 413)
+        self.assertEqual(calls, [])
+
+    def test_thread_released_before_client_reads(self):
+        """
+            Test the worker thread finishes without waiting for the
+            client to receive the response.
+        """
+        finished = threading.Event()
+
+        class Body(list):
+            def close(self):
+                finished.set()
+
+        def application(environ, start_response):
+            start_response('200 OK', [])
+            return Body([b'a', b'b', b'c'])
+
+        released = []
+
+        async def slow_client(message):
+            if not released:
+                loop = asyncio.get_event_loop()
+                released.append(
+                    await loop.run_in_executor(None, finished.wait, 5)
+                )
+
+        sent = run_request(WSGIBridge(application), {}, send=slow_client)
+
+        # Assertions
+        self.assertEqual(released, [True])
+        self.assertEqual(
+            b''.join(message.get('body', b'') for message in sent[1:]),
+            b'abc'
+        )
+
+    def test_django_application(self):
+        """
+            Test the Django application answers through the bridge.
+        """
+        sent = run_request(
+            WSGIBridge(get_wsgi_application()),
+            {'path': '/api/recipe/tags/', 'server': ('testserver', 80)}
+        )
+
+        # Assertion
+        self.assertEqual(sent[0]['status'], 401)
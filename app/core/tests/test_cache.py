@@ -0,0 +1,39 @@
+from django.test import SimpleTestCase
+
+from core.cache import LRUCache
+
+
+class LRUCacheTests(SimpleTestCase):
+
+    def setUp(self):
+        self.now = 0
+        self.cache = LRUCache(max_size=2, ttl=10, timer=lambda: self.now)
+
+    def test_least_recently_used_evicted(self):
+        """
+            Test the least recently used entry is evicted when full.
+        """
+        self.cache.set('a', 1)
+        self.cache.set('b', 2)
+        self.cache.get('a')
+        self.cache.set('c', 3)
+
+        # Assertions
+        self.assertEqual(self.cache.get('a'), 1)
+        self.assertIsNone(self.cache.get('b'))
+        self.assertEqual(self.cache.get('c'), 3)
+
+    def test_entries_expire(self):
+        """
+            Test entries are not returned after their time to live.
+        """
+        self.cache.set('a', 1)
+        self.now = 10
+
+        # Assertions
+        self.assertIsNone(self.cache.get('a'))
+        self.assertEqual(len(self.cache), 0)
+        self.assertEqual(
+            self.cache.stats(),
+            {'hits': 0, 'misses': 1, 'size': 0}
+        )
@@ -1,39 +1,236 @@
+import json
+import os
+import tempfile
+from io import StringIO
 from unittest.mock import patch
 
+from django.conf import settings
+from django.contrib.auth import get_user_model
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connections
+from django.db.backends.base.base import BaseDatabaseWrapper
 from django.db.utils import OperationalError
 from django.test import TestCase
 
+from core.models import Recipe
+
+
+def failing_connection(failures):
+    """
+        Return an ensure_connection failing a number of times before
+        connecting, and the list of its failed calls.
+    """
+    original = BaseDatabaseWrapper.ensure_connection
+    calls = []
+
+    def ensure_connection(self):
+        if failures is None or len(calls) < failures:
+            calls.append(self.alias)
+            raise OperationalError('could not connect to server')
+        return original(self)
+
+    return ensure_connection, calls
+
 
 class CommandTests(TestCase):
 
-    def test_wait_for_db_ready(self):
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_ready(self, ts):
         """
             Test waiting for the database when it is available.
         """
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            # Set the function to return True
-            gi.return_value = True
+        # Call the management command
+        call_command('wait_for_db')
 
+        # Assertion
+        self.assertEqual(ts.call_count, 0)
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db(self, ts):
+        """
+            Test waiting for the database.
+        """
+        # Raise the OperationalError on the first 5 attempts
+        # and then allow django to connect to the database on
+        # the 6th attempt.
+        ensure_connection, calls = failing_connection(5)
+        with patch.object(
+            BaseDatabaseWrapper, 'ensure_connection', ensure_connection
+        ):
             # Call the management command
             call_command('wait_for_db')
 
             # Assertions
-            self.assertEqual(gi.call_count, 1)
+            self.assertEqual(len(calls), 5)
+            self.assertEqual(ts.call_count, 5)
 
     @patch('time.sleep', return_value=True)
-    def test_wait_for_db(self, ts):
+    def test_wait_for_db_backoff(self, ts):
         """
-            Test waiting for the database.
+            Test the delays grow exponentially up to the maximum.
         """
-        with patch('django.db.utils.ConnectionHandler.__getitem__') as gi:
-            # Raise the OperationalError on the first 5 attempts
-            # and then allow django to connect to the database on
-            # the 5 attempt.
-            gi.side_effect = [OperationalError] * 5 + [True]
+        ensure_connection, calls = failing_connection(6)
+        with patch.object(
+            BaseDatabaseWrapper, 'ensure_connection', ensure_connection
+        ), patch('random.uniform', side_effect=lambda low, high: high):
+            call_command(
+                'wait_for_db',
+                initial_delay=1,
+                max_delay=10
+            )
 
-            # Call the management command
-            call_command('wait_for_db')
+            # Assertion
+            self.assertEqual(
+                [call[0][0] for call in ts.call_args_list],
+                [1, 2, 4, 8, 10, 10]
+            )
+
+    def test_wait_for_db_timeout(self):
+        """
+            Test the command fails once the timeout passes.
+        """
+        clock = [0]
+
+        def sleep(delay):
+            clock[0] += delay
+
+        ensure_connection, calls = failing_connection(None)
+        with patch.object(
+            BaseDatabaseWrapper, 'ensure_connection', ensure_connection
+        ), patch('time.monotonic', lambda: clock[0]), \
+                patch('time.sleep', sleep), \
+                patch('random.uniform', lambda low, high: high):
+            # Assertions
+            with self.assertRaises(CommandError):
+                call_command(
+                    'wait_for_db',
+                    timeout=10, initial_delay=1, max_delay=4,
+                    stdout=StringIO()
+                )
+            self.assertEqual(len(calls), 5)
+            self.assertEqual(clock[0], 10)
+
+    def test_wait_for_db_connect_timeout(self):
+        """
+            Test PostgreSQL probes give up connecting once the timeout
+            passes.
+        """
+        clock = [0]
+        timeouts = []
+
+        def sleep(delay):
+            clock[0] += delay
+
+        def ensure_connection(self):
+            timeouts.append(self.settings_dict['OPTIONS']['connect_timeout'])
+            raise OperationalError('could not connect to server')
+
+        with patch.object(
+            BaseDatabaseWrapper, 'ensure_connection', ensure_connection
+        ), patch.object(
+            type(connections['default']), 'vendor', 'postgresql'
+        ), patch('time.monotonic', lambda: clock[0]), \
+                patch('time.sleep', sleep), \
+                patch('random.uniform', lambda low, high: high):
+            with self.assertRaises(CommandError):
+                call_command(
+                    'wait_for_db',
+                    timeout=10, initial_delay=4, max_delay=4,
+                    stdout=StringIO()
+                )
+
+        # Assertions
+        self.assertEqual(timeouts, [10, 6, 2, 1])
+        self.assertNotIn(
+            'connect_timeout', connections['default'].settings_dict['OPTIONS']
+        )
+
+    @patch('time.sleep', return_value=True)
+    def test_wait_for_db_aliases(self, ts):
+        """
+            Test every requested database is probed.
+        """
+        ensure_connection, calls = failing_connection(2)
+        with patch.object(
+            BaseDatabaseWrapper, 'ensure_connection', ensure_connection
+        ):
+            call_command(
+                'wait_for_db',
+                '--database', 'default',
+                '--database', 'default'
+            )
+
+            # Assertion
+            self.assertEqual(calls, ['default', 'default'])
+
+
+def media_files():
+    """
+        Return the paths of every file under the media root.
+    """
+    return {
+        os.path.join(root, name)
+        for root, _, names in os.walk(settings.MEDIA_ROOT)
+        for name in names
+    }
+
+
+class BenchmarkCommandTests(TestCase):
+
+    def test_benchmark(self):
+        """
+            Test every endpoint is measured on a dataset deleted once
+            measured.
+        """
+        files = media_files()
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command(
+                'benchmark',
+                users=2, recipes=5, tags=3, ingredients=5,
+                repeat=2, warmup=0, output=output.name,
+                stdout=StringIO()
+            )
+            results = json.load(output)
+
+        # Assertions
+        self.assertIn('recipes list', results['endpoints'])
+        self.assertIn('user token', results['endpoints'])
+        self.assertIn('recipes bulk delete', results['endpoints'])
+        self.assertIn('recipes resumable offset', results['endpoints'])
+        for name, result in results['endpoints'].items():
+            self.assertLess(result['status'], 400, name)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+        self.assertEqual(results['meta']['dataset']['users'], 2)
+        self.assertFalse(get_user_model().objects.exists())
+        self.assertFalse(Recipe.objects.exists())
+        self.assertEqual(media_files(), files)
+
+    def test_benchmark_compare(self):
+        """
+            Test runs with more queries than the baseline fail.
+        """
+        with tempfile.NamedTemporaryFile(suffix='.json') as output:
+            call_command(
+                'benchmark',
+                users=1, recipes=2, tags=2, ingredients=2,
+                repeat=1, warmup=0, output=output.name,
+                stdout=StringIO()
+            )
+            baseline = json.load(output)
+
+        for result in baseline['endpoints'].values():
+            result['queries'] -= 1
+            result['p95_ms'] = 10 ** 6
+        with tempfile.NamedTemporaryFile('w', suffix='.json') as f:
+            json.dump(baseline, f)
+            f.flush()
 
             # Assertion
-            self.assertEqual(gi.call_count, 6)
+            with self.assertRaisesMessage(CommandError, 'regressed'):
+                call_command(
+                    'benchmark',
+                    users=1, recipes=2, tags=2, ingredients=2,
+                    repeat=1, warmup=0, compare=f.name,
+                    fail_on_regression=True, stdout=StringIO()
+                )
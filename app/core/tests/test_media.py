@@ -0,0 +1,111 @@
+from django.test import TestCase, override_settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+
+class MediaServingTests(TestCase):
+
+    def setUp(self):
+        self.content = b'0123456789' * 10
+        self.name = default_storage.save(
+            'uploads/recipe/sample.txt',
+            ContentFile(self.content)
+        )
+        self.url = default_storage.url(self.name)
+
+    def tearDown(self):
+        default_storage.delete(self.name)
+
+    def _content(self, res):
+        return b''.join(res.streaming_content)
+
+    def test_serve_file(self):
+        """
+            Test files are served with validators.
+        """
+        res = self.client.get(self.url)
+
+        # Assertions
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(self._content(res), self.content)
+        self.assertEqual(res['Content-Length'], str(len(self.content)))
+        self.assertIn('ETag', res)
+        self.assertIn('Last-Modified', res)
+        self.assertIn('immutable', res['Cache-Control'])
+
+    def test_not_modified(self):
+        """
+            Test a matching validator returns not modified.
+        """
+        etag = self.client.get(self.url)['ETag']
+
+        res = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        # Assertion
+        self.assertEqual(res.status_code, 304)
+
+    def test_range(self):
+        """
+            Test a range request returns only the range.
+        """
+        res = self.client.get(self.url, HTTP_RANGE='bytes=10-19')
+        suffix = self.client.get(self.url, HTTP_RANGE='bytes=-5')
+
+        # Assertions
+        self.assertEqual(res.status_code, 206)
+        self.assertEqual(self._content(res), self.content[10:20])
+        self.assertEqual(res['Content-Range'], 'bytes 10-19/100')
+        self.assertEqual(self._content(suffix), self.content[-5:])
+
+    def test_range_not_satisfiable(self):
+        """
+            Test a range past the end of the file fails.
+        """
+        res = self.client.get(self.url, HTTP_RANGE='bytes=200-300')
+
+        # Assertions
+        self.assertEqual(res.status_code, 416)
+        self.assertEqual(res['Content-Range'], 'bytes */100')
+
+    @override_settings(MEDIA_SERVE_MODE='x-accel-redirect')
+    def test_accel_redirect(self):
+        """
+            Test nginx is asked to send the file.
+        """
+        res = self.client.get(self.url)
+
+        # Assertions
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(
+            res['X-Accel-Redirect'],
+            f'/protected-media/{self.name}'
+        )
+        self.assertEqual(res.content, b'')
+
+    def test_path_outside_media_root(self):
+        """
+            Test files outside the media root are not served.
+        """
+        res = self.client.get('/media/..%2f..%2fetc/passwd')
+
+        # Assertion
+        self.assertEqual(res.status_code, 404)
+
+    def test_uploads_in_progress_not_served(self):
+        """
+            Test partial and temporary uploads are not served.
+        """
+        name = default_storage.save(
+            'uploads/partial/1-upload.part',
+            ContentFile(self.content)
+        )
+        self.addCleanup(default_storage.delete, name)
+
+        res = self.client.get(default_storage.url(name))
+        dotted = self.client.get(
+            default_storage.url('uploads/recipe/../partial/1-upload.part')
+        )
+
+        # Assertions
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(dotted.status_code, 404)
@@ -0,0 +1,193 @@
+import threading
+import time
+
+from django.test import SimpleTestCase
+
+from core.db.pool import ConnectionPool, PoolTimeout
+
+
+class FakeConnection:
+    def __init__(self, number):
+        self.number = number
+        self.closed = False
+        self.broken = False
+
+    def close(self):
+        self.closed = True
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class ConnectionPoolTests(SimpleTestCase):
+    """
+        Test the database connection pool.
+    """
+    def setUp(self):
+        self.timer = FakeTimer()
+        self.connections = []
+
+    def connect(self):
+        connection = FakeConnection(len(self.connections))
+        self.connections.append(connection)
+        return connection
+
+    def check(self, connection):
+        if connection.broken:
+            raise RuntimeError('broken')
+
+    def reset(self, connection):
+        if connection.closed:
+            raise RuntimeError('closed')
+
+    def pool(self, **kwargs):
+        options = {
+            'connect': self.connect,
+            'max_size': 2,
+            'max_lifetime': 100,
+            'timeout': 0.05,
+            'check_interval': 10,
+            'check': self.check,
+            'reset': self.reset,
+            'timer': self.timer,
+        }
+        options.update(kwargs)
+        return ConnectionPool(**options)
+
+    def test_reuse_connections(self):
+        """
+            Test returned connections are handed out again.
+        """
+        pool = self.pool()
+
+        first = pool.checkout()
+        pool.checkin(first)
+        second = pool.checkout()
+
+        # Assertions
+        self.assertIs(first, second)
+        self.assertEqual(len(self.connections), 1)
+        self.assertEqual(pool.stats()['checkouts'], 2)
+        self.assertEqual(pool.stats()['in_use'], 1)
+
+    def test_timeout_when_full(self):
+        """
+            Test checking out of a full pool times out.
+        """
+        pool = self.pool(timer=time.monotonic)
+        pool.checkout()
+        pool.checkout()
+
+        # Assertions
+        with self.assertRaises(PoolTimeout):
+            pool.checkout()
+        stats = pool.stats()
+        self.assertEqual(stats['waits'], 1)
+        self.assertEqual(stats['timeouts'], 1)
+        self.assertGreater(stats['wait_time'], 0)
+
+    def test_wait_for_checkin(self):
+        """
+            Test a waiting checkout gets the connection returned by
+            another thread.
+        """
+        pool = self.pool(timeout=5, timer=time.monotonic)
+        first = pool.checkout()
+        pool.checkout()
+
+        timer = threading.Timer(0.05, pool.checkin, [first])
+        timer.start()
+        connection = pool.checkout()
+        timer.join()
+
+        # Assertions
+        self.assertIs(connection, first)
+        self.assertEqual(pool.stats()['waits'], 1)
+
+    def test_max_lifetime(self):
+        """
+            Test connections are recycled once too old.
+        """
+        pool = self.pool()
+        first = pool.checkout()
+        pool.checkin(first)
+
+        self.timer.now = 100
+        second = pool.checkout()
+
+        # Assertions
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+        self.assertEqual(pool.stats()['discarded'], 1)
+        self.assertEqual(pool.stats()['size'], 1)
+
+    def test_health_check(self):
+        """
+            Test idle connections failing the check are replaced.
+        """
+        pool = self.pool()
+        first = pool.checkout()
+        pool.checkin(first)
+        first.broken = True
+
+        # Recently used connections are not checked
+        self.assertIs(pool.checkout(), first)
+        pool.checkin(first)
+
+        self.timer.now = 20
+        second = pool.checkout()
+
+        # Assertions
+        self.assertIsNot(first, second)
+        self.assertTrue(first.closed)
+
+    def test_failed_reset_discards(self):
+        """
+            Test connections failing the reset are not reused.
+        """
+        pool = self.pool()
+        first = pool.checkout()
+        first.closed = True
+
+        pool.checkin(first)
+
+        # Assertions
+        self.assertEqual(pool.stats()['size'], 0)
+        self.assertIsNot(pool.checkout(), first)
+
+    def test_failed_connect_frees_slot(self):
+        """
+            Test a failed connection attempt does not leak its slot.
+        """
+        def connect():
+            raise OSError('refused')
+
+        pool = self.pool(connect=connect)
+
+        for _ in range(3):
+            with self.assertRaises(OSError):
+                pool.checkout()
+
+        # Assertion
+        self.assertEqual(pool.stats()['size'], 0)
+
+    def test_close_all(self):
+        """
+            Test idle connections are closed.
+        """
+        pool = self.pool()
+        first = pool.checkout()
+        second = pool.checkout()
+        pool.checkin(first)
+
+        pool.close_all()
+
+        # Assertions
+        self.assertTrue(first.closed)
+        self.assertFalse(second.closed)
+        self.assertEqual(pool.stats()['size'], 1)
@@ -0,0 +1,179 @@
+import json
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from core.profiling import RequestProfile, activate, metrics, timed
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+METRICS_URL = reverse('metrics')
+
+
+class RequestProfileTests(SimpleTestCase):
+    """
+        Test the query analysis and timing of request profiles.
+    """
+    def test_duplicate_queries(self):
+        """
+            Test queries repeated with the same parameters are flagged.
+        """
+        profile = RequestProfile()
+        profile.record_query('SELECT %s', (1, ), 0.1)
+        profile.record_query('SELECT %s', (1, ), 0.1)
+        profile.record_query('SELECT %s', (2, ), 0.1)
+
+        # Assertions
+        self.assertEqual(profile.duplicate_queries(), {'SELECT %s': 2})
+        self.assertAlmostEqual(profile.sql_time, 0.3)
+
+    def test_n_plus_one(self):
+        """
+            Test a statement run for many parameters is flagged.
+        """
+        profile = RequestProfile()
+        for recipe_id in range(5):
+            profile.record_query('SELECT tag WHERE id = %s', (recipe_id, ), 0)
+        profile.record_query('SELECT recipe', (), 0)
+
+        # Assertions
+        self.assertEqual(
+            profile.n_plus_one(threshold=5),
+            {'SELECT tag WHERE id = %s': 5}
+        )
+        self.assertEqual(profile.n_plus_one(threshold=6), {})
+
+    def test_nested_sections_counted_once(self):
+        """
+            Test nested blocks of a section do not add up twice.
+        """
+        profile = RequestProfile()
+        with activate(profile):
+            with timed('serialize'):
+                with timed('serialize'):
+                    pass
+            outer = profile.sections['serialize']
+
+        # Assertions
+        self.assertGreater(outer, 0)
+        with timed('serialize'):
+            pass
+        self.assertEqual(profile.sections['serialize'], outer)
+
+
+class ProfilingMiddlewareTests(TestCase):
+    """
+        Test requests are profiled and exported as metrics.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.client.force_authenticate(self.user)
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample Recipe',
+            time_minutes=30,
+            price=5.00
+        )
+        recipe.tags.add(Tag.objects.create(user=self.user, name='Vegan'))
+        metrics.reset()
+
+    def test_request_logged(self):
+        """
+            Test each request is logged with its queries and timings.
+        """
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            res = self.client.get(RECIPE_URL)
+
+        record = json.loads(logs.records[0].getMessage())
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(record['view'], 'RecipeViewSet.list')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['sql_queries'], 0)
+        self.assertGreater(record['serialize_time'], 0)
+        self.assertGreater(record['render_time'], 0)
+        self.assertNotIn('profile', record)
+
+    @override_settings(PROFILING_KEY='secret')
+    def test_profile_on_demand(self):
+        """
+            Test requests with the profiling key run under cProfile.
+        """
+        with self.assertLogs('core.profiling', 'INFO') as logs:
+            res = self.client.get(RECIPE_URL, HTTP_X_PROFILE='secret')
+
+        record = json.loads(logs.records[0].getMessage())
+
+        # Assertions
+        self.assertIn('cumulative', record['profile'])
+        self.assertIn('db;dur=', res['Server-Timing'])
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics(self):
+        """
+            Test the metrics of requests and caches are exported.
+        """
+        self.client.get(RECIPE_URL)
+
+        res = self.client.get(
+            METRICS_URL,
+            HTTP_AUTHORIZATION='Bearer secret'
+        )
+        content = res.content.decode()
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn(
+            'app_requests_total{view="RecipeViewSet.list",method="GET",'
+            'status="200"} 1',
+            content
+        )
+        self.assertIn(
+            'app_request_duration_seconds_count{view="RecipeViewSet.list"} 1',
+            content
+        )
+        self.assertIn('app_request_sql_queries_total', content)
+        self.assertIn('app_cache_hits{cache="response"}', content)
+        self.assertIn('app_cache_hits{cache="token"}', content)
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        """
+            Test the metrics require the token when one is set.
+        """
+        forbidden = self.client.get(METRICS_URL)
+        wrong = self.client.get(
+            METRICS_URL,
+            HTTP_AUTHORIZATION='Bearer secrets'
+        )
+        allowed = self.client.get(
+            METRICS_URL,
+            HTTP_AUTHORIZATION='Bearer secret'
+        )
+
+        # Assertions
+        self.assertEqual(forbidden.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(wrong.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(allowed.status_code, status.HTTP_200_OK)
+
+    @override_settings(METRICS_TOKEN=None)
+    def test_metrics_closed_without_token(self):
+        """
+            Test the metrics are only open without a token in debug mode.
+        """
+        closed = self.client.get(METRICS_URL)
+        with self.settings(DEBUG=True):
+            opened = self.client.get(METRICS_URL)
+
+        # Assertions
+        self.assertEqual(closed.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(opened.status_code, status.HTTP_200_OK)
@@ -0,0 +1,125 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from core import seeding
+from core.models import Tag, Ingredient, Recipe
+from recipe.filters import filter_by_search
+
+
+class SeedingTests(TestCase):
+    """
+        Test generating users with their recipes.
+    """
+    def test_seed(self):
+        """
+            Test each user gets their tags, ingredients and recipes.
+        """
+        user_ids = seeding.seed(
+            users=3, recipes=7, tags=4, ingredients=5, batch_size=4
+        )
+        user = get_user_model().objects.get(pk=user_ids[-1])
+        links = Recipe.tags.through.objects.filter(recipe__user=user)
+
+        # Assertions
+        self.assertEqual(len(user_ids), 3)
+        self.assertEqual(user.email, 'seed-2@example.com')
+        self.assertTrue(user.check_password(seeding.SEED_PASSWORD))
+        self.assertEqual(Recipe.objects.filter(user=user).count(), 7)
+        self.assertEqual(Tag.objects.filter(user=user).count(), 4)
+        self.assertEqual(Ingredient.objects.filter(user=user).count(), 5)
+        self.assertFalse(links.exclude(tag__user=user).exists())
+
+    def test_seed_searchable(self):
+        """
+            Test seeded recipes are found by their tag and ingredient
+            names.
+        """
+        seeding.seed(users=2, recipes=6, tags=3, ingredients=4)
+        recipes = Recipe.objects.all()
+
+        # Assertions
+        self.assertEqual(
+            filter_by_search(recipes, 'tag').count(),
+            recipes.filter(tags__isnull=False).distinct().count()
+        )
+        self.assertEqual(
+            filter_by_search(recipes, 'ingredient').count(),
+            recipes.filter(ingredients__isnull=False).distinct().count()
+        )
+
+    def test_seed_after_deleted_user(self):
+        """
+            Test users are numbered after the highest existing user
+            when earlier users were deleted.
+        """
+        user_ids = seeding.seed(users=3, recipes=0, tags=0, ingredients=0)
+        get_user_model().objects.filter(pk=user_ids[0]).delete()
+
+        user_ids = seeding.seed(users=2, recipes=0, tags=0, ingredients=0)
+
+        # Assertion
+        self.assertEqual(
+            list(get_user_model().objects.filter(
+                pk__in=user_ids
+            ).order_by('pk').values_list('email', flat=True)),
+            ['seed-3@example.com', 'seed-4@example.com']
+        )
+
+    def test_seed_reproducible(self):
+        """
+            Test the same random seed builds the same relations.
+        """
+        def relations(user_ids):
+            return [
+                sorted(Recipe.objects.get(
+                    user_id=user_id, title=f'recipe {number}'
+                ).tags.values_list('name', flat=True))
+                for user_id in user_ids for number in range(5)
+            ]
+
+        first = seeding.seed(users=2, recipes=5, tags=6, batch_size=3)
+        second = seeding.seed(users=2, recipes=5, tags=6, batch_size=3)
+
+        # Assertions
+        self.assertEqual(relations(first), relations(second))
+        self.assertEqual(
+            get_user_model().objects.get(pk=second[0]).email,
+            'seed-2@example.com'
+        )
+
+    def test_seed_data_command(self):
+        """
+            Test the command seeds the requested number of rows.
+        """
+        call_command(
+            'seed_data', users=2, recipes=3, tags=2, ingredients=2,
+            prefix='staging', stdout=StringIO()
+        )
+
+        # Assertions
+        self.assertEqual(Recipe.objects.count(), 6)
+        self.assertEqual(
+            get_user_model().objects.filter(
+                email__startswith='staging-'
+            ).count(),
+            2
+        )
+
+
+class CopyValueTests(SimpleTestCase):
+
+    def test_copy_value(self):
+        """
+            Test values are escaped for the COPY text format.
+        """
+        # Assertions
+        self.assertEqual(seeding.copy_value(None), '\\N')
+        self.assertEqual(seeding.copy_value(True), 't')
+        self.assertEqual(seeding.copy_value(''), '')
+        self.assertEqual(
+            seeding.copy_value('a\tb\nc\\d'),
+            'a\\tb\\nc\\\\d'
+        )
@@ -0,0 +1,153 @@
+import hashlib
+import os
+from io import StringIO
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management import call_command
+
+from core import models
+from core.storage import is_content_addressed, release_file
+
+
+class ContentAddressedStorageTests(TestCase):
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.content = b'not really an image'
+        self.names = []
+
+    def tearDown(self):
+        for name in self.names:
+            default_storage.delete(name)
+
+    def _sample_recipe(self):
+        """
+            Create a recipe with the sample content as its image.
+        """
+        recipe = models.Recipe.objects.create(
+            user=self.user,
+            title='Mac and Cheese',
+            time_minutes=90,
+            price=19.99
+        )
+        recipe.image.save('photo.JPG', ContentFile(self.content))
+        self.names.append(recipe.image.name)
+        return recipe
+
+    def test_file_named_by_content(self):
+        """
+            Test files are named by the hash of their content.
+        """
+        recipe = self._sample_recipe()
+        digest = hashlib.sha256(self.content).hexdigest()
+
+        # Assertions
+        self.assertEqual(
+            recipe.image.name,
+            f'uploads/recipe/{digest[:2]}/{digest}.jpg'
+        )
+        self.assertTrue(is_content_addressed(recipe.image.name))
+
+    def test_same_content_stored_once(self):
+        """
+            Test saving the same content twice shares the file.
+        """
+        recipe1 = self._sample_recipe()
+        recipe2 = self._sample_recipe()
+
+        # Assertions
+        self.assertEqual(recipe1.image.name, recipe2.image.name)
+        directory = recipe1.image.name.rsplit('/', 1)[0]
+        self.assertEqual(len(default_storage.listdir(directory)[1]), 1)
+
+    def test_concurrent_save_keeps_name(self):
+        """
+            Test content stored by another upload after the claim check
+            is matched instead of saved under another name.
+        """
+        recipe = self._sample_recipe()
+        name = recipe.image.name
+
+        saved = default_storage._save(name, ContentFile(self.content))
+
+        # Assertions
+        self.assertEqual(saved, name)
+        directory = name.rsplit('/', 1)[0]
+        self.assertEqual(default_storage.listdir(directory)[1],
+                         [name.rsplit('/', 1)[1]])
+
+    @override_settings(MEDIA_RELEASE_GRACE=0)
+    def test_release_file_keeps_referenced_files(self):
+        """
+            Test a file is only deleted once no recipe references it.
+        """
+        recipe1 = self._sample_recipe()
+        recipe2 = self._sample_recipe()
+        name = recipe1.image.name
+
+        recipe1.delete()
+        released = release_file(name)
+        exists_while_referenced = default_storage.exists(name)
+        recipe2.delete()
+
+        # Assertions
+        self.assertFalse(released)
+        self.assertTrue(exists_while_referenced)
+        self.assertTrue(release_file(name))
+        self.assertFalse(default_storage.exists(name))
+
+    def test_release_file_keeps_matched_files(self):
+        """
+            Test a file matched by an upload is kept while the row
+            referencing it may not be committed yet.
+        """
+        recipe = self._sample_recipe()
+        name = recipe.image.name
+        os.utime(default_storage.path(name), (0, 0))
+        recipe.delete()
+
+        # Another upload matches the file before its row commits
+        saved = default_storage.save('uploads/recipe/photo.jpg',
+                                     ContentFile(self.content))
+        released = release_file(name)
+
+        # Assertions
+        self.assertEqual(saved, name)
+        self.assertFalse(released)
+        self.assertTrue(default_storage.exists(name))
+
+    def test_collect_media_deletes_orphans(self):
+        """
+            Test collecting media deletes only unreferenced files.
+        """
+        recipe = self._sample_recipe()
+        orphan = default_storage.save(
+            'uploads/recipe/orphan.png',
+            ContentFile(b'orphan')
+        )
+        self.names.append(orphan)
+
+        call_command('collect_media', min_age=0, stdout=StringIO())
+
+        # Assertions
+        self.assertTrue(default_storage.exists(recipe.image.name))
+        self.assertFalse(default_storage.exists(orphan))
+
+    def test_media_served_immutable(self):
+        """
+            Test content addressed files are served with long lived
+            cache headers.
+        """
+        recipe = self._sample_recipe()
+
+        res = self.client.get(recipe.image.url)
+
+        # Assertions
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('immutable', res['Cache-Control'])
@@ -0,0 +1,206 @@
+import hmac
+import mimetypes
+import os
+import posixpath
+import re
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import (
+    FileResponse, Http404, HttpResponse, HttpResponseForbidden
+)
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from core.profiling import metrics as request_metrics
+from core.storage import is_content_addressed, is_upload_in_progress
+
+
+# Content addressed files never change, so clients can keep them forever
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+DEFAULT_CACHE_CONTROL = 'public, max-age=3600'
+
+BYTE_RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+SENDFILE = 'sendfile'
+X_ACCEL_REDIRECT = 'x-accel-redirect'
+X_SENDFILE = 'x-sendfile'
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class RangeFile:
+    """
+        File limited to a byte range.
+
+        Servers with a sendfile based wsgi.file_wrapper use the file
+        descriptor, its position and the Content-Length to send the
+        range without copying it, others read it in chunks.
+    """
+    def __init__(self, file, start, length):
+        self.file = file
+        self.file.seek(start)
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+
+
+def serve_media(request, path, document_root=None):
+    """
+        Serve an uploaded file with conditional and range requests.
+
+        Depending on MEDIA_SERVE_MODE the file is sent with the zero copy
+        wsgi.file_wrapper of the server, or only its location is returned
+        for nginx (X-Accel-Redirect) or Apache (X-Sendfile) to send it.
+        Uploads still in progress are never served.
+    """
+    document_root = document_root or settings.MEDIA_ROOT
+    path = posixpath.normpath(path).lstrip('/')
+    if is_upload_in_progress(path):
+        raise Http404('Media file not found')
+
+    try:
+        fullpath = safe_join(document_root, path)
+    except SuspiciousFileOperation:
+        raise Http404('Media file not found')
+
+    try:
+        stat = os.stat(fullpath)
+    except (FileNotFoundError, NotADirectoryError):
+        raise Http404('Media file not found')
+    if not os.path.isfile(fullpath):
+        raise Http404('Media file not found')
+
+    etag = quote_etag(f'{int(stat.st_mtime):x}-{stat.st_size:x}')
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=int(stat.st_mtime)
+    )
+    if response is None:
+        response = _file_response(request, path, fullpath, stat.st_size, etag)
+
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    response['Cache-Control'] = (
+        IMMUTABLE_CACHE_CONTROL if is_content_addressed(path)
+        else DEFAULT_CACHE_CONTROL
+    )
+
+    return response
+
+
+def _file_response(request, path, fullpath, size, etag):
+    """
+        Return the response sending the file, or the requested range.
+    """
+    mode = getattr(settings, 'MEDIA_SERVE_MODE', SENDFILE)
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+
+    if mode == X_ACCEL_REDIRECT:
+        # nginx sends the file and handles ranges itself
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = posixpath.join(
+            getattr(settings, 'MEDIA_ACCEL_PREFIX', '/protected-media/'),
+            path
+        )
+        return response
+
+    if mode == X_SENDFILE:
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = fullpath
+        return response
+
+    byte_range = _parse_range(request, size, etag)
+    if byte_range == 'unsatisfiable':
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{size}'
+        return response
+
+    start, end = byte_range or (0, size - 1)
+    response = FileResponse(
+        RangeFile(open(fullpath, 'rb'), start, end - start + 1),
+        content_type=content_type
+    )
+    response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    if encoding:
+        response['Content-Encoding'] = encoding
+    if byte_range:
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+
+    return response
+
+
+def _parse_range(request, size, etag):
+    """
+        Return the first and last byte of a single range request.
+    """
+    header = request.META.get('HTTP_RANGE')
+    if not header or request.method not in ('GET', 'HEAD'):
+        return None
+
+    # Ranges of a file that changed since are ignored
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range and if_range != etag:
+        return None
+
+    match = BYTE_RANGE.match(header.strip())
+    if match is None or match.groups() == ('', ''):
+        return None
+
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        end = min(int(last), size - 1) if last else size - 1
+    else:
+        # Suffix range with the last bytes of the file
+        start = max(size - int(last), 0)
+        end = size - 1
+
+    if start > end or start >= size:
+        return 'unsatisfiable'
+
+    return start, end
+
+
+def metrics(request):
+    """
+        Serve the request, cache and connection pool metrics of this
+        process in the Prometheus text format.
+
+        Scrapers have to send METRICS_TOKEN as a bearer token. Without
+        a token the metrics are only served in debug mode.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        authorization = request.META.get('HTTP_AUTHORIZATION', '')
+        if not hmac.compare_digest(
+            authorization.encode('utf-8'),
+            f'Bearer {token}'.encode('utf-8')
+        ):
+            return HttpResponseForbidden()
+    elif not settings.DEBUG:
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        request_metrics.render(),
+        content_type=PROMETHEUS_CONTENT_TYPE
+    )
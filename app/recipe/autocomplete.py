@@ -0,0 +1,56 @@
+from django.conf import settings
+from django.contrib.postgres.search import TrigramSimilarity
+from django.db import connections
+from django.db.models import Case, IntegerField, Q, Value, When
+from django.db.models.functions import Upper
+
+from core.cache import LRUCache
+
+
+# Hot prefixes of every user, keyed with their data version
+cache = LRUCache(
+    max_size=getattr(settings, 'AUTOCOMPLETE_CACHE_SIZE', 2048),
+    ttl=getattr(settings, 'AUTOCOMPLETE_CACHE_TTL', 60)
+)
+
+
+def normalize(term):
+    """
+        Return a search term with collapsed whitespace and in lowercase.
+    """
+    return ' '.join(term.split()).lower()
+
+
+def match_names(queryset, term, trigram=None):
+    """
+        Filter objects to the names starting with or similar to a term,
+        ordered by prefix matches first and then by similarity.
+
+        On PostgreSQL both the prefix and the similarity lookups run
+        against the trigram GIN index of the upper cased name. Other
+        databases match substrings instead of similar names.
+    """
+    if trigram is None:
+        trigram = connections[queryset.db].vendor == 'postgresql'
+
+    term = term.upper()
+    queryset = queryset.annotate(
+        search_name=Upper('name'),
+        prefix=Case(
+            When(Q(name__istartswith=term), then=Value(1)),
+            default=Value(0),
+            output_field=IntegerField()
+        )
+    )
+
+    if trigram:
+        return queryset.filter(
+            Q(search_name__startswith=term) |
+            Q(search_name__trigram_similar=term)
+        ).annotate(
+            similarity=TrigramSimilarity('search_name', term)
+        ).order_by('-prefix', '-similarity', 'name', 'id')
+
+    return queryset.filter(
+        search_name__contains=term
+    ).order_by('-prefix', 'name', 'id')
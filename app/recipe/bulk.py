@@ -0,0 +1,100 @@
+from django.conf import settings
+from django.db import connection
+from django.db.models import Case, Value, When
+from django.db.models.functions import Cast
+
+
+def batch_size():
+    """
+        Return the number of objects validated and written at once.
+    """
+    return getattr(settings, 'BULK_BATCH_SIZE', 500)
+
+
+def batched(items, size=None):
+    """
+        Yield consecutive slices of a list.
+    """
+    size = size or batch_size()
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def bulk_insert(model, objs):
+    """
+        Insert new objects and set their primary keys.
+
+        Backends that cannot return the ids of a bulk insert save the
+        objects one by one instead, since the ids are needed to link
+        their relations.
+    """
+    if connection.features.can_return_ids_from_bulk_insert:
+        for batch in batched(objs):
+            model.objects.bulk_create(batch)
+    else:
+        for obj in objs:
+            obj.save(force_insert=True)
+
+    return objs
+
+
+def bulk_update(model, objs, fields):
+    """
+        Update fields of many objects with one query per batch.
+
+        Each column is set from a CASE over the primary keys, so no
+        signals are sent and no objects are reloaded.
+    """
+    fields = [model._meta.get_field(name) for name in fields]
+    updated = 0
+    if not objs or not fields:
+        return updated
+
+    for batch in batched(objs):
+        values = {}
+        for field in fields:
+            case = Case(
+                *[
+                    When(pk=obj.pk, then=Value(
+                        getattr(obj, field.attname),
+                        output_field=field
+                    ))
+                    for obj in batch
+                ],
+                output_field=field
+            )
+            if connection.vendor == 'postgresql':
+                # Parameters of a CASE are untyped in PostgreSQL
+                case = Cast(case, output_field=field)
+            values[field.attname] = case
+
+        updated += model.objects.filter(
+            pk__in=[obj.pk for obj in batch]
+        ).update(**values)
+
+    return updated
+
+
+def bulk_link(model, relations):
+    """
+        Replace the related objects of many to many fields.
+
+        Takes a dictionary mapping each field name to the related ids
+        of each object, and rewrites the through table rows with one
+        delete and one bulk insert per field.
+    """
+    for name, related in relations.items():
+        field = model._meta.get_field(name)
+        through = field.remote_field.through
+        source = f'{field.m2m_field_name()}_id'
+        target = f'{field.m2m_reverse_field_name()}_id'
+
+        through.objects.filter(**{f'{source}__in': list(related)}).delete()
+
+        rows = [
+            through(**{source: obj_id, target: related_id})
+            for obj_id, related_ids in related.items()
+            for related_id in dict.fromkeys(related_ids)
+        ]
+        for batch in batched(rows):
+            through.objects.bulk_create(batch)
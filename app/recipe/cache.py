@@ -0,0 +1,73 @@
+import threading
+
+from django.conf import settings
+from django.core.cache import caches
+
+
+class ResponseCache:
+    """
+        Cache of list response data.
+
+        Keys hold the data version of the user, so the signals bumping
+        the version on every change also invalidate the cached lists,
+        in every process sharing the backend.
+    """
+    key_prefix = 'list-response'
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def backend(self):
+        """
+            Return the cache backend named by RESPONSE_CACHE_ALIAS.
+        """
+        return caches[getattr(settings, 'RESPONSE_CACHE_ALIAS', 'default')]
+
+    def get(self, key):
+        """
+            Return the data cached for a key.
+        """
+        data = self.backend.get(f'{self.key_prefix}:{key}')
+        with self._lock:
+            if data is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+        return data
+
+    def set(self, key, data):
+        """
+            Cache the data of a response.
+        """
+        self.backend.set(
+            f'{self.key_prefix}:{key}',
+            data,
+            getattr(settings, 'RESPONSE_CACHE_TTL', 300)
+        )
+
+    def stats(self):
+        """
+            Return the hit and miss counters and the hit ratio.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_ratio': self.hits / lookups if lookups else 0.0,
+            }
+
+    def reset_stats(self):
+        """
+            Reset the hit and miss counters.
+        """
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+
+response_cache = ResponseCache()
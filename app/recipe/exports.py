@@ -0,0 +1,62 @@
+from itertools import islice
+
+from django.conf import settings
+
+from recipe.renderers import FastJSONRenderer
+
+
+NDJSON = 'ndjson'
+JSON = 'json'
+
+EXPORT_CONTENT_TYPES = {
+    NDJSON: 'application/x-ndjson',
+    JSON: 'application/json',
+}
+
+
+def chunk_size():
+    """
+        Return the number of rows fetched and serialized at once.
+    """
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 1000)
+
+
+def serialized_chunks(plan, queryset, request=None, size=None):
+    """
+        Yield the representations of the rows of a queryset a chunk at
+        a time.
+
+        Rows are read through a server side cursor where the database
+        supports it and the relations of each chunk are loaded with a
+        query per relation, so memory is bounded by the chunk size.
+    """
+    size = size or chunk_size()
+    rows = plan.values(queryset).iterator(chunk_size=size)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+
+        yield plan.serialize(chunk, request)
+
+
+def stream_export(chunks, layout):
+    """
+        Yield the encoded items as NDJSON lines or a JSON array.
+    """
+    renderer = FastJSONRenderer()
+    if layout == NDJSON:
+        for items in chunks:
+            yield ''.join(
+                f'{renderer.encode(item)}\n' for item in items
+            ).encode('utf-8')
+        return
+
+    yield b'['
+    separator = ''
+    for items in chunks:
+        yield (
+            separator + ','.join(renderer.encode(item) for item in items)
+        ).encode('utf-8')
+        separator = ','
+    yield b']'
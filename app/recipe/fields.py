@@ -0,0 +1,128 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import ValidationError
+from rest_framework.relations import (
+    MANY_RELATION_KWARGS, ManyRelatedField, PrimaryKeyRelatedField
+)
+
+
+class BatchedManyRelatedField(ManyRelatedField):
+    """
+        Many related field resolving every primary key with one query.
+
+        The objects resolved by resolve_related() for a whole batch of
+        items are taken from the related_objects context instead.
+    """
+    default_error_messages = {
+        'does_not_exist': _(
+            'Invalid pks "{pk_values}" - objects do not exist.'
+        ),
+    }
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        pks = [self.child_relation.to_pk(item) for item in data]
+        resolved = self.context.get('related_objects', {}).get(
+            self.field_name
+        )
+        if resolved is not None and resolved[0].issuperset(pks):
+            objects = resolved[1]
+        else:
+            objects = self.child_relation.get_queryset().in_bulk(pks)
+
+        missing = [str(pk) for pk in dict.fromkeys(pks) if pk not in objects]
+        if missing:
+            self.fail('does_not_exist', pk_values=', '.join(missing))
+
+        return [objects[pk] for pk in pks]
+
+    def valid_pks(self, data):
+        """
+            Return the valid primary keys of a submitted list.
+        """
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            return set()
+
+        pks = set()
+        for item in data:
+            try:
+                pks.add(self.child_relation.to_pk(item))
+            except (ValidationError, TypeError):
+                # Reported when the item itself is validated
+                continue
+
+        return pks
+
+
+def resolve_related(fields, items):
+    """
+        Return the objects of the batched many related fields of a list
+        of items, with one query per field for all the items.
+    """
+    resolved = {}
+    for name, field in fields.items():
+        if field.read_only or not isinstance(field, BatchedManyRelatedField):
+            continue
+
+        pks = set()
+        for item in items:
+            if hasattr(item, 'get'):
+                pks.update(field.valid_pks(item.get(name, ())))
+
+        objects = field.child_relation.get_queryset().in_bulk(pks)
+        resolved[name] = (pks, objects)
+
+    return resolved
+
+
+class UserPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    """
+        Primary key field accepting only objects of the requesting user.
+
+        With many=True all the submitted keys are resolved together, so
+        validating a list costs a single id__in query.
+    """
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+
+        return BatchedManyRelatedField(**list_kwargs)
+
+    def get_queryset(self):
+        """
+            Return the objects owned by the requesting user.
+        """
+        queryset = super().get_queryset()
+        request = self.context.get('request')
+        if request is None or not request.user.is_authenticated:
+            return queryset.none()
+
+        return queryset.filter(user=request.user)
+
+    def to_pk(self, data):
+        """
+            Return a submitted primary key converted to its python type.
+        """
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, (bool, dict, list)):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+        try:
+            return self.get_queryset().model._meta.pk.to_python(data)
+        except DjangoValidationError:
+            self.fail('incorrect_type', data_type=type(data).__name__)
+
+    def to_internal_value(self, data):
+        pk = self.to_pk(data)
+        try:
+            return self.get_queryset().get(pk=pk)
+        except self.get_queryset().model.DoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
@@ -0,0 +1,75 @@
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import Count, Exists, F, FloatField, OuterRef, Q, Value
+from django.db.models.functions import Cast
+
+
+MATCH_ANY = 'any'
+MATCH_ALL = 'all'
+MATCH_CHOICES = (MATCH_ANY, MATCH_ALL)
+
+# Text search configuration of the recipe search vector triggers
+SEARCH_CONFIG = 'english'
+
+
+def filter_by_related(queryset, relation, ids, match=MATCH_ANY):
+    """
+        Filter a queryset to the rows linked to any or all of the ids
+        through a many to many relation.
+
+        Both lookups run against the through table alone, so each row
+        is returned once without joining the relation into the query.
+    """
+    field = queryset.model._meta.get_field(relation)
+    through = field.remote_field.through
+    source = field.m2m_field_name()
+    target = field.m2m_reverse_field_name()
+    links = through.objects.filter(**{f'{target}__in': ids})
+
+    if match == MATCH_ALL:
+        # Rows with a link for every distinct id
+        matching = links.values(source).annotate(
+            matched=Count(target)
+        ).filter(matched=len(set(ids))).values(source)
+
+        return queryset.filter(pk__in=matching)
+
+    annotation = f'has_{relation}'
+    return queryset.annotate(**{
+        annotation: Exists(links.filter(**{source: OuterRef('pk')}))
+    }).filter(**{annotation: True})
+
+
+def filter_by_search(queryset, terms, full_text=None):
+    """
+        Filter recipes to those matching search terms and annotate their
+        rank.
+
+        PostgreSQL matches the trigger maintained search vector of the
+        title, tag and ingredient names through its GIN index, ranking
+        by relevance. Other databases fall back to unranked substring
+        matches of the same text.
+    """
+    if full_text is None:
+        full_text = connections[queryset.db].vendor == 'postgresql'
+
+    if full_text:
+        query = SearchQuery(terms, config=SEARCH_CONFIG)
+        # Double precision so the rank of a cursor compares equal
+        return queryset.annotate(rank=Cast(
+            SearchRank(F('search_vector'), query),
+            FloatField()
+        )).filter(search_vector=query)
+
+    tags = queryset.model.tags.through.objects.filter(
+        tag__name__icontains=terms
+    ).values('recipe_id')
+    ingredients = queryset.model.ingredients.through.objects.filter(
+        ingredient__name__icontains=terms
+    ).values('recipe_id')
+
+    return queryset.annotate(
+        rank=Value(0.0, output_field=FloatField())
+    ).filter(
+        Q(title__icontains=terms) | Q(pk__in=tags) | Q(pk__in=ingredients)
+    )
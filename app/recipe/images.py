@@ -0,0 +1,174 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from PIL import Image
+
+from core.models import Recipe, RecipeImageDerivative
+from core.storage import release_file
+
+
+logger = logging.getLogger(__name__)
+
+# Longest side in pixels of each derivative
+DERIVATIVE_SIZES = {
+    'thumbnail': 200,
+    'small': 640,
+    'large': 1280,
+}
+
+# Pillow format and save options of each derivative file type
+DERIVATIVE_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+# EXIF orientation values and the transpose that undoes them
+ORIENTATION_TRANSPOSE = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+EXIF_ORIENTATION = 274
+
+# Resizing releases the GIL in Pillow, so threads run it in parallel
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'IMAGE_PIPELINE_WORKERS', 2),
+    thread_name_prefix='recipe-images'
+)
+
+# Derivatives submitted to the pool and not generated yet
+pending = set()
+pending_lock = threading.Lock()
+
+
+def schedule_derivatives(recipe):
+    """
+        Generate the derivatives of a recipe image in the worker pool
+        once the upload is committed.
+    """
+    recipe_id, image_name = recipe.id, recipe.image.name
+    transaction.on_commit(lambda: _submit(recipe_id, image_name))
+
+
+def _submit(recipe_id, image_name):
+    """
+        Submit the derivatives of an image to the pool.
+    """
+    future = executor.submit(_run_in_worker, recipe_id, image_name)
+    with pending_lock:
+        pending.add(future)
+
+    def done(future):
+        with pending_lock:
+            pending.discard(future)
+
+    future.add_done_callback(done)
+
+
+def wait_for_derivatives(timeout=None):
+    """
+        Wait until the derivatives submitted so far are generated.
+    """
+    with pending_lock:
+        futures = list(pending)
+
+    wait(futures, timeout)
+
+
+def _run_in_worker(recipe_id, image_name):
+    """
+        Generate derivatives and release the worker database connection.
+    """
+    try:
+        generate_derivatives(recipe_id, image_name)
+    except Exception:
+        logger.exception('Failed generating derivatives of %s', image_name)
+    finally:
+        connections.close_all()
+
+
+def generate_derivatives(recipe_id, image_name):
+    """
+        Replace the derivatives of a recipe with resized copies of its
+        image, without the EXIF metadata of the original.
+    """
+    recipe = Recipe.objects.filter(id=recipe_id).only('id', 'image').first()
+    if recipe is None or recipe.image.name != image_name:
+        # The recipe was deleted or given a newer image meanwhile
+        return []
+
+    with recipe.image.open('rb') as f:
+        source = _normalize(Image.open(f))
+
+    # Shrink each size from the previous one, largest first
+    sizes = sorted(DERIVATIVE_SIZES.items(), key=lambda size: -size[1])
+    derivatives = []
+    image = source
+    for name, max_size in sizes:
+        image = image.copy()
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+
+        for extension, (image_format, options) in DERIVATIVE_FORMATS.items():
+            buffer = BytesIO()
+            image.save(buffer, format=image_format, **options)
+
+            derivative = RecipeImageDerivative(
+                recipe=recipe,
+                name=name,
+                format=extension,
+                width=image.width,
+                height=image.height
+            )
+            derivative.file.save(
+                f'{name}.{extension}',
+                ContentFile(buffer.getvalue()),
+                save=False
+            )
+            derivatives.append(derivative)
+
+    with transaction.atomic():
+        # Writing the unchanged image locks the recipe row, or the whole
+        # database on SQLite, so jobs of a recipe replace it in turn and
+        # only while the recipe still has the image
+        if Recipe.objects.filter(
+            id=recipe_id, image=image_name
+        ).update(image=image_name):
+            delete_derivatives(recipe)
+            return RecipeImageDerivative.objects.bulk_create(derivatives)
+
+    # The recipe was deleted or given a newer image while resizing
+    for derivative in derivatives:
+        release_file(derivative.file.name)
+
+    return []
+
+
+def delete_derivatives(recipe):
+    """
+        Delete the derivatives of a recipe, their files are released
+        once no other derivative shares them.
+    """
+    recipe.image_derivatives.all().delete()
+
+
+def _normalize(image):
+    """
+        Return the decoded image rotated upright as an RGB image.
+    """
+    exif = image._getexif() if hasattr(image, '_getexif') else None
+    orientation = (exif or {}).get(EXIF_ORIENTATION)
+
+    image.load()
+    if orientation in ORIENTATION_TRANSPOSE:
+        image = image.transpose(ORIENTATION_TRANSPOSE[orientation])
+
+    return image.convert('RGB')
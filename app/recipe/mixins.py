@@ -0,0 +1,424 @@
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db import transaction
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from django.utils.translation import gettext_lazy as _
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from core.models import UserDataVersion
+from recipe import bulk
+from recipe.cache import response_cache
+from recipe.fields import resolve_related
+from recipe.plans import compile_plan
+
+
+class ConditionalListMixin:
+    """
+        Answer conditional list requests from the data version of the
+        user, before any queryset or serializer work.
+
+        The version is bumped whenever a tag, ingredient or recipe of
+        the user changes, so the validators are derived from it and the
+        request instead of from the rendered body.
+    """
+    def list(self, request, *args, **kwargs):
+        version = UserDataVersion.objects.for_user(request.user)
+        etag = self.get_list_etag(request, version)
+        last_modified = int(version.modified.timestamp())
+
+        response = get_conditional_response(
+            request,
+            etag=etag,
+            last_modified=last_modified
+        )
+        if response is None:
+            response = self.get_list_response(request, etag, *args, **kwargs)
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        patch_cache_control(response, private=True, no_cache=True)
+
+        return response
+
+    def get_list_response(self, request, etag, *args, **kwargs):
+        """
+            Return the full list response.
+        """
+        return super().list(request, *args, **kwargs)
+
+    def get_list_etag(self, request, version):
+        """
+            Return the validator of a list response.
+        """
+        # Every url and format of the list has its own representation
+        representation = '|'.join((
+            request.path,
+            '&'.join(sorted(
+                f'{key}={value}'
+                for key in request.query_params
+                for value in request.query_params.getlist(key)
+            )),
+            request.accepted_renderer.format,
+        ))
+        digest = hashlib.md5(representation.encode('utf-8')).hexdigest()
+
+        modified = int(version.modified.timestamp() * 1000000)
+
+        return quote_etag(
+            f'{version.user_id}-{version.version}-{modified:x}-{digest[:16]}'
+        )
+
+
+class CachedListMixin(ConditionalListMixin):
+    """
+        Serve repeated list requests of a user from the response cache.
+
+        Responses are cached under their ETag, which already identifies
+        the user, the data version and the normalized request.
+    """
+    def get_list_response(self, request, etag, *args, **kwargs):
+        # Pagination links hold the host the request was made to
+        key = f'{request.get_host()}:{etag}'
+        data = response_cache.get(key)
+        if data is not None:
+            return Response(data)
+
+        response = super().get_list_response(request, etag, *args, **kwargs)
+        if response.status_code == 200:
+            response_cache.set(key, response.data)
+
+        return response
+
+
+class CompiledReadMixin:
+    """
+        Read rows with values_list() and serialize them with the compiled
+        plan of the serializer instead of building instances.
+
+        Serializers with fields the plan cannot compile fall back to the
+        regular serializer path.
+    """
+    def get_plan(self):
+        """
+            Return the plan of the serializer class of the action.
+        """
+        return compile_plan(self.get_serializer_class())
+
+
+class CompiledListMixin(CompiledReadMixin):
+    """
+        Serve list from the compiled plan of the serializer.
+    """
+    def list(self, request, *args, **kwargs):
+        plan = self.get_plan()
+        if plan is None:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.paginator is None:
+            return Response(plan.serialize(plan.values(queryset), request))
+
+        # The paginator reads the cursor position from the rows
+        ordering = [
+            field.lstrip('-') for field in self.paginator.get_ordering(self)
+        ]
+        page = self.paginate_queryset(plan.values(queryset, ordering))
+
+        return self.get_paginated_response(plan.serialize(page, request))
+
+
+class CompiledRetrieveMixin(CompiledReadMixin):
+    """
+        Serve retrieve from the compiled plan of the serializer.
+    """
+    def retrieve(self, request, *args, **kwargs):
+        plan = self.get_plan()
+        if plan is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            row = plan.values(queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )).first()
+        except (TypeError, ValueError, DjangoValidationError):
+            row = None
+        if row is None:
+            raise Http404
+
+        self.check_object_permissions(request, row)
+
+        return Response(plan.serialize([row], request)[0])
+
+
+class BulkMixin:
+    """
+        Create, update or delete many objects of the user in a single
+        request and transaction.
+
+        Items are validated in batches and nothing is written unless
+        every item is valid, otherwise the errors are reported with the
+        index of their item. The related objects of a batch are looked
+        up with one query per relation. Created and updated rows and
+        their many to many links are written with bulk queries, so no
+        signals are sent for them and the data version is bumped once
+        instead. Deleted rows go through QuerySet.delete(), which sends
+        the delete signals for every row.
+    """
+    def get_bulk_queryset(self):
+        """
+            Return every object of the user, ignoring the filters of the
+            query parameters.
+        """
+        return self.queryset.filter(user=self.request.user)
+
+    @action(methods=['POST', 'PATCH', 'DELETE'], detail=False)
+    def bulk(self, request):
+        """
+            Create (POST), update (PATCH) or delete (DELETE) a list of
+            objects.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            raise ValidationError(_('Expected a non empty list of items'))
+
+        max_items = getattr(settings, 'BULK_MAX_ITEMS', 1000)
+        if len(items) > max_items:
+            raise ValidationError(
+                _('Expected at most %d items') % max_items
+            )
+
+        if request.method == 'POST':
+            return self.bulk_create(items)
+        elif request.method == 'PATCH':
+            return self.bulk_update(items)
+
+        return self.bulk_destroy(items)
+
+    def bulk_create(self, items):
+        """
+            Create every item.
+        """
+        validated, errors = [], []
+        serializer_class = self.get_serializer_class()
+        for offset, batch in self._batches(items):
+            serializer = serializer_class(
+                data=batch,
+                many=True,
+                context=self._batch_context(batch)
+            )
+            if serializer.is_valid():
+                validated.extend(serializer.validated_data)
+            else:
+                errors.extend(
+                    {'index': offset + index, 'errors': item_errors}
+                    for index, item_errors in enumerate(serializer.errors)
+                    if item_errors
+                )
+
+        if errors:
+            return Response(
+                {'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        model = self.queryset.model
+        with transaction.atomic():
+            objs, links = [], []
+            for data in validated:
+                data, related = self._split_related(model, data)
+                objs.append(model(user=self.request.user, **data))
+                links.append(related)
+
+            bulk.bulk_insert(model, objs)
+            self._link(model, objs, links)
+            UserDataVersion.objects.bump(self.request.user.id)
+
+        return Response(
+            self._bulk_data([obj.id for obj in objs]),
+            status=status.HTTP_201_CREATED
+        )
+
+    def bulk_update(self, items):
+        """
+            Update every item, identified by its id.
+        """
+        ids = [self._item_id(item) for item in items]
+        instances = self.get_bulk_queryset().in_bulk(
+            [obj_id for obj_id in ids if obj_id is not None]
+        )
+
+        validated, errors, seen = [], [], set()
+        serializer_class = self.get_serializer_class()
+        for offset, batch in self._batches(items):
+            context = self._batch_context(batch)
+            for index, item in enumerate(batch, offset):
+                instance = instances.get(ids[index])
+                if instance is None or ids[index] in seen:
+                    errors.append({
+                        'index': index,
+                        'errors': {'id': [self._id_error(ids[index], seen)]}
+                    })
+                    continue
+
+                seen.add(ids[index])
+                serializer = serializer_class(
+                    instance,
+                    data=item,
+                    partial=True,
+                    context=context
+                )
+                if serializer.is_valid():
+                    validated.append((instance, serializer.validated_data))
+                else:
+                    errors.append(
+                        {'index': index, 'errors': serializer.errors}
+                    )
+
+        if errors:
+            return Response(
+                {'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        model = self.queryset.model
+        with transaction.atomic():
+            objs, links, fields = [], [], set()
+            for instance, data in validated:
+                data, related = self._split_related(model, data)
+                for name, value in data.items():
+                    setattr(instance, name, value)
+                fields.update(data)
+                objs.append(instance)
+                links.append(related)
+
+            bulk.bulk_update(model, objs, fields)
+            self._link(model, objs, links)
+            UserDataVersion.objects.bump(self.request.user.id)
+
+        return Response(self._bulk_data([obj.id for obj in objs]))
+
+    def bulk_destroy(self, items):
+        """
+            Delete every item, given as ids or objects with an id.
+        """
+        ids = [self._item_id(item) for item in items]
+        existing = set(
+            self.get_bulk_queryset().prefetch_related(None).order_by().filter(
+                id__in=[obj_id for obj_id in ids if obj_id is not None]
+            ).values_list('id', flat=True)
+        )
+
+        errors, seen = [], set()
+        for index, obj_id in enumerate(ids):
+            if obj_id not in existing or obj_id in seen:
+                errors.append({
+                    'index': index,
+                    'errors': {'id': [self._id_error(obj_id, seen)]}
+                })
+            seen.add(obj_id)
+
+        if errors:
+            return Response(
+                {'errors': errors},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            self.queryset.model.objects.filter(
+                user=self.request.user,
+                id__in=existing
+            ).delete()
+
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+    def _batches(self, items):
+        """
+            Yield the batches of items with the index of their first item.
+        """
+        offset = 0
+        for batch in bulk.batched(items):
+            yield offset, batch
+            offset += len(batch)
+
+    def _batch_context(self, batch):
+        """
+            Return the serializer context for validating a batch, with
+            the related objects of all its items resolved together.
+        """
+        context = self.get_serializer_context()
+        fields = self.get_serializer_class()(context=context).fields
+        context['related_objects'] = resolve_related(fields, batch)
+
+        return context
+
+    def _item_id(self, item):
+        """
+            Return the id of an item, or None when it has no valid id.
+        """
+        if isinstance(item, dict):
+            item = item.get('id')
+        if isinstance(item, bool):
+            return None
+
+        try:
+            return int(item)
+        except (TypeError, ValueError):
+            return None
+
+    def _id_error(self, obj_id, seen):
+        """
+            Return why an item id was rejected.
+        """
+        if obj_id is None:
+            return _('A valid integer id is required.')
+        elif obj_id in seen:
+            return _('Duplicate id "%d".') % obj_id
+
+        return _('Invalid id "%d" - object does not exist.') % obj_id
+
+    def _split_related(self, model, data):
+        """
+            Split validated data into field values and related objects.
+        """
+        data = dict(data)
+        related = {
+            field.name: data.pop(field.name)
+            for field in model._meta.many_to_many
+            if field.name in data
+        }
+
+        return data, related
+
+    def _link(self, model, objs, links):
+        """
+            Write the many to many links of the objects.
+        """
+        relations = {}
+        for obj, related in zip(objs, links):
+            for name, values in related.items():
+                relations.setdefault(name, {})[obj.id] = [
+                    value.pk for value in values
+                ]
+
+        bulk.bulk_link(model, relations)
+
+    def _bulk_data(self, ids):
+        """
+            Return the representation of the objects in the given order.
+        """
+        objs = self.get_bulk_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [objs[obj_id] for obj_id in ids],
+            many=True
+        )
+
+        return serializer.data
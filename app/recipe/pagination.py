@@ -0,0 +1,240 @@
+import base64
+import binascii
+import json
+import operator
+from collections import OrderedDict
+from functools import reduce
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    """
+        Paginate by seeking past the last row of the previous page.
+
+        The cursor holds the ordering values of the row at the edge of
+        the page, so every page is fetched with an indexed range filter
+        instead of an offset that has to skip all the earlier rows.
+        The last ordering field must be unique to keep cursors stable.
+    """
+    ordering = ('-id', )
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    invalid_cursor_message = _('Invalid cursor')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+            Return the rows of the page selected by the request cursor.
+        """
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+
+        position, reverse = self.decode_cursor(request, queryset)
+        if position is not None:
+            queryset = queryset.filter(self._seek(position, reverse))
+
+        # Walk the index backwards when moving to the previous page
+        ordering = self.ordering
+        if reverse:
+            ordering = [self._flip(field) for field in ordering]
+
+        # Fetch one extra row to know if there is another page
+        rows = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+
+        if reverse:
+            rows.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page = rows
+        return self.page
+
+    def get_paginated_response(self, data):
+        """
+            Wrap the page data with the links to the adjacent pages.
+        """
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_page_size(self, request):
+        """
+            Return the requested page size, capped at the maximum.
+        """
+        max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', None)
+        page_size = api_settings.PAGE_SIZE
+
+        try:
+            requested = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            requested = 0
+
+        if requested > 0:
+            page_size = requested
+
+        if max_page_size:
+            page_size = min(page_size, max_page_size)
+
+        return page_size
+
+    def get_ordering(self, view):
+        """
+            Return the ordering of the view, falling back to the default.
+        """
+        return tuple(getattr(view, 'pagination_ordering', self.ordering))
+
+    def get_next_link(self):
+        """
+            Return the link to the page after the current one.
+        """
+        if not self.has_next:
+            return None
+
+        return self.encode_cursor(self._position(self.page[-1]), False)
+
+    def get_previous_link(self):
+        """
+            Return the link to the page before the current one.
+        """
+        if not self.has_previous:
+            return None
+
+        if not self.page:
+            # Seeking backwards past nothing is the first page
+            return remove_query_param(self.base_url, self.cursor_query_param)
+
+        return self.encode_cursor(self._position(self.page[0]), True)
+
+    def encode_cursor(self, position, reverse):
+        """
+            Return the page url for an opaque cursor.
+        """
+        payload = json.dumps({'p': position, 'r': int(reverse)})
+        cursor = base64.urlsafe_b64encode(payload.encode('utf-8'))
+
+        return replace_query_param(
+            self.base_url,
+            self.cursor_query_param,
+            cursor.decode('ascii')
+        )
+
+    def decode_cursor(self, request, queryset):
+        """
+            Return the position and direction of the request cursor,
+            with each value converted by its ordering field.
+        """
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+
+        try:
+            payload = json.loads(
+                base64.urlsafe_b64decode(cursor.encode('ascii'))
+            )
+            position = payload['p']
+            reverse = bool(payload['r'])
+        except (TypeError, ValueError, KeyError, binascii.Error):
+            raise NotFound(self.invalid_cursor_message)
+
+        if not isinstance(position, list) or \
+                len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            position = [
+                self._field(queryset, field).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except ValidationError:
+            raise NotFound(self.invalid_cursor_message)
+
+        if None in position:
+            raise NotFound(self.invalid_cursor_message)
+
+        return position, reverse
+
+    def _field(self, queryset, field):
+        """
+            Return the model field or annotation of an ordering field.
+        """
+        name = field.lstrip('-')
+        annotation = queryset.query.annotations.get(name)
+        if annotation is not None:
+            return annotation.output_field
+
+        return queryset.model._meta.get_field(name)
+
+    def _position(self, row):
+        """
+            Return the ordering values of a row.
+        """
+        return [
+            getattr(row, field.lstrip('-')) for field in self.ordering
+        ]
+
+    def _seek(self, position, reverse):
+        """
+            Return the filter selecting the rows after a position.
+        """
+        clauses = []
+        for index, field in enumerate(self.ordering):
+            # Every field before this one has to be equal
+            lookups = {
+                prior.lstrip('-'): value
+                for prior, value in zip(self.ordering[:index], position)
+            }
+
+            descending = field.startswith('-')
+            comparison = 'lt' if descending != reverse else 'gt'
+            lookups[f'{field.lstrip("-")}__{comparison}'] = position[index]
+            clauses.append(Q(**lookups))
+
+        seek = reduce(operator.or_, clauses)
+        if len(self.ordering) > 1:
+            # An inclusive bound on the leading field lets its index
+            # start the scan at the position instead of the first row
+            leading = self.ordering[0]
+            descending = leading.startswith('-')
+            comparison = 'lte' if descending != reverse else 'gte'
+            seek &= Q(**{
+                f'{leading.lstrip("-")}__{comparison}': position[0]
+            })
+
+        return seek
+
+    def _flip(self, field):
+        """
+            Return the ordering field in the opposite direction.
+        """
+        return field[1:] if field.startswith('-') else f'-{field}'
+
+
+class RecipePagination(KeysetPagination):
+    """
+        Paginate recipes from the newest to the oldest.
+    """
+    ordering = ('-id', )
+
+
+class RecipeAttrPagination(KeysetPagination):
+    """
+        Paginate tags and ingredients by name.
+    """
+    ordering = ('-name', 'id')
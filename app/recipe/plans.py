@@ -0,0 +1,218 @@
+from functools import lru_cache
+
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework import serializers
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.settings import api_settings
+
+from core.profiling import timed
+
+
+# Fields whose representation is the database value itself
+PLAIN_FIELDS = (
+    serializers.IntegerField,
+    serializers.CharField,
+    serializers.BooleanField,
+)
+
+
+@lru_cache(maxsize=None)
+def compile_plan(serializer_class):
+    """
+        Return the plan of a serializer class, or None when some of its
+        fields cannot be compiled.
+    """
+    try:
+        return SerializerPlan(serializer_class())
+    except ImproperlyConfigured:
+        return None
+
+
+class SerializerPlan:
+    """
+        Serializer compiled into a flat row to dict function.
+
+        The plan selects the columns its fields read with values_list()
+        and loads every many to many or reverse relation with a single
+        query per relation, ordered by the related primary key. The row
+        function builds the same representation as the serializer
+        without instantiating or walking its fields.
+    """
+    def __init__(self, serializer):
+        self.model = serializer.Meta.model
+        self.columns = [self.model._meta.pk.name]
+        self.relations = []
+
+        namespace = {}
+        items = []
+        for field in serializer._readable_fields:
+            if '.' in field.source or field.source == '*':
+                raise ImproperlyConfigured(
+                    f'Cannot compile the source of {field.field_name}'
+                )
+
+            expression = self._compile(field, len(namespace), namespace)
+            items.append(f'{field.field_name!r}: {expression}')
+
+        code = (
+            'def row_to_dict(row, relations, build_uri):\n'
+            f'    return {{{", ".join(items)}}}\n'
+        )
+        exec(code, namespace)
+        self.row_to_dict = namespace['row_to_dict']
+
+    def _compile(self, field, number, namespace):
+        """
+            Return the expression computing the value of a field.
+        """
+        if isinstance(field, ManyRelatedField):
+            child = field.child_relation
+            if not isinstance(child, PrimaryKeyRelatedField) or \
+                    child.pk_field is not None:
+                raise ImproperlyConfigured(
+                    f'Cannot compile the relation {field.field_name}'
+                )
+            return self._relation(field.source, None)
+
+        if isinstance(field, serializers.ListSerializer):
+            if not isinstance(field.child, serializers.ModelSerializer):
+                raise ImproperlyConfigured(
+                    f'Cannot compile the nested {field.field_name}'
+                )
+            return self._relation(field.source, SerializerPlan(field.child))
+
+        value = f'row[{self._column(field.source)}]'
+        if type(field) in PLAIN_FIELDS:
+            return value
+
+        if isinstance(field, serializers.DecimalField):
+            namespace[f'convert_{number}'] = field.to_representation
+            return f'(None if {value} is None else convert_{number}({value}))'
+
+        if isinstance(field, serializers.FileField):
+            namespace[f'convert_{number}'] = file_converter(
+                self.model._meta.get_field(field.source).storage,
+                field
+            )
+            return f'convert_{number}({value}, build_uri)'
+
+        raise ImproperlyConfigured(
+            f'Cannot compile {type(field).__name__} {field.field_name}'
+        )
+
+    def _column(self, name):
+        """
+            Return the index of a column, selecting it if needed.
+        """
+        if name not in self.columns:
+            self.columns.append(name)
+
+        return self.columns.index(name)
+
+    def _relation(self, source, plan):
+        """
+            Return the expression reading the items of a relation.
+        """
+        self.relations.append(RelationPlan(self.model, source, plan))
+        return f'(relations[{len(self.relations) - 1}].get(row[0]) or [])'
+
+    def values(self, queryset, extra=()):
+        """
+            Return the queryset selecting the columns of the plan first,
+            then the extra columns the caller needs.
+        """
+        columns = self.columns + [
+            name for name in dict.fromkeys(extra) if name not in self.columns
+        ]
+
+        return queryset.prefetch_related(None).values_list(
+            *columns,
+            named=True
+        )
+
+    def serialize(self, rows, request=None):
+        """
+            Return the representation of the rows.
+        """
+        with timed('serialize'):
+            return self.serialize_rows(
+                rows,
+                request.build_absolute_uri if request else None
+            )
+
+    def serialize_rows(self, rows, build_uri):
+        """
+            Return the representation of the rows, with file urls made
+            absolute by build_uri when given.
+        """
+        ids = [row[0] for row in rows]
+        relations = [
+            relation.fetch(ids, build_uri) if ids else {}
+            for relation in self.relations
+        ]
+
+        return [self.row_to_dict(row, relations, build_uri) for row in rows]
+
+
+class RelationPlan:
+    """
+        Batched loading of a many to many or reverse foreign key.
+    """
+    def __init__(self, model, source, plan):
+        field = model._meta.get_field(source)
+        if field.many_to_many and not field.auto_created:
+            self.queryset = field.remote_field.through.objects.all()
+            self.key = f'{field.m2m_field_name()}_id'
+            self.order = f'{field.m2m_reverse_field_name()}_id'
+            prefix = f'{field.m2m_reverse_field_name()}__'
+        elif field.one_to_many:
+            self.queryset = field.related_model.objects.all()
+            self.key = field.field.attname
+            self.order = field.related_model._meta.pk.name
+            prefix = ''
+        else:
+            raise ImproperlyConfigured(f'Cannot compile the relation {source}')
+
+        self.plan = plan
+        columns = plan.columns if plan else [field.related_model._meta.pk.name]
+        self.columns = [f'{prefix}{name}' for name in columns]
+
+    def fetch(self, ids, build_uri=None):
+        """
+            Return the items of the relation grouped by object id.
+        """
+        rows = self.queryset.filter(
+            **{f'{self.key}__in': ids}
+        ).order_by(self.order).values_list(self.key, *self.columns)
+
+        grouped = {}
+        if self.plan is None:
+            for obj_id, related_id in rows:
+                grouped.setdefault(obj_id, []).append(related_id)
+            return grouped
+
+        rows = list(rows)
+        items = self.plan.serialize_rows([row[1:] for row in rows], build_uri)
+        for row, item in zip(rows, items):
+            grouped.setdefault(row[0], []).append(item)
+
+        return grouped
+
+
+def file_converter(storage, field):
+    """
+        Return a function converting stored file names like the
+        FileField of the serializer.
+    """
+    use_url = getattr(field, 'use_url', api_settings.UPLOADED_FILES_USE_URL)
+
+    def convert(name, build_uri):
+        if not name:
+            return None
+        if not use_url:
+            return name
+
+        url = storage.url(name)
+        return build_uri(url) if build_uri else url
+
+    return convert
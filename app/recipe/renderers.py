@@ -0,0 +1,58 @@
+from functools import lru_cache
+
+from rest_framework.compat import LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import JSONRenderer
+
+
+@lru_cache(maxsize=None)
+def shared_encoder(encoder_class, ensure_ascii, allow_nan, separators):
+    """
+        Return the encoder shared by every renderer with these options.
+
+        Without the circular reference checks encoding keeps no state,
+        so one encoder can serve every request and thread.
+    """
+    return encoder_class(
+        ensure_ascii=ensure_ascii,
+        allow_nan=allow_nan,
+        separators=separators,
+        check_circular=False
+    )
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+        JSON renderer encoding compact responses with a shared encoder.
+
+        The encoder is built once for each set of renderer options and
+        without the circular reference checks, which representations
+        built from rows never need. Indented responses are rendered by
+        the default renderer.
+    """
+    @property
+    def encoder(self):
+        return shared_encoder(
+            self.encoder_class,
+            self.ensure_ascii,
+            not self.strict,
+            SHORT_SEPARATORS if self.compact else LONG_SEPARATORS
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        renderer_context = renderer_context or {}
+        if self.get_indent(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        return self.encode(data).encode('utf-8')
+
+    def encode(self, data):
+        """
+            Return the compact JSON of the data as a string.
+        """
+        ret = self.encoder.encode(data)
+
+        # Same escaping of the javascript line terminators as the parent
+        return ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
@@ -1,9 +1,12 @@
 from rest_framework import serializers
 
-from core.models import Tag, Ingredient, Recipe
+from core.models import Tag, Ingredient, Recipe, RecipeImageDerivative
+from core.profiling import ProfiledSerializerMixin
+from recipe.fields import UserPrimaryKeyRelatedField
 
 
-class TagSerializer(serializers.ModelSerializer):
+class TagSerializer(ProfiledSerializerMixin,
+                    serializers.ModelSerializer):
     """
         Serializer for tag objects.
     """
@@ -13,7 +16,8 @@ class TagSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', )
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(ProfiledSerializerMixin,
+                           serializers.ModelSerializer):
     """
         Serializer for ingredient objects.
     """
@@ -23,16 +27,28 @@ class IngredientSerializer(serializers.ModelSerializer):
         read_only_fields = ('id', )
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeImageDerivativeSerializer(ProfiledSerializerMixin,
+                                      serializers.ModelSerializer):
+    """
+        Serializer for resized copies of recipe images.
+    """
+    class Meta:
+        model = RecipeImageDerivative
+        fields = ('name', 'format', 'width', 'height', 'file')
+        read_only_fields = fields
+
+
+class RecipeSerializer(ProfiledSerializerMixin,
+                       serializers.ModelSerializer):
     """
         Serializer for recipe objects.
     """
-    ingredients = serializers.PrimaryKeyRelatedField(
+    ingredients = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Ingredient.objects.all()
     )
 
-    tags = serializers.PrimaryKeyRelatedField(
+    tags = UserPrimaryKeyRelatedField(
         many=True,
         queryset=Tag.objects.all()
     )
@@ -52,13 +68,29 @@ class RecipeDetailSerializer(RecipeSerializer):
     """
     ingredients = IngredientSerializer(many=True, read_only=True)
     tags = TagSerializer(many=True, read_only=True)
+    derivatives = RecipeImageDerivativeSerializer(
+        source='image_derivatives',
+        many=True,
+        read_only=True
+    )
+
+    class Meta(RecipeSerializer.Meta):
+        fields = RecipeSerializer.Meta.fields + ('image', 'derivatives')
+        read_only_fields = ('id', 'image')
 
 
-class RecipeImageSerializer(serializers.ModelSerializer):
+class RecipeImageSerializer(ProfiledSerializerMixin,
+                            serializers.ModelSerializer):
     """
         Serializer for uploading images to recipes.
     """
+    derivatives = RecipeImageDerivativeSerializer(
+        source='image_derivatives',
+        many=True,
+        read_only=True
+    )
+
     class Meta:
         model = Recipe
-        fields = ('id', 'image')
+        fields = ('id', 'image', 'derivatives')
         read_only_fields = ('id', )
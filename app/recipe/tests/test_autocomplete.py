@@ -0,0 +1,112 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag, Ingredient
+from recipe.autocomplete import cache, normalize
+
+
+TAGS_AUTOCOMPLETE_URL = reverse('recipe:tag-autocomplete')
+INGREDIENTS_AUTOCOMPLETE_URL = reverse('recipe:ingredient-autocomplete')
+
+
+class AutocompleteTests(TestCase):
+    """
+        Test the tag and ingredient autocomplete endpoints.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.client.force_authenticate(self.user)
+        cache.clear()
+
+    def test_normalize(self):
+        """
+            Test terms are lowercased with collapsed whitespace.
+        """
+        # Assertion
+        self.assertEqual(normalize('  Green   TEA '), 'green tea')
+
+    def test_prefix_matches_first(self):
+        """
+            Test names starting with the term come before other matches.
+        """
+        for name in ('Sweet potato', 'Potato', 'Pepper', 'Potatoes'):
+            Ingredient.objects.create(user=self.user, name=name)
+
+        res = self.client.get(INGREDIENTS_AUTOCOMPLETE_URL, {'q': 'pot'})
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [ingredient['name'] for ingredient in res.data],
+            ['Potato', 'Potatoes', 'Sweet potato']
+        )
+        self.assertEqual(set(res.data[0]), {'id', 'name'})
+
+    def test_limited_to_user(self):
+        """
+            Test only the names of the user are suggested.
+        """
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'santa4521!'
+        )
+        Tag.objects.create(user=other, name='Vegan')
+        tag = Tag.objects.create(user=self.user, name='Vegetarian')
+
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': 'veg'})
+
+        # Assertion
+        self.assertEqual(res.data, [{'id': tag.id, 'name': 'Vegetarian'}])
+
+    @override_settings(AUTOCOMPLETE_MAX_LIMIT=3)
+    def test_limit(self):
+        """
+            Test the number of suggestions is capped.
+        """
+        for index in range(6):
+            Tag.objects.create(user=self.user, name=f'Tag {index}')
+
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': 'tag', 'limit': 2})
+        capped = self.client.get(
+            TAGS_AUTOCOMPLETE_URL,
+            {'q': 'tag', 'limit': 100}
+        )
+
+        # Assertions
+        self.assertEqual(len(res.data), 2)
+        self.assertEqual(len(capped.data), 3)
+
+    def test_empty_term(self):
+        """
+            Test an empty term suggests nothing.
+        """
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': '  '})
+
+        # Assertion
+        self.assertEqual(res.data, [])
+
+    def test_cached_until_changed(self):
+        """
+            Test hot prefixes are cached until the names change.
+        """
+        Tag.objects.create(user=self.user, name='Vegan')
+        self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': 'veg'})
+
+        with self.assertNumQueries(1):
+            cached = self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': 'VEG '})
+
+        Tag.objects.create(user=self.user, name='Veggie')
+        res = self.client.get(TAGS_AUTOCOMPLETE_URL, {'q': 'veg'})
+
+        # Assertions
+        self.assertEqual(len(cached.data), 1)
+        self.assertEqual(len(res.data), 2)
@@ -0,0 +1,324 @@
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient, UserDataVersion
+from recipe import bulk
+
+
+RECIPE_BULK_URL = reverse('recipe:recipe-bulk')
+TAGS_BULK_URL = reverse('recipe:tag-bulk')
+INGREDIENTS_BULK_URL = reverse('recipe:ingredient-bulk')
+
+
+class BulkHelperTests(TestCase):
+    """
+        Test the bulk query helpers.
+    """
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+
+    def test_bulk_update(self):
+        """
+            Test each object gets its own values in one query.
+        """
+        tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Vegan', 'Dessert', 'Breakfast')
+        ]
+        for tag in tags:
+            tag.name = tag.name.upper()
+
+        with self.assertNumQueries(1):
+            updated = bulk.bulk_update(Tag, tags, ['name'])
+
+        # Assertions
+        self.assertEqual(updated, 3)
+        self.assertEqual(
+            sorted(Tag.objects.values_list('name', flat=True)),
+            ['BREAKFAST', 'DESSERT', 'VEGAN']
+        )
+
+    def test_bulk_link(self):
+        """
+            Test links are replaced with the given related ids.
+        """
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample Recipe',
+            time_minutes=30,
+            price=5.00
+        )
+        vegan = Tag.objects.create(user=self.user, name='Vegan')
+        dessert = Tag.objects.create(user=self.user, name='Dessert')
+        recipe.tags.add(vegan)
+
+        bulk.bulk_link(Recipe, {'tags': {recipe.id: [dessert.id]}})
+
+        # Assertion
+        self.assertEqual(list(recipe.tags.all()), [dessert])
+
+
+class BulkApiTests(TestCase):
+    """
+        Test the bulk endpoints.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create_tags(self):
+        """
+            Test creating many tags at once.
+        """
+        version = UserDataVersion.objects.for_user(self.user).version
+        payload = [{'name': 'Vegan'}, {'name': 'Dessert'}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [tag['name'] for tag in res.data],
+            ['Vegan', 'Dessert']
+        )
+        self.assertEqual(Tag.objects.filter(user=self.user).count(), 2)
+        self.assertGreater(
+            UserDataVersion.objects.for_user(self.user).version,
+            version
+        )
+
+    def test_bulk_create_recipes(self):
+        """
+            Test creating recipes with their tags and ingredients.
+        """
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        payload = [
+            {
+                'title': f'Recipe {index}',
+                'time_minutes': 10,
+                'price': '2.50',
+                'tags': [tag.id],
+                'ingredients': [ingredient.id],
+            }
+            for index in range(3)
+        ]
+
+        res = self.client.post(RECIPE_BULK_URL, payload, format='json')
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(res.data), 3)
+        for item, recipe in zip(payload, res.data):
+            self.assertEqual(recipe['title'], item['title'])
+            self.assertEqual(recipe['tags'], [tag.id])
+            self.assertEqual(recipe['ingredients'], [ingredient.id])
+        self.assertEqual(tag.recipe_set.count(), 3)
+
+    def test_bulk_ignores_query_filters(self):
+        """
+            Test the list filters of the query do not apply to bulk
+            requests.
+        """
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Porridge',
+            time_minutes=10,
+            price=5.00
+        )
+        url = f'{RECIPE_BULK_URL}?search=pancakes'
+        payload = [{
+            'title': 'Waffles',
+            'time_minutes': 10,
+            'price': '2.50',
+            'tags': [],
+            'ingredients': [],
+        }]
+
+        created = self.client.post(url, payload, format='json')
+        updated = self.client.patch(
+            url, [{'id': recipe.id, 'title': 'Oats'}], format='json'
+        )
+
+        # Assertions
+        self.assertEqual(created.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(created.data[0]['title'], 'Waffles')
+        self.assertEqual(updated.status_code, status.HTTP_200_OK)
+        self.assertEqual(updated.data[0]['title'], 'Oats')
+
+    def test_bulk_create_resolves_related_once(self):
+        """
+            Test the tags and ingredients of every item are looked up
+            together.
+        """
+        tags = [
+            Tag.objects.create(user=self.user, name=f'Tag {index}')
+            for index in range(3)
+        ]
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+
+        queries = []
+        for count in (2, 6):
+            payload = [
+                {
+                    'title': f'Recipe {count}-{index}',
+                    'time_minutes': 10,
+                    'price': '2.50',
+                    'tags': [tags[index % 3].id],
+                    'ingredients': [ingredient.id],
+                }
+                for index in range(count)
+            ]
+            with CaptureQueriesContext(connection) as context:
+                res = self.client.post(
+                    RECIPE_BULK_URL, payload, format='json'
+                )
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            queries.append(len([
+                query for query in context.captured_queries
+                if query['sql'].startswith('SELECT') and (
+                    'FROM "core_tag"' in query['sql'] or
+                    'FROM "core_ingredient"' in query['sql']
+                )
+            ]))
+
+        # Assertion
+        self.assertEqual(queries[0], queries[1])
+
+    def test_bulk_create_errors(self):
+        """
+            Test nothing is created when any item is invalid.
+        """
+        payload = [{'name': 'Vegan'}, {'name': ''}, {}]
+
+        res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [error['index'] for error in res.data['errors']],
+            [1, 2]
+        )
+        self.assertFalse(Tag.objects.exists())
+
+    def test_bulk_requires_list(self):
+        """
+            Test the payload must be a non empty list.
+        """
+        for payload in ({'name': 'Vegan'}, []):
+            res = self.client.post(TAGS_BULK_URL, payload, format='json')
+
+            # Assertion
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_update_recipes(self):
+        """
+            Test updating fields and tags of many recipes.
+        """
+        recipes = [
+            Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {index}',
+                time_minutes=10,
+                price=5.00
+            )
+            for index in range(2)
+        ]
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        payload = [
+            {'id': recipes[0].id, 'price': '7.25', 'tags': [tag.id]},
+            {'id': recipes[1].id, 'title': 'Renamed'},
+        ]
+
+        res = self.client.patch(RECIPE_BULK_URL, payload, format='json')
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        for recipe in recipes:
+            recipe.refresh_from_db()
+        self.assertEqual(recipes[0].price, Decimal('7.25'))
+        self.assertEqual(recipes[0].title, 'Recipe 0')
+        self.assertEqual(list(recipes[0].tags.all()), [tag])
+        self.assertEqual(recipes[1].title, 'Renamed')
+        self.assertEqual(res.data[1]['title'], 'Renamed')
+
+    def test_bulk_update_other_user(self):
+        """
+            Test objects of other users are reported as missing.
+        """
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'santa4521!'
+        )
+        tag = Tag.objects.create(user=other, name='Vegan')
+        own = Tag.objects.create(user=self.user, name='Dessert')
+        payload = [
+            {'id': own.id, 'name': 'Sweet'},
+            {'id': tag.id, 'name': 'Changed'},
+            {'name': 'No id'},
+        ]
+
+        res = self.client.patch(TAGS_BULK_URL, payload, format='json')
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [error['index'] for error in res.data['errors']],
+            [1, 2]
+        )
+        own.refresh_from_db()
+        tag.refresh_from_db()
+        self.assertEqual(own.name, 'Dessert')
+        self.assertEqual(tag.name, 'Vegan')
+
+    def test_bulk_delete(self):
+        """
+            Test deleting many ingredients at once.
+        """
+        ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Salt', 'Pepper', 'Kale')
+        ]
+        payload = [ingredients[0].id, {'id': ingredients[1].id}]
+
+        res = self.client.delete(INGREDIENTS_BULK_URL, payload, format='json')
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Ingredient.objects.all()), [ingredients[2]])
+
+    def test_bulk_delete_missing(self):
+        """
+            Test nothing is deleted when an id does not exist.
+        """
+        recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample Recipe',
+            time_minutes=30,
+            price=5.00
+        )
+
+        res = self.client.delete(
+            RECIPE_BULK_URL,
+            [recipe.id, recipe.id + 100],
+            format='json'
+        )
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(res.data['errors'][0]['index'], 1)
+        self.assertTrue(Recipe.objects.filter(id=recipe.id).exists())
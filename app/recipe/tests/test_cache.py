@@ -0,0 +1,93 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.cache import response_cache
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class ResponseCacheTests(TestCase):
+    """
+        Test the list endpoints are served from the response cache.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample Recipe',
+            time_minutes=30,
+            price=5.00
+        )
+        response_cache.reset_stats()
+
+    def test_repeated_list_from_cache(self):
+        """
+            Test a repeated list request only loads the data version.
+        """
+        first = self.client.get(RECIPE_URL)
+
+        with self.assertNumQueries(1):
+            second = self.client.get(RECIPE_URL)
+
+        # Assertions
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(response_cache.stats(), {
+            'hits': 1,
+            'misses': 1,
+            'hit_ratio': 0.5,
+        })
+
+    def test_write_invalidates_cache(self):
+        """
+            Test changes are visible in the next list response.
+        """
+        self.client.get(TAGS_URL)
+        Tag.objects.create(user=self.user, name='Vegan')
+
+        res = self.client.get(TAGS_URL)
+
+        # Assertions
+        self.assertEqual(res.data['results'][0]['name'], 'Vegan')
+        self.assertEqual(response_cache.stats()['hits'], 0)
+
+    def test_query_normalized(self):
+        """
+            Test the order of query parameters shares a cache entry.
+        """
+        self.client.get(RECIPE_URL, {'page_size': 5, 'match': 'any'})
+        self.client.get(RECIPE_URL, {'match': 'any', 'page_size': 5})
+        self.client.get(RECIPE_URL, {'page_size': 6, 'match': 'any'})
+
+        # Assertions
+        self.assertEqual(response_cache.stats()['hits'], 1)
+        self.assertEqual(response_cache.stats()['misses'], 2)
+
+    def test_cache_per_user(self):
+        """
+            Test users never share cached responses.
+        """
+        self.client.get(RECIPE_URL)
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'santa4521!'
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(RECIPE_URL)
+
+        # Assertions
+        self.assertEqual(res.data['results'], [])
+        self.assertEqual(response_cache.stats()['hits'], 0)
@@ -0,0 +1,113 @@
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+INGREDIENTS_URL = reverse('recipe:ingredient-list')
+
+
+class ConditionalListTests(TestCase):
+    """
+        Test conditional requests to the list endpoints.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample Recipe',
+            time_minutes=30,
+            price=5.00
+        )
+
+    def _etag(self, url, params=None):
+        res = self.client.get(url, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return res['ETag']
+
+    def test_not_modified_without_queries(self):
+        """
+            Test an unchanged list is answered from the data version.
+        """
+        for url in (RECIPE_URL, TAGS_URL, INGREDIENTS_URL):
+            etag = self._etag(url)
+
+            with self.assertNumQueries(1):
+                res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+            # Assertions
+            self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+            self.assertEqual(res['ETag'], etag)
+
+    def test_modified_since(self):
+        """
+            Test If-Modified-Since is answered from the data version.
+        """
+        last_modified = self.client.get(TAGS_URL)['Last-Modified']
+
+        res = self.client.get(TAGS_URL, HTTP_IF_MODIFIED_SINCE=last_modified)
+
+        # Assertion
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_changes_invalidate_etag(self):
+        """
+            Test creating, linking and deleting objects changes the ETag.
+        """
+        etags = [self._etag(RECIPE_URL)]
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        etags.append(self._etag(RECIPE_URL))
+
+        self.recipe.tags.add(tag)
+        etags.append(self._etag(RECIPE_URL))
+
+        ingredient = Ingredient.objects.create(user=self.user, name='Salt')
+        ingredient.recipe_set.add(self.recipe)
+        etags.append(self._etag(RECIPE_URL))
+
+        self.recipe.delete()
+        etags.append(self._etag(RECIPE_URL))
+
+        # Assertion
+        self.assertEqual(len(set(etags)), len(etags))
+
+    def test_query_params_change_etag(self):
+        """
+            Test different filters of the list have different ETags.
+        """
+        # Assertions
+        self.assertNotEqual(
+            self._etag(TAGS_URL),
+            self._etag(TAGS_URL, {'assigned_only': 1})
+        )
+        self.assertEqual(
+            self._etag(RECIPE_URL, {'tags': '1', 'match': 'all'}),
+            self._etag(RECIPE_URL, {'match': 'all', 'tags': '1'})
+        )
+
+    def test_other_users_changes_keep_etag(self):
+        """
+            Test changes of another user do not change the ETag.
+        """
+        etag = self._etag(TAGS_URL)
+        user2 = get_user_model().objects.create_user(
+            'testing2@gmail.com',
+            'santa4521!_2'
+        )
+        Tag.objects.create(user=user2, name='Kosher')
+
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        # Assertion
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
@@ -0,0 +1,131 @@
+import json
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag, Ingredient
+from recipe import exports
+from recipe.plans import compile_plan
+from recipe.serializers import RecipeDetailSerializer
+
+
+EXPORT_URL = reverse('recipe:recipe-export')
+
+
+class ExportTests(TestCase):
+    """
+        Test the streaming recipe export.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.client.force_authenticate(self.user)
+
+        tag = Tag.objects.create(user=self.user, name='Vegan')
+        ingredient = Ingredient.objects.create(user=self.user, name='Kale')
+        self.recipes = []
+        for index in range(5):
+            recipe = Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {index}',
+                time_minutes=10,
+                price=5.00
+            )
+            recipe.tags.add(tag)
+            recipe.ingredients.add(ingredient)
+            self.recipes.append(recipe)
+
+    def _content(self, res):
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return b''.join(res.streaming_content).decode('utf-8')
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_export_ndjson(self):
+        """
+            Test recipes are streamed as one JSON document per line.
+        """
+        res = self.client.get(EXPORT_URL)
+
+        # Assertions
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = self._content(res).splitlines()
+        self.assertEqual(
+            [json.loads(line)['title'] for line in lines],
+            [recipe.title for recipe in self.recipes]
+        )
+        self.assertEqual(
+            json.loads(lines[0])['tags'],
+            [{'id': self.recipes[0].tags.get().id, 'name': 'Vegan'}]
+        )
+
+    @override_settings(EXPORT_CHUNK_SIZE=2)
+    def test_export_json_array(self):
+        """
+            Test recipes are streamed as a single JSON array.
+        """
+        res = self.client.get(EXPORT_URL, {'layout': 'json'})
+
+        # Assertions
+        self.assertEqual(res['Content-Type'], 'application/json')
+        data = json.loads(self._content(res))
+        self.assertEqual(len(data), 5)
+        self.assertEqual(data[4]['ingredients'][0]['name'], 'Kale')
+
+    def test_export_empty_json_array(self):
+        """
+            Test exporting no recipes is a valid empty array.
+        """
+        Recipe.objects.all().delete()
+
+        res = self.client.get(EXPORT_URL, {'layout': 'json'})
+
+        # Assertion
+        self.assertEqual(json.loads(self._content(res)), [])
+
+    def test_export_limited_to_user(self):
+        """
+            Test the export only contains recipes of the user.
+        """
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'santa4521!'
+        )
+        self.client.force_authenticate(other)
+
+        res = self.client.get(EXPORT_URL)
+
+        # Assertion
+        self.assertEqual(self._content(res), '')
+
+    def test_export_invalid_layout(self):
+        """
+            Test an unknown layout is rejected.
+        """
+        res = self.client.get(EXPORT_URL, {'layout': 'xml'})
+
+        # Assertion
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_chunk_queries(self):
+        """
+            Test relations are loaded once per chunk.
+        """
+        plan = compile_plan(RecipeDetailSerializer)
+        chunks = exports.serialized_chunks(
+            plan,
+            Recipe.objects.order_by('id'),
+            size=2
+        )
+
+        # Rows of 3 chunks, and 3 relations for each of them
+        with self.assertNumQueries(1 + 3 * 3):
+            items = [item for chunk in chunks for item in chunk]
+
+        # Assertion
+        self.assertEqual(len(items), 5)
@@ -0,0 +1,181 @@
+import tempfile
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.core.files import File
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+from PIL import Image
+
+from core.models import Recipe
+from recipe import images
+
+
+def sample_recipe(user):
+    """
+        Create and return a sample recipe.
+    """
+    return Recipe.objects.create(
+        user=user,
+        title='Sample Recipe',
+        time_minutes=30,
+        price=5.00
+    )
+
+
+class ImageDerivativeTests(TestCase):
+    """
+        Test generating resized copies of recipe images.
+    """
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.recipe = sample_recipe(self.user)
+
+    def tearDown(self):
+        for derivative in self.recipe.image_derivatives.all():
+            derivative.file.delete()
+        self.recipe.image.delete()
+
+    def _save_image(self, size, **options):
+        """
+            Save a JPEG image of the given size to the recipe.
+        """
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as f:
+            Image.new('RGB', size, 'red').save(f, format='JPEG', **options)
+            f.seek(0)
+            self.recipe.image.save('sample.jpg', File(f))
+
+    def test_generate_derivatives(self):
+        """
+            Test each size is generated in each format.
+        """
+        self._save_image((2000, 1000))
+
+        derivatives = images.generate_derivatives(
+            self.recipe.id,
+            self.recipe.image.name
+        )
+
+        # Assertions
+        self.assertEqual(
+            len(derivatives),
+            len(images.DERIVATIVE_SIZES) * len(images.DERIVATIVE_FORMATS)
+        )
+        for derivative in self.recipe.image_derivatives.all():
+            max_size = images.DERIVATIVE_SIZES[derivative.name]
+            self.assertEqual(derivative.width, max_size)
+            self.assertEqual(derivative.height, max_size // 2)
+            with Image.open(derivative.file.path) as image:
+                self.assertEqual(image.size, (max_size, max_size // 2))
+                self.assertNotIn('exif', image.info)
+
+    def test_generate_derivatives_applies_orientation(self):
+        """
+            Test derivatives are rotated upright and lose the EXIF data.
+        """
+        # Minimal EXIF block with the orientation set to rotate by 90
+        exif = (
+            b'Exif\x00\x00MM\x00*\x00\x00\x00\x08\x00\x01'
+            b'\x01\x12\x00\x03\x00\x00\x00\x01\x00\x06\x00\x00'
+            b'\x00\x00\x00\x00'
+        )
+        self._save_image((400, 200), exif=exif)
+
+        images.generate_derivatives(self.recipe.id, self.recipe.image.name)
+        thumbnail = self.recipe.image_derivatives.get(
+            name='thumbnail',
+            format='jpeg'
+        )
+
+        # Assertions
+        self.assertEqual((thumbnail.width, thumbnail.height), (100, 200))
+        with Image.open(thumbnail.file.path) as image:
+            self.assertNotIn('exif', image.info)
+
+    def test_replaced_image_skipped(self):
+        """
+            Test a stale job does not overwrite a newer image.
+        """
+        self._save_image((300, 300))
+
+        derivatives = images.generate_derivatives(
+            self.recipe.id,
+            'uploads/recipe/older.jpg'
+        )
+
+        # Assertions
+        self.assertEqual(derivatives, [])
+        self.assertFalse(self.recipe.image_derivatives.exists())
+
+    def test_image_replaced_while_resizing(self):
+        """
+            Test a job whose image is replaced while it resizes keeps
+            the derivatives of the newer image.
+        """
+        self._save_image((300, 300))
+        name = self.recipe.image.name
+        normalize = images._normalize
+
+        def replace_image(image):
+            Recipe.objects.filter(id=self.recipe.id).update(
+                image='uploads/recipe/newer.jpg'
+            )
+            return normalize(image)
+
+        with patch.object(images, '_normalize', replace_image):
+            derivatives = images.generate_derivatives(self.recipe.id, name)
+        Recipe.objects.filter(id=self.recipe.id).update(image=name)
+
+        # Assertions
+        self.assertEqual(derivatives, [])
+        self.assertFalse(self.recipe.image_derivatives.exists())
+
+    @patch('recipe.views.images.schedule_derivatives')
+    def test_upload_schedules_derivatives(self, schedule):
+        """
+            Test uploading an image queues its derivatives.
+        """
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('recipe:recipe-upload-image', args=[self.recipe.id])
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as f:
+            Image.new('RGB', (20, 20)).save(f, format='JPEG')
+            f.seek(0)
+            res = client.post(url, {'image': f}, format='multipart')
+
+        # Assertions
+        self.recipe.refresh_from_db()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['derivatives'], [])
+        schedule.assert_called_once_with(self.recipe)
+
+    @patch('recipe.views.images.schedule_derivatives')
+    def test_reupload_hides_previous_derivatives(self, schedule):
+        """
+            Test a new image drops the derivatives of the previous one
+            before its own are generated.
+        """
+        self._save_image((300, 300))
+        images.generate_derivatives(self.recipe.id, self.recipe.image.name)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        url = reverse('recipe:recipe-upload-image', args=[self.recipe.id])
+
+        with tempfile.NamedTemporaryFile(suffix='.jpg') as f:
+            Image.new('RGB', (20, 20), 'blue').save(f, format='JPEG')
+            f.seek(0)
+            res = client.post(url, {'image': f}, format='multipart')
+        detail = client.get(reverse('recipe:recipe-detail',
+                                    args=[self.recipe.id]))
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['derivatives'], [])
+        self.assertEqual(detail.data['derivatives'], [])
+        self.assertFalse(self.recipe.image_derivatives.exists())
@@ -62,7 +62,7 @@ class PrivateIngredientApiTests(TestCase):
 
         # Assertions
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_indgredients_limited_to_user(self):
         """
@@ -84,8 +84,8 @@ class PrivateIngredientApiTests(TestCase):
 
         # Assertions
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], i.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], i.name)
 
     def test_create_ingredient_successful(self):
         """
@@ -138,8 +138,8 @@ class PrivateIngredientApiTests(TestCase):
         serializer2 = IngredientSerializer(ingredient2)
 
         # Assertions
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_ingredients_assigned_unique(self):
         """
@@ -164,4 +164,4 @@ class PrivateIngredientApiTests(TestCase):
         res = self.client.get(INGREDIENT_URL, {'assigned_only': 1})
 
         # Assertion
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
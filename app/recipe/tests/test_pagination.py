@@ -0,0 +1,167 @@
+import base64
+import json
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Recipe, Tag
+from recipe.pagination import RecipeAttrPagination
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+TAGS_URL = reverse('recipe:tag-list')
+
+
+class KeysetPaginationTests(TestCase):
+    """
+        Test paginating the recipe API with cursors.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.client.force_authenticate(self.user)
+
+    def _collect(self, url, params):
+        """
+            Follow the next links and return every page.
+        """
+        pages = []
+        res = self.client.get(url, params)
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            pages.append(res.data)
+            if not res.data['next']:
+                return pages
+            res = self.client.get(res.data['next'])
+
+    def test_recipes_paginated_newest_first(self):
+        """
+            Test following the cursors returns every recipe once.
+        """
+        for i in range(5):
+            Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=5.00
+            )
+
+        pages = self._collect(RECIPE_URL, {'page_size': 2})
+        ids = [r['id'] for page in pages for r in page['results']]
+
+        # Assertions
+        self.assertEqual([len(page['results']) for page in pages], [2, 2, 1])
+        self.assertEqual(
+            ids,
+            list(Recipe.objects.order_by('-id').values_list('id', flat=True))
+        )
+        self.assertIsNone(pages[0]['previous'])
+
+    def test_previous_link_returns_prior_page(self):
+        """
+            Test the previous link goes back to the same rows.
+        """
+        for i in range(4):
+            Recipe.objects.create(
+                user=self.user,
+                title=f'Recipe {i}',
+                time_minutes=10,
+                price=5.00
+            )
+
+        first = self.client.get(RECIPE_URL, {'page_size': 2})
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+
+        # Assertions
+        self.assertEqual(previous.data['results'], first.data['results'])
+        self.assertIsNotNone(previous.data['next'])
+
+    def test_tags_with_same_name_paginated(self):
+        """
+            Test tags sharing a name are neither skipped nor repeated.
+        """
+        for name in ('vegan', 'vegan', 'halal', 'vegan', 'kosher'):
+            Tag.objects.create(user=self.user, name=name)
+
+        pages = self._collect(TAGS_URL, {'page_size': 2})
+        tags = [
+            (t['name'], t['id']) for page in pages for t in page['results']
+        ]
+
+        # Assertions
+        self.assertEqual(len(tags), 5)
+        self.assertEqual(
+            tags,
+            sorted(tags, key=lambda tag: (tag[0], -tag[1]), reverse=True)
+        )
+
+    def test_tags_with_same_name_paginated_back(self):
+        """
+            Test the previous links of tags sharing a name return the
+            prior pages.
+        """
+        for name in ('vegan', 'vegan', 'halal', 'vegan', 'kosher'):
+            Tag.objects.create(user=self.user, name=name)
+        pages = self._collect(TAGS_URL, {'page_size': 2})
+
+        res = self.client.get(pages[-1]['previous'])
+        first = self.client.get(res.data['previous'])
+
+        # Assertions
+        self.assertEqual(res.data['results'], pages[-2]['results'])
+        self.assertEqual(first.data['results'], pages[0]['results'])
+
+    def test_seek_bounds_leading_field(self):
+        """
+            Test the seek bounds the leading ordering field so its index
+            can start the scan at the position.
+        """
+        pagination = RecipeAttrPagination()
+        forward = Tag.objects.filter(pagination._seek(['vegan', 3], False))
+        backward = Tag.objects.filter(pagination._seek(['vegan', 3], True))
+
+        # Assertions
+        self.assertIn('"name" <= vegan', str(forward.query))
+        self.assertIn('"name" >= vegan', str(backward.query))
+
+    @override_settings(API_MAX_PAGE_SIZE=3)
+    def test_page_size_capped(self):
+        """
+            Test the requested page size cannot exceed the maximum.
+        """
+        for i in range(5):
+            Tag.objects.create(user=self.user, name=f'tag {i}')
+
+        res = self.client.get(TAGS_URL, {'page_size': 100})
+
+        # Assertion
+        self.assertEqual(len(res.data['results']), 3)
+
+    def test_invalid_cursor(self):
+        """
+            Test an invalid cursor returns not found.
+        """
+        res = self.client.get(RECIPE_URL, {'cursor': 'not-a-cursor'})
+
+        # Assertion
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cursor_wrong_types(self):
+        """
+            Test a cursor holding values of the wrong type returns not
+            found.
+        """
+        for position in (['x'], [None], [[1]]):
+            payload = json.dumps({'p': position, 'r': 0})
+            cursor = base64.urlsafe_b64encode(payload.encode('utf-8'))
+            res = self.client.get(RECIPE_URL, {'cursor': cursor.decode()})
+
+            # Assertion
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
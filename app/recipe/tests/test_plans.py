@@ -0,0 +1,207 @@
+from decimal import Decimal
+
+from django.test import TestCase
+from django.contrib.auth import get_user_model
+from django.db.models import Prefetch
+from django.urls import reverse
+from rest_framework import serializers as drf_serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.models import Recipe, Tag, Ingredient, RecipeImageDerivative
+from recipe import serializers
+from recipe.plans import compile_plan
+from recipe.renderers import FastJSONRenderer
+
+
+RECIPE_URL = reverse('recipe:recipe-list')
+
+
+class SerializerPlanTests(TestCase):
+    """
+        Test compiled plans render the same bytes as the serializers.
+    """
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.request = APIRequestFactory().get('/api/recipe/recipes/')
+
+        self.tags = [
+            Tag.objects.create(user=self.user, name=name)
+            for name in ('Vegan', 'Crème brûlée', 'Line\u2028break', '"q"')
+        ]
+        self.ingredients = [
+            Ingredient.objects.create(user=self.user, name=name)
+            for name in ('Salt', 'Pepper', '日本酒')
+        ]
+
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Käsespätzle \\ "special"',
+            time_minutes=45,
+            price=Decimal('12.5'),
+            link='https://example.com/recipe',
+            image='uploads/recipe/ab/ab.jpg'
+        )
+        self.recipe.tags.add(self.tags[2], self.tags[0])
+        self.recipe.ingredients.add(*self.ingredients)
+        RecipeImageDerivative.objects.create(
+            recipe=self.recipe,
+            name='thumbnail',
+            format='webp',
+            file='uploads/recipe/derivatives/cd/cd.webp',
+            width=200,
+            height=150
+        )
+        Recipe.objects.create(
+            user=self.user,
+            title='Plain',
+            time_minutes=5,
+            price=Decimal('0.99')
+        )
+
+    def _recipes(self):
+        return Recipe.objects.prefetch_related(
+            Prefetch('tags', queryset=Tag.objects.order_by('id')),
+            Prefetch(
+                'ingredients',
+                queryset=Ingredient.objects.order_by('id')
+            ),
+            Prefetch(
+                'image_derivatives',
+                queryset=RecipeImageDerivative.objects.order_by('id')
+            )
+        ).order_by('id')
+
+    def assertParity(self, serializer_class, queryset):
+        plan = compile_plan(serializer_class)
+        self.assertIsNotNone(plan)
+
+        expected = JSONRenderer().render(serializer_class(
+            queryset,
+            many=True,
+            context={'request': self.request}
+        ).data)
+        rendered = FastJSONRenderer().render(
+            plan.serialize(list(plan.values(queryset)), self.request)
+        )
+
+        # Assertion
+        self.assertEqual(rendered, expected)
+
+    def test_recipe_parity(self):
+        """
+            Test the recipe plan matches RecipeSerializer.
+        """
+        self.assertParity(serializers.RecipeSerializer, self._recipes())
+
+    def test_recipe_detail_parity(self):
+        """
+            Test the nested plans match RecipeDetailSerializer.
+        """
+        self.assertParity(serializers.RecipeDetailSerializer, self._recipes())
+
+    def test_tag_parity(self):
+        """
+            Test the tag plan matches TagSerializer.
+        """
+        self.assertParity(
+            serializers.TagSerializer,
+            Tag.objects.order_by('-name', 'id')
+        )
+
+    def test_ingredient_parity(self):
+        """
+            Test the ingredient plan matches IngredientSerializer.
+        """
+        self.assertParity(
+            serializers.IngredientSerializer,
+            Ingredient.objects.order_by('-name', 'id')
+        )
+
+    def test_relation_queries(self):
+        """
+            Test each relation is loaded with a single query.
+        """
+        plan = compile_plan(serializers.RecipeDetailSerializer)
+
+        with self.assertNumQueries(4):
+            plan.serialize(list(plan.values(Recipe.objects.all())))
+
+    def test_unsupported_serializer(self):
+        """
+            Test serializers with fields the plan cannot compile are
+            left to the serializer.
+        """
+        class TitleSerializer(drf_serializers.ModelSerializer):
+            upper = drf_serializers.SerializerMethodField()
+
+            class Meta:
+                model = Recipe
+                fields = ('id', 'upper')
+
+            def get_upper(self, obj):
+                return obj.title.upper()
+
+        # Assertion
+        self.assertIsNone(compile_plan(TitleSerializer))
+
+
+class FastJSONRendererTests(TestCase):
+    """
+        Test the fast JSON renderer.
+    """
+    def test_render_indent(self):
+        """
+            Test indented responses match the default renderer.
+        """
+        data = {'name': 'Crème ', 'items': [1, 2.5, None, True]}
+        media_type = 'application/json; indent=4'
+
+        # Assertions
+        self.assertEqual(
+            FastJSONRenderer().render(data, media_type),
+            JSONRenderer().render(data, media_type)
+        )
+        self.assertEqual(
+            FastJSONRenderer().render(data),
+            JSONRenderer().render(data)
+        )
+
+    def test_encoder_shared(self):
+        """
+            Test renderers with the same options share their encoder.
+        """
+        class AsciiRenderer(FastJSONRenderer):
+            ensure_ascii = True
+
+        # Assertions
+        self.assertIs(FastJSONRenderer().encoder, FastJSONRenderer().encoder)
+        self.assertIsNot(AsciiRenderer().encoder, FastJSONRenderer().encoder)
+        self.assertEqual(AsciiRenderer().render({'name': 'Crème'}),
+                         b'{"name":"Cr\\u00e8me"}')
+
+    def test_api_uses_renderer(self):
+        """
+            Test the list endpoint renders the plan output.
+        """
+        user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        Recipe.objects.create(
+            user=user,
+            title='Sample Recipe',
+            time_minutes=30,
+            price=5.00
+        )
+        client = APIClient()
+        client.force_authenticate(user)
+
+        res = client.get(RECIPE_URL)
+
+        # Assertions
+        self.assertIsInstance(res.accepted_renderer, FastJSONRenderer)
+        self.assertIn(b'"price":"5.00"', res.content)
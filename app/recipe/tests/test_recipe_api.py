@@ -3,6 +3,8 @@ from os import path
 
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -109,7 +111,7 @@ class PrivateRecipeApiTests(TestCase):
 
         # Assertions
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_recipes_limited_to_user(self):
         """
@@ -135,8 +137,8 @@ class PrivateRecipeApiTests(TestCase):
 
         # Assertions
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_view_recipe_detail(self):
         """
@@ -157,6 +159,101 @@ class PrivateRecipeApiTests(TestCase):
         # Assertion
         self.assertEqual(res.data, serializer.data)
 
+    def test_list_recipes_query_count_is_constant(self):
+        """
+            Test the number of queries used to list recipes does not
+            grow with the number of recipes.
+        """
+        tag = sample_tag(user=self.user)
+        ingredient = sample_ingredient(user=self.user)
+
+        for rows in (1, 10):
+            # Add recipes with a tag and an ingredient each
+            while Recipe.objects.count() < rows:
+                recipe = sample_recipe(user=self.user)
+                recipe.tags.add(tag)
+                recipe.ingredients.add(ingredient)
+
+            # One query for the data version, one for the recipes
+            # and one for each relation
+            with self.assertNumQueries(4):
+                res = self.client.get(RECIPE_URL)
+
+            # Assertions
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(res.data['results']), rows)
+
+    def test_view_recipe_detail_query_count(self):
+        """
+            Test viewing a recipe detail batches the related objects.
+        """
+        recipe = sample_recipe(user=self.user)
+        recipe.tags.add(sample_tag(user=self.user))
+        recipe.tags.add(sample_tag(user=self.user, name='Dinner'))
+        recipe.ingredients.add(sample_ingredient(user=self.user))
+
+        # One query for the recipe and one each for the tags, the
+        # ingredients and the image derivatives
+        with self.assertNumQueries(4):
+            res = self.client.get(detail_url(recipe.id))
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['tags']), 2)
+
+    def test_filter_recipes_by_tags_unique(self):
+        """
+            Test a recipe matching several tags is returned once.
+        """
+        recipe = sample_recipe(user=self.user)
+        tag1 = sample_tag(user=self.user, name='Italian')
+        tag2 = sample_tag(user=self.user, name='Pasta')
+        recipe.tags.add(tag1, tag2)
+
+        res = self.client.get(RECIPE_URL, {'tags': f'{tag1.id},{tag2.id}'})
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_filter_recipes_matching_all_tags(self):
+        """
+            Test filtering the recipes that have every given tag.
+        """
+        recipe1 = sample_recipe(user=self.user, title='Lasagna')
+        recipe2 = sample_recipe(user=self.user, title='Pizza')
+        tag1 = sample_tag(user=self.user, name='Italian')
+        tag2 = sample_tag(user=self.user, name='Pasta')
+        ingredient = sample_ingredient(user=self.user, name='Cheese')
+        recipe1.tags.add(tag1, tag2)
+        recipe1.ingredients.add(ingredient)
+        recipe2.tags.add(tag1)
+        recipe2.ingredients.add(ingredient)
+
+        res = self.client.get(RECIPE_URL, {
+            'tags': f'{tag1.id},{tag2.id}',
+            'ingredients': f'{ingredient.id}',
+            'match': 'all'
+        })
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [r['id'] for r in res.data['results']],
+            [recipe1.id]
+        )
+
+    def test_filter_recipes_invalid_match(self):
+        """
+            Test filtering with an unknown match mode fails.
+        """
+        tag = sample_tag(user=self.user)
+
+        res = self.client.get(RECIPE_URL, {'tags': tag.id, 'match': 'some'})
+
+        # Assertion
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_create_basic_recipe(self):
         """
             Test creating a recipe.
@@ -226,6 +323,74 @@ class PrivateRecipeApiTests(TestCase):
         self.assertIn(ingredient1, ingredients)
         self.assertIn(ingredient2, ingredients)
 
+    def test_create_recipe_ingredient_queries_constant(self):
+        """
+            Test validating ingredients does not query each of them.
+        """
+        ingredient_ids = [
+            sample_ingredient(user=self.user, name=f'Ingredient {index}').id
+            for index in range(30)
+        ]
+
+        counts = []
+        for count in (1, 30):
+            payload = {
+                'title': 'Stew',
+                'ingredients': ingredient_ids[:count],
+                'time_minutes': 60,
+                'price': 8
+            }
+            with CaptureQueriesContext(connection) as queries:
+                res = self.client.post(RECIPE_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+            counts.append(len(queries))
+
+        # Assertion
+        self.assertEqual(counts[0], counts[1])
+
+    def test_create_recipe_with_other_users_tags(self):
+        """
+            Test tags of other users are rejected together.
+        """
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'santa4521!'
+        )
+        tag1 = sample_tag(user=other, name='Vegan')
+        tag2 = sample_tag(user=other, name='Dessert')
+        own = sample_tag(user=self.user)
+
+        payload = {
+            'title': 'Cheesecake',
+            'tags': [own.id, tag1.id, tag2.id],
+            'time_minutes': 60,
+            'price': 20
+        }
+        res = self.client.post(RECIPE_URL, payload)
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            res.data['tags'],
+            [f'Invalid pks "{tag1.id}, {tag2.id}" - objects do not exist.']
+        )
+        self.assertFalse(Recipe.objects.exists())
+
+    def test_create_recipe_invalid_tag_type(self):
+        """
+            Test tag ids must be primary keys.
+        """
+        payload = {
+            'title': 'Cheesecake',
+            'tags': ['vegan'],
+            'time_minutes': 60,
+            'price': 20
+        }
+        res = self.client.post(RECIPE_URL, payload)
+
+        # Assertion
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
     def test_partial_update_recipe(self):
         """
             Test updating a recipe with PATCH.
@@ -345,9 +510,9 @@ class RecipeImageUploadTests(TestCase):
         serialized3 = RecipeSerializer(recipe3)
 
         # Assertions
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serialized3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serialized3.data, res.data['results'])
 
     def test_filter_recipes_by_ingredients(self):
         """
@@ -370,6 +535,56 @@ class RecipeImageUploadTests(TestCase):
         serialized3 = RecipeSerializer(recipe3)
 
         # Assertions
-        self.assertIn(serializer1.data, res.data)
-        self.assertIn(serializer2.data, res.data)
-        self.assertNotIn(serialized3.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertIn(serializer2.data, res.data['results'])
+        self.assertNotIn(serialized3.data, res.data['results'])
+
+    def test_search_recipes(self):
+        """
+            Test searching recipes by title, tag and ingredient names.
+        """
+        recipe1 = sample_recipe(user=self.user, title='Thai curry')
+        recipe2 = sample_recipe(user=self.user, title='Noodle soup')
+        recipe3 = sample_recipe(user=self.user, title='Green salad')
+        recipe4 = sample_recipe(user=self.user, title='Steak')
+        recipe2.tags.add(sample_tag(user=self.user, name='Curry night'))
+        recipe3.ingredients.add(
+            sample_ingredient(user=self.user, name='Curry leaves')
+        )
+        other = get_user_model().objects.create_user(
+            'other@gmail.com',
+            'santa4521!'
+        )
+        sample_recipe(user=other, title='Curry')
+
+        res = self.client.get(RECIPE_URL, {'search': 'curry'})
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        ids = [recipe['id'] for recipe in res.data['results']]
+        self.assertEqual(
+            sorted(ids),
+            sorted([recipe1.id, recipe2.id, recipe3.id])
+        )
+        self.assertNotIn(recipe4.id, ids)
+
+    def test_search_recipes_pages(self):
+        """
+            Test search results are paginated by rank without repeats.
+        """
+        recipes = [
+            sample_recipe(user=self.user, title=f'Pie {index}')
+            for index in range(5)
+        ]
+
+        ids = []
+        res = self.client.get(RECIPE_URL, {'search': 'pie', 'page_size': 2})
+        while True:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(recipe['id'] for recipe in res.data['results'])
+            if res.data['next'] is None:
+                break
+            res = self.client.get(res.data['next'])
+
+        # Assertion
+        self.assertEqual(sorted(ids), sorted(r.id for r in recipes))
@@ -1,6 +1,6 @@
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.urls import NoReverseMatch, reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -57,7 +57,7 @@ class PrivateTagsApiTests(TestCase):
 
         # Assertion
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_tags_limited_to_user(self):
         """
@@ -78,8 +78,8 @@ class PrivateTagsApiTests(TestCase):
 
         # Assertions
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(res.data), 1)
-        self.assertEqual(res.data[0]['name'], tag.name)
+        self.assertEqual(len(res.data['results']), 1)
+        self.assertEqual(res.data['results'][0]['name'], tag.name)
 
     def test_create_tag_successful(self):
         """
@@ -125,8 +125,8 @@ class PrivateTagsApiTests(TestCase):
         serializer2 = TagSerializer(tag2)
 
         # Assertions
-        self.assertIn(serializer1.data, res.data)
-        self.assertNotIn(serializer2.data, res.data)
+        self.assertIn(serializer1.data, res.data['results'])
+        self.assertNotIn(serializer2.data, res.data['results'])
 
     def test_retrieve_tags_assigned_unique(self):
         """
@@ -151,4 +151,16 @@ class PrivateTagsApiTests(TestCase):
         res = self.client.get(TAGS_URL, {'assigned_only': 1})
 
         # Assertions
-        self.assertEqual(len(res.data), 1)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_no_detail_route(self):
+        """
+            Test tags have no detail endpoint.
+        """
+        tag = Tag.objects.create(user=self.user, name='Breakfast')
+
+        # Assertions
+        with self.assertRaises(NoReverseMatch):
+            reverse('recipe:tag-detail', args=[tag.id])
+        res = self.client.get(f'{TAGS_URL}{tag.id}/')
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,256 @@
+import glob
+import os
+from io import BytesIO
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from PIL import Image
+
+from core.models import Recipe
+from recipe.uploads import ImageHeaderValidator, upload_dir
+
+
+def image_upload_url(recipe_id):
+    """
+        Return url for recipe image.
+    """
+    return reverse('recipe:recipe-upload-image', args=[recipe_id])
+
+
+def resumable_upload_url(recipe_id, upload_id=None):
+    """
+        Return url for uploading a recipe image in chunks.
+    """
+    url = reverse('recipe:recipe-upload-image-resumable', args=[recipe_id])
+    if upload_id is None:
+        return url
+
+    return f'{url}?upload_id={upload_id}'
+
+
+def sample_image(size=(100, 100)):
+    """
+        Return the bytes of a noisy PNG image.
+    """
+    buffer = BytesIO()
+    Image.frombytes(
+        'RGB', size, os.urandom(size[0] * size[1] * 3)
+    ).save(buffer, format='PNG')
+    return buffer.getvalue()
+
+
+@patch('recipe.views.images.schedule_derivatives')
+class StreamingImageUploadTests(TestCase):
+    """
+        Test validating recipe images while they are uploaded.
+    """
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            'testing@gmail.com',
+            'santa4521!'
+        )
+        self.client.force_authenticate(self.user)
+        self.recipe = Recipe.objects.create(
+            user=self.user,
+            title='Sample Recipe',
+            time_minutes=30,
+            price=5.00
+        )
+
+    def tearDown(self):
+        pattern = os.path.join(upload_dir('partial'), f'{self.recipe.id}-*')
+        for path in glob.glob(pattern):
+            os.remove(path)
+        self.recipe.refresh_from_db()
+        self.recipe.image.delete()
+
+    @override_settings(RECIPE_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_upload_too_large(self, schedule):
+        """
+            Test an image over the size limit is rejected.
+        """
+        image = SimpleUploadedFile('large.png', sample_image())
+        res = self.client.post(
+            image_upload_url(self.recipe.id),
+            {'image': image},
+            format='multipart'
+        )
+
+        # Assertions
+        self.assertEqual(
+            res.status_code,
+            status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+        )
+        self.recipe.refresh_from_db()
+        self.assertFalse(self.recipe.image)
+
+    def test_upload_not_image(self, schedule):
+        """
+            Test a file without image magic bytes is rejected.
+        """
+        image = SimpleUploadedFile('fake.jpg', b'not an image' * 100)
+        res = self.client.post(
+            image_upload_url(self.recipe.id),
+            {'image': image},
+            format='multipart'
+        )
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', res.data)
+
+    def test_resumable_upload(self, schedule):
+        """
+            Test uploading an image in chunks.
+        """
+        url = resumable_upload_url(self.recipe.id)
+        data = sample_image()
+        total = len(data)
+        chunks = [(0, 99), (100, 999), (1000, total - 1)]
+
+        for start, end in chunks:
+            res = self.client.put(
+                url,
+                data[start:end + 1],
+                content_type='application/octet-stream',
+                HTTP_CONTENT_RANGE=f'bytes {start}-{end}/{total}'
+            )
+            if end + 1 < total:
+                self.assertEqual(res.status_code, status.HTTP_202_ACCEPTED)
+                self.assertEqual(res.data['offset'], end + 1)
+                url = resumable_upload_url(
+                    self.recipe.id, res.data['upload_id']
+                )
+                self.assertEqual(
+                    self.client.get(url).data['offset'],
+                    end + 1
+                )
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        with self.recipe.image.open('rb') as f:
+            self.assertEqual(f.read(), data)
+        self.assertEqual(self.client.get(url).data['offset'], 0)
+        schedule.assert_called_once()
+
+    def test_resumable_upload_offset_mismatch(self, schedule):
+        """
+            Test a chunk that skips bytes is rejected with the offset.
+        """
+        url = resumable_upload_url(self.recipe.id)
+        data = sample_image()
+        total = len(data)
+
+        res = self.client.put(
+            url,
+            data[:100],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 0-99/{total}'
+        )
+        res = self.client.put(
+            resumable_upload_url(self.recipe.id, res.data['upload_id']),
+            data[200:300],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 200-299/{total}'
+        )
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(res.data['offset'], 100)
+
+    def test_resumable_upload_not_image(self, schedule):
+        """
+            Test the first chunk of a non image is rejected.
+        """
+        url = resumable_upload_url(self.recipe.id)
+        res = self.client.put(
+            url,
+            b'not an image',
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE='bytes 0-11/4096'
+        )
+
+        # Assertions
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            glob.glob(
+                os.path.join(upload_dir('partial'), f'{self.recipe.id}-*')
+            ),
+            []
+        )
+
+    def test_resumable_uploads_kept_apart(self, schedule):
+        """
+            Test uploads to the same recipe at once do not mix.
+        """
+        url = resumable_upload_url(self.recipe.id)
+        first, second = sample_image(), sample_image()
+
+        ids = []
+        for data in (first, second):
+            res = self.client.put(
+                url,
+                data[:100],
+                content_type='application/octet-stream',
+                HTTP_CONTENT_RANGE=f'bytes 0-99/{len(data)}'
+            )
+            ids.append(res.data['upload_id'])
+
+        res = self.client.put(
+            resumable_upload_url(self.recipe.id, ids[0]),
+            first[100:],
+            content_type='application/octet-stream',
+            HTTP_CONTENT_RANGE=f'bytes 100-{len(first) - 1}/{len(first)}'
+        )
+
+        # Assertions
+        self.assertNotEqual(ids[0], ids[1])
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.recipe.refresh_from_db()
+        with self.recipe.image.open('rb') as f:
+            self.assertEqual(f.read(), first)
+        res = self.client.get(resumable_upload_url(self.recipe.id, ids[1]))
+        self.assertEqual(res.data['offset'], 100)
+
+    def test_resumable_upload_invalid_id(self, schedule):
+        """
+            Test an upload id that is not one given out is rejected.
+        """
+        res = self.client.get(
+            resumable_upload_url(self.recipe.id, '../../settings')
+        )
+
+        # Assertion
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ImageHeaderValidatorTests(TestCase):
+
+    def test_dimensions_read_from_header(self):
+        """
+            Test the dimensions are known before the whole image.
+        """
+        validator = ImageHeaderValidator()
+        validator.feed(sample_image((300, 200))[:1024])
+
+        # Assertions
+        self.assertEqual(validator.extension, 'png')
+        self.assertEqual(validator.dimensions, (300, 200))
+
+    def test_too_many_pixels_rejected(self):
+        """
+            Test an image with too many pixels is rejected early.
+        """
+        validator = ImageHeaderValidator(max_pixels=1000)
+
+        # Assertion
+        with self.assertRaises(ValidationError):
+            validator.feed(sample_image()[:1024])
@@ -0,0 +1,375 @@
+import os
+import re
+import tempfile
+import uuid
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import UploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from django.utils.translation import gettext_lazy as _
+from PIL import Image
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.parsers import MultiPartParser
+
+
+# Bytes read from the start of an upload to find the image dimensions
+HEADER_LIMIT = 256 * 1024
+CHUNK_SIZE = 64 * 1024
+
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'GIF87a', 'gif'),
+    (b'GIF89a', 'gif'),
+)
+
+CONTENT_RANGE = re.compile(r'^bytes (\d+)-(\d+)/(\d+)$')
+UPLOAD_ID = re.compile(r'^[0-9a-f]{32}$')
+
+INVALID_IMAGE_MESSAGE = _(
+    'Upload a valid image. The file you uploaded was either not an '
+    'image or a corrupted image.'
+)
+
+
+class ImageTooLarge(APIException):
+    status_code = status.HTTP_413_REQUEST_ENTITY_TOO_LARGE
+    default_detail = _('The image is larger than the maximum upload size.')
+    default_code = 'image_too_large'
+
+
+class UploadOffsetMismatch(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = _('The chunk does not start at the upload offset.')
+    default_code = 'upload_offset_mismatch'
+
+    def __init__(self, offset):
+        super().__init__()
+        self.offset = offset
+
+
+def max_upload_size():
+    """
+        Return the maximum size of an image upload in bytes.
+    """
+    return getattr(settings, 'RECIPE_IMAGE_MAX_UPLOAD_SIZE', 10 * 1024 ** 2)
+
+
+def upload_dir(name):
+    """
+        Return a directory under the media root for in progress uploads,
+        so completed files are moved into storage instead of copied.
+    """
+    directory = os.path.join(settings.MEDIA_ROOT, 'uploads', name)
+    os.makedirs(directory, exist_ok=True)
+    return directory
+
+
+def sniff_image(header):
+    """
+        Return the file extension matching the magic bytes of an image.
+    """
+    for signature, extension in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return extension
+
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+
+    return None
+
+
+class ImageHeaderValidator:
+    """
+        Validate an image from its first bytes while it is received.
+
+        The magic bytes and the dimensions are read from the header,
+        so invalid or oversized uploads are rejected before the rest of
+        the body is read and without decoding any pixels.
+    """
+    def __init__(self, max_size=None, max_pixels=None):
+        self.max_size = max_size or max_upload_size()
+        self.max_pixels = max_pixels or getattr(
+            settings, 'RECIPE_IMAGE_MAX_PIXELS', Image.MAX_IMAGE_PIXELS
+        )
+        self.header = bytearray()
+        self.received = 0
+        self.extension = None
+        self.dimensions = None
+
+    def feed(self, chunk):
+        """
+            Validate the next chunk of the upload.
+        """
+        self.received += len(chunk)
+        if self.received > self.max_size:
+            raise ImageTooLarge()
+
+        if self.dimensions is None:
+            self.header += chunk[:HEADER_LIMIT - len(self.header)]
+            self._check_header(final=False)
+
+    def finish(self):
+        """
+            Validate the upload once all of it was received.
+        """
+        if self.dimensions is None:
+            self._check_header(final=True)
+
+    def _check_header(self, final):
+        """
+            Read the format and the dimensions once the header is in.
+        """
+        final = final or len(self.header) >= HEADER_LIMIT
+        if self.extension is None:
+            if len(self.header) < 12 and not final:
+                return
+
+            self.extension = sniff_image(bytes(self.header[:12]))
+            if self.extension is None:
+                self._reject()
+
+        try:
+            with Image.open(BytesIO(bytes(self.header))) as image:
+                width, height = image.size
+        except Exception:
+            # Wait for more of the header unless there is no more
+            if final:
+                self._reject()
+            return
+
+        if self.max_pixels and width * height > self.max_pixels:
+            raise ValidationError({
+                'image': [_('The image dimensions are too large.')]
+            })
+
+        self.dimensions = (width, height)
+
+    def _reject(self):
+        raise ValidationError({'image': [INVALID_IMAGE_MESSAGE]})
+
+
+class MediaTemporaryUploadedFile(UploadedFile):
+    """
+        Upload written to a temporary file under the media root.
+    """
+    def __init__(self, name, content_type, size, charset,
+                 content_type_extra=None):
+        file = tempfile.NamedTemporaryFile(
+            suffix='.upload',
+            dir=upload_dir('tmp')
+        )
+        super().__init__(
+            file, name, content_type, size, charset, content_type_extra
+        )
+
+    def temporary_file_path(self):
+        """
+            Return the path so storage can move the file in place.
+        """
+        return self.file.name
+
+    def close(self):
+        try:
+            return self.file.close()
+        except FileNotFoundError:
+            # The file was moved into storage
+            pass
+
+
+class StreamingImageUploadHandler(FileUploadHandler):
+    """
+        Upload handler that validates images while streaming them to
+        disk and stops reading the request once an upload is invalid.
+    """
+    chunk_size = CHUNK_SIZE
+
+    def handle_raw_input(self, input_data, META, content_length, boundary,
+                         encoding=None):
+        """
+            Reject requests whose declared size is already too large.
+        """
+        if content_length > max_upload_size() + CHUNK_SIZE:
+            raise ImageTooLarge()
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.validator = ImageHeaderValidator()
+        self.file = MediaTemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset,
+            self.content_type_extra
+        )
+
+    def receive_data_chunk(self, raw_data, start):
+        self.validator.feed(raw_data)
+        self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.validator.finish()
+        self.file.seek(0)
+        self.file.size = file_size
+        return self.file
+
+
+class StreamingImageParser(MultiPartParser):
+    """
+        Multipart parser streaming image uploads through validation.
+    """
+    def parse(self, stream, media_type=None, parser_context=None):
+        request = parser_context['request']
+        request.upload_handlers = [
+            StreamingImageUploadHandler(request._request)
+        ]
+        return super().parse(stream, media_type, parser_context)
+
+
+def parse_content_range(header):
+    """
+        Return the first byte, last byte and total size of a chunk.
+    """
+    match = CONTENT_RANGE.match(header or '')
+    if match is None:
+        raise ValidationError(
+            _('Expected a Content-Range header like bytes 0-1023/4096')
+        )
+
+    start, end, total = (int(group) for group in match.groups())
+    if start > end or end >= total:
+        raise ValidationError(_('Invalid Content-Range header'))
+
+    return start, end, total
+
+
+class PartialUploadedFile(UploadedFile):
+    """
+        Completed resumable upload, moved into storage in place.
+
+        The file is only opened when it is read, and has to be closed
+        once it was saved.
+    """
+    def __init__(self, path, name, size):
+        super().__init__(None, name, None, size, None)
+        self.path = path
+
+    def _get_file(self):
+        if self._file is None:
+            self._file = open(self.path, 'rb')
+        return self._file
+
+    def _set_file(self, file):
+        self._file = file
+
+    file = property(_get_file, _set_file)
+
+    def temporary_file_path(self):
+        return self.path
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+
+
+class ResumableUpload:
+    """
+        Image upload of a recipe sent in ordered chunks.
+
+        Each chunk is appended to a partial file under the media root,
+        so an interrupted upload continues from the last stored byte.
+        Every upload has its own id, so clients uploading to the same
+        recipe at once do not write to each other's file.
+    """
+    def __init__(self, recipe, upload_id=None):
+        if upload_id is None:
+            upload_id = uuid.uuid4().hex
+        elif not UPLOAD_ID.match(upload_id):
+            raise ValidationError({'upload_id': [_('Invalid upload id')]})
+
+        self.upload_id = upload_id
+        self.path = os.path.join(
+            upload_dir('partial'),
+            f'{recipe.id}-{upload_id}.part'
+        )
+
+    @property
+    def offset(self):
+        """
+            Return the number of bytes received so far.
+        """
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def write(self, stream, start, end, total):
+        """
+            Append a chunk read from a stream and return the new offset.
+        """
+        if total > max_upload_size():
+            raise ImageTooLarge()
+
+        # Chunks have to continue the upload or restart it
+        offset = self.offset
+        if start not in (0, offset):
+            raise UploadOffsetMismatch(offset)
+
+        length = end - start + 1
+        mode = 'wb' if start == 0 else 'ab'
+        with open(self.path, mode) as f:
+            remaining = length
+            while remaining and stream is not None:
+                data = stream.read(min(CHUNK_SIZE, remaining))
+                if not data:
+                    break
+                f.write(data)
+                remaining -= len(data)
+
+        if remaining:
+            # Keep only the bytes before the incomplete chunk
+            with open(self.path, 'ab') as f:
+                f.truncate(start)
+            raise ValidationError(
+                _('The request body is shorter than the Content-Range')
+            )
+
+        if start < HEADER_LIMIT:
+            self.validate(final=end + 1 == total)
+
+        return end + 1
+
+    def validate(self, final):
+        """
+            Validate the header of the bytes received so far.
+        """
+        validator = ImageHeaderValidator()
+        try:
+            with open(self.path, 'rb') as f:
+                validator.feed(f.read(HEADER_LIMIT))
+            if final:
+                validator.finish()
+        except ValidationError:
+            self.discard()
+            raise
+
+        return validator
+
+    def complete(self):
+        """
+            Return the received image as an uploaded file.
+        """
+        validator = self.validate(final=True)
+        return PartialUploadedFile(
+            self.path,
+            f'image.{validator.extension}',
+            self.offset
+        )
+
+    def discard(self):
+        """
+            Delete the received bytes.
+        """
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
@@ -1,21 +1,44 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils.translation import gettext_lazy as _
 from rest_framework import viewsets, mixins, status
-from rest_framework.authentication import TokenAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 
-from core.models import Tag, Ingredient, Recipe
-from recipe import serializers
+from core.models import (
+    Tag, Ingredient, Recipe, RecipeImageDerivative, UserDataVersion
+)
+from core.signals import release_after_commit
+from user.authentication import CachedTokenAuthentication
+from recipe import exports, images, serializers, uploads
+from recipe.autocomplete import cache as autocomplete_cache
+from recipe.autocomplete import match_names, normalize
+from recipe.filters import (
+    filter_by_related, filter_by_search, MATCH_ANY, MATCH_CHOICES
+)
+from recipe.mixins import (
+    BulkMixin, CachedListMixin, CompiledListMixin, CompiledRetrieveMixin
+)
+from recipe.pagination import RecipePagination, RecipeAttrPagination
+from recipe.plans import compile_plan
 
 
-class BaseRecipeAttrViewSet(viewsets.GenericViewSet,
+class BaseRecipeAttrViewSet(BulkMixin,
+                            CachedListMixin,
+                            CompiledListMixin,
+                            viewsets.GenericViewSet,
                             mixins.ListModelMixin,
                             mixins.CreateModelMixin):
     """
         Base view set class for user owned recipe attributes.
     """
-    authentication_classes = (TokenAuthentication, )
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (IsAuthenticated, )
+    pagination_class = RecipeAttrPagination
 
     def get_queryset(self):
         """
@@ -37,6 +60,51 @@ class BaseRecipeAttrViewSet(viewsets.GenericViewSet,
         """
         serializer.save(user=self.request.user)
 
+    def _get_limit(self):
+        """
+            Return the requested number of suggestions, within bounds.
+        """
+        limit = getattr(settings, 'AUTOCOMPLETE_LIMIT', 10)
+        try:
+            limit = int(self.request.query_params.get('limit', limit))
+        except ValueError:
+            pass
+
+        max_limit = getattr(settings, 'AUTOCOMPLETE_MAX_LIMIT', 50)
+        return max(1, min(limit, max_limit))
+
+    @action(methods=['GET'], detail=False)
+    def autocomplete(self, request):
+        """
+            Return the objects whose names start with or are similar to
+            the q parameter, best matches first.
+        """
+        term = normalize(request.query_params.get('q', ''))
+        if not term:
+            return Response([])
+
+        limit = self._get_limit()
+        version = UserDataVersion.objects.for_user(request.user).version
+        key = (
+            self.queryset.model._meta.label,
+            request.user.id,
+            version,
+            term,
+            limit
+        )
+
+        data = autocomplete_cache.get(key)
+        if data is None:
+            plan = compile_plan(self.get_serializer_class())
+            queryset = match_names(
+                self.queryset.filter(user=request.user),
+                term
+            )
+            data = plan.serialize(list(plan.values(queryset)[:limit]))
+            autocomplete_cache.set(key, data)
+
+        return Response(data)
+
 
 class TagViewSet(BaseRecipeAttrViewSet):
     """
@@ -54,20 +122,93 @@ class IngredientViewSet(BaseRecipeAttrViewSet):
     serializer_class = serializers.IngredientSerializer
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(BulkMixin,
+                    CachedListMixin,
+                    CompiledListMixin,
+                    CompiledRetrieveMixin,
+                    viewsets.ModelViewSet):
     """
         Manage recipes in the database.
     """
     serializer_class = serializers.RecipeSerializer
     queryset = Recipe.objects.all()
-    authentication_classes = (TokenAuthentication, )
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (IsAuthenticated, )
+    pagination_class = RecipePagination
+
+    @property
+    def pagination_ordering(self):
+        """
+            Return the page ordering, by relevance when searching.
+        """
+        if self.request.query_params.get('search', '').strip():
+            return ('-rank', '-id')
+
+        return self.pagination_class.ordering
 
     def _params_to_ints(self, qs):
         """
             Convert a list of string IDs to a list of integers
         """
-        return [int(str_id) for str_id in qs.split(',')]
+        try:
+            return [int(str_id) for str_id in qs.split(',')]
+        except ValueError:
+            raise ValidationError(_('Expected a comma separated list of ids'))
+
+    def _get_match(self):
+        """
+            Return whether the recipes must match any or all of the ids.
+        """
+        match = self.request.query_params.get('match', MATCH_ANY)
+        if match not in MATCH_CHOICES:
+            raise ValidationError(
+                _('Expected match to be one of: %s') % ', '.join(MATCH_CHOICES)
+            )
+
+        return match
+
+    def _optimize_queryset(self, queryset):
+        """
+            Load only the columns and relations the serializer of the
+            current action needs, batching the many to many lookups
+            into a single query per relation.
+        """
+        if self.action in ('list', 'bulk'):
+            return queryset.only(
+                'id', 'title', 'time_minutes', 'price', 'link'
+            ).prefetch_related(
+                Prefetch(
+                    'tags',
+                    queryset=Tag.objects.only('id').order_by('id')
+                ),
+                Prefetch(
+                    'ingredients',
+                    queryset=Ingredient.objects.only('id').order_by('id')
+                )
+            )
+        elif self.action == 'retrieve':
+            return queryset.prefetch_related(
+                Prefetch(
+                    'tags',
+                    queryset=Tag.objects.only('id', 'name').order_by('id')
+                ),
+                Prefetch(
+                    'ingredients',
+                    queryset=Ingredient.objects.only(
+                        'id', 'name'
+                    ).order_by('id')
+                ),
+                Prefetch(
+                    'image_derivatives',
+                    queryset=RecipeImageDerivative.objects.order_by('id')
+                )
+            )
+        elif self.action in ('update', 'partial_update'):
+            # The update mixin discards prefetched relations after
+            # saving, so only skip the columns the serializer never reads
+            return queryset.defer('image', 'search_vector')
+
+        return queryset
 
     def get_queryset(self):
         """
@@ -75,25 +216,43 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """
         tags = self.request.query_params.get('tags')
         ingredients = self.request.query_params.get('ingredients')
+        search = self.request.query_params.get('search', '').strip()
         queryset = self.queryset
 
+        if tags or ingredients:
+            match = self._get_match()
+
         if tags:
             tag_ids = self._params_to_ints(tags)
-            queryset = queryset.filter(tags__id__in=tag_ids)
+            queryset = filter_by_related(queryset, 'tags', tag_ids, match)
 
         if ingredients:
             ingredient_ids = self._params_to_ints(ingredients)
-            queryset = queryset.filter(ingredients__id__in=ingredient_ids)
+            queryset = filter_by_related(
+                queryset, 'ingredients', ingredient_ids, match
+            )
+
+        if search:
+            queryset = filter_by_search(queryset, search)
+
+        queryset = queryset.filter(user=self.request.user)
 
-        return queryset.filter(user=self.request.user)
+        return self._optimize_queryset(queryset)
+
+    def get_bulk_queryset(self):
+        """
+            Retrieve the recipes of the authenticated user, ignoring the
+            filters of the query parameters.
+        """
+        return self._optimize_queryset(super().get_bulk_queryset())
 
     def get_serializer_class(self):
         """
             Return the appropriate serializer class.
         """
-        if self.action == 'retrieve':
+        if self.action in ('retrieve', 'export'):
             return serializers.RecipeDetailSerializer
-        elif self.action == 'upload_image':
+        elif self.action in ('upload_image', 'upload_image_resumable'):
             return serializers.RecipeImageSerializer
 
         return self.serializer_class
@@ -104,16 +263,115 @@ class RecipeViewSet(viewsets.ModelViewSet):
         """
         serializer.save(user=self.request.user)
 
-    @action(methods=['POST'], detail=True, url_path='upload-image')
-    def upload_image(self, request, pk=None):
+    def _save_image(self, recipe, data):
         """
-            Upload an image to a recipe.
+            Validate and store a new image for a recipe.
         """
-        recipe = self.get_object()
-        serializer = self.get_serializer(recipe, data=request.data)
+        serializer = self.get_serializer(recipe, data=data)
+        previous_image = recipe.image.name
 
         if serializer.is_valid():
-            serializer.save()
+            with transaction.atomic():
+                serializer.save()
+                if recipe.image.name != previous_image:
+                    # Derivatives of the previous image must not be
+                    # listed while the new ones are generated
+                    images.delete_derivatives(recipe)
+                    release_after_commit(previous_image)
+                images.schedule_derivatives(recipe)
             return Response(serializer.data, status=status.HTTP_200_OK)
 
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(
+        methods=['POST'],
+        detail=True,
+        url_path='upload-image',
+        parser_classes=(uploads.StreamingImageParser, )
+    )
+    def upload_image(self, request, pk=None):
+        """
+            Upload an image to a recipe.
+        """
+        recipe = self.get_object()
+        return self._save_image(recipe, request.data)
+
+    @action(
+        methods=['GET', 'PUT'],
+        detail=True,
+        url_path='upload-image/resumable'
+    )
+    def upload_image_resumable(self, request, pk=None):
+        """
+            Upload an image to a recipe in chunks, each one sent with a
+            Content-Range header. The first chunk starts an upload whose
+            id is returned, and the next chunks pass it as the upload_id
+            parameter. GET returns the offset to resume an upload from.
+        """
+        recipe = self.get_object()
+        upload_id = request.query_params.get('upload_id')
+
+        if request.method == 'GET':
+            if upload_id is None:
+                raise ValidationError(
+                    {'upload_id': [_('This parameter is required.')]}
+                )
+            upload = uploads.ResumableUpload(recipe, upload_id)
+            return Response({'upload_id': upload_id, 'offset': upload.offset})
+
+        start, end, total = uploads.parse_content_range(
+            request.META.get('HTTP_CONTENT_RANGE')
+        )
+        upload = uploads.ResumableUpload(recipe, upload_id)
+        try:
+            offset = upload.write(request.stream, start, end, total)
+        except uploads.UploadOffsetMismatch as exc:
+            return Response(
+                {
+                    'detail': exc.detail,
+                    'upload_id': upload.upload_id,
+                    'offset': exc.offset
+                },
+                status=exc.status_code
+            )
+
+        if offset < total:
+            return Response(
+                {'upload_id': upload.upload_id, 'offset': offset},
+                status=status.HTTP_202_ACCEPTED
+            )
+
+        image = upload.complete()
+        try:
+            return self._save_image(recipe, {'image': image})
+        finally:
+            image.close()
+            upload.discard()
+
+    @action(methods=['GET'], detail=False)
+    def export(self, request):
+        """
+            Stream every recipe of the user with its details, as NDJSON
+            or a JSON array chosen by the layout parameter.
+        """
+        layout = request.query_params.get('layout', exports.NDJSON)
+        if layout not in exports.EXPORT_CONTENT_TYPES:
+            raise ValidationError(
+                _('Expected layout to be one of: %s') %
+                ', '.join(exports.EXPORT_CONTENT_TYPES)
+            )
+
+        plan = self.get_plan()
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        response = StreamingHttpResponse(
+            exports.stream_export(
+                exports.serialized_chunks(plan, queryset, request),
+                layout
+            ),
+            content_type=exports.EXPORT_CONTENT_TYPES[layout]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="recipes.{layout}"'
+        )
+
+        return response
@@ -0,0 +1,110 @@
+import copy
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authentication import TokenAuthentication
+
+from core.cache import LRUCache
+
+
+class TokenCache:
+    """
+        Cache of authenticated users by token key.
+
+        Lookups go to a local LRU first and then to the optional shared
+        cache backend named by TOKEN_CACHE_ALIAS. The local entries
+        live for TOKEN_CACHE_TTL seconds, which bounds how long another
+        process can keep accepting a token deleted elsewhere.
+    """
+    key_prefix = 'auth-token'
+
+    def __init__(self):
+        self.local = LRUCache(
+            max_size=getattr(settings, 'TOKEN_CACHE_SIZE', 1024),
+            ttl=getattr(settings, 'TOKEN_CACHE_TTL', 30)
+        )
+        self.shared_hits = 0
+
+    @property
+    def shared(self):
+        """
+            Return the shared cache backend, if one is configured.
+        """
+        alias = getattr(settings, 'TOKEN_CACHE_ALIAS', None)
+        return caches[alias] if alias else None
+
+    def get(self, key):
+        """
+            Return the cached user and token for a key.
+        """
+        credentials = self.local.get(key)
+        if credentials is None and self.shared is not None:
+            credentials = self.shared.get(self._shared_key(key))
+            if credentials is not None:
+                self.shared_hits += 1
+                self.local.set(key, credentials)
+
+        # Every request gets its own copy to modify
+        return copy.deepcopy(credentials)
+
+    def set(self, key, credentials):
+        """
+            Store the user and token for a key.
+        """
+        self.local.set(key, credentials)
+        if self.shared is not None:
+            self.shared.set(
+                self._shared_key(key), credentials, self.local.ttl
+            )
+
+    def delete(self, key):
+        """
+            Remove a key from the local and shared caches.
+        """
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(key))
+
+    def clear(self):
+        """
+            Remove every local entry and reset the counters.
+        """
+        self.local.clear()
+        self.shared_hits = 0
+
+    def stats(self):
+        """
+            Return the hit and miss counters of the cache.
+        """
+        stats = self.local.stats()
+        stats['shared_hits'] = self.shared_hits
+        stats['misses'] -= self.shared_hits
+        return stats
+
+    def _shared_key(self, key):
+        """
+            Return the shared cache key, without the raw token in it.
+        """
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return f'{self.key_prefix}:{digest}'
+
+
+token_cache = TokenCache()
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+        Token authentication that skips the token query for recently
+        authenticated tokens.
+    """
+    def authenticate_credentials(self, key):
+        """
+            Return the user and token for a key.
+        """
+        credentials = token_cache.get(key)
+        if credentials is None:
+            credentials = super().authenticate_credentials(key)
+            token_cache.set(key, credentials)
+
+        return credentials
@@ -0,0 +1,80 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.db import connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+# Upgrading a hash costs as much as a login, so it runs in its own pool
+executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'PASSWORD_REHASH_WORKERS', 1),
+    thread_name_prefix='password-rehash'
+)
+
+
+class BackgroundRehashBackend(ModelBackend):
+    """
+        Authentication backend upgrading outdated password hashes after
+        the login instead of during it.
+
+        A hash made by another hasher or with other costs than the
+        settings is replaced in a worker thread once the request
+        commits, so the login only pays for verifying the password.
+        Sessions opened by the same login are signed with the old hash
+        and have to log in once more.
+    """
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        UserModel = get_user_model()
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            # Run the default password hasher once to reduce the timing
+            # difference between an existing and a nonexistent user
+            UserModel().set_password(password)
+            return None
+
+        encoded = user.password
+
+        def setter(raw_password):
+            transaction.on_commit(lambda: executor.submit(
+                _run_in_worker, user.pk, encoded, raw_password
+            ))
+
+        if (check_password(password, encoded, setter)
+                and self.user_can_authenticate(user)):
+            return user
+
+        return None
+
+
+def _run_in_worker(user_id, encoded, raw_password):
+    """
+        Rehash a password and release the worker database connection.
+    """
+    try:
+        rehash(user_id, encoded, raw_password)
+    except Exception:
+        logger.exception('Failed rehashing the password of %s', user_id)
+    finally:
+        connections.close_all()
+
+
+def rehash(user_id, encoded, raw_password):
+    """
+        Replace the hash of a password with one from the preferred
+        hasher, unless the password changed meanwhile.
+    """
+    return get_user_model().objects.filter(
+        pk=user_id,
+        password=encoded
+    ).update(password=make_password(raw_password))
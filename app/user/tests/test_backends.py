@@ -0,0 +1,89 @@
+from unittest.mock import patch
+
+from django.contrib.auth import authenticate, get_user_model
+from django.test import TestCase, override_settings
+
+from user import backends
+
+
+def run_now(function, *args):
+    """
+        Run a scheduled function right away.
+    """
+    return function(*args)
+
+
+@patch('django.db.transaction.on_commit', run_now)
+@patch.object(backends.executor, 'submit', run_now)
+# The worker closes its connections, which would close the test one
+@patch.object(backends, '_run_in_worker', backends.rehash)
+class BackgroundRehashBackendTests(TestCase):
+    """
+        Test outdated password hashes are upgraded after logging in.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='testing@gmail.com',
+            password='santa4521!'
+        )
+
+    def iterations(self):
+        """
+            Return the PBKDF2 iterations of the stored hash.
+        """
+        self.user.refresh_from_db()
+        return int(self.user.password.split('$')[1])
+
+    def test_current_hash_kept(self):
+        """
+            Test a hash made with the current settings is kept.
+        """
+        encoded = self.user.password
+        user = authenticate(username='testing@gmail.com',
+                            password='santa4521!')
+
+        # Assertions
+        self.assertEqual(user, self.user)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, encoded)
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_outdated_hash_upgraded(self):
+        """
+            Test a hash made with other costs is replaced.
+        """
+        user = authenticate(username='testing@gmail.com',
+                            password='santa4521!')
+
+        # Assertions
+        self.assertEqual(user, self.user)
+        self.assertEqual(self.iterations(), 1000)
+        self.assertTrue(self.user.check_password('santa4521!'))
+
+    @override_settings(PASSWORD_PBKDF2_ITERATIONS=1000)
+    def test_wrong_password_not_upgraded(self):
+        """
+            Test failed logins leave the hash alone.
+        """
+        user = authenticate(username='testing@gmail.com', password='wrong')
+
+        # Assertions
+        self.assertIsNone(user)
+        self.assertNotEqual(self.iterations(), 1000)
+
+    def test_changed_password_not_overwritten(self):
+        """
+            Test a password changed before the rehash runs is kept.
+        """
+        encoded = self.user.password
+        self.user.set_password('changed4521!')
+        self.user.save()
+
+        # Assertions
+        self.assertEqual(
+            backends.rehash(self.user.id, encoded, 'santa4521!'),
+            0
+        )
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password('changed4521!'))
@@ -1,10 +1,15 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import caches
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from user.throttling import LoginRateThrottle
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
@@ -215,3 +220,67 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+@patch.object(LoginRateThrottle, 'rate', '2/min', create=True)
+class LoginThrottleTests(TestCase):
+    """
+        Test the login attempts are limited for each email.
+    """
+
+    def setUp(self):
+        self.client = APIClient()
+        create_user(email='throttled@gmail.com', password='santa4521!')
+        for email in ('throttled@gmail.com', 'other@gmail.com'):
+            LoginRateThrottle().reset(email)
+
+    def test_login_throttled(self):
+        """
+            Test attempts over the rate are rejected before the
+            password is checked.
+        """
+        payload = {'email': 'throttled@gmail.com', 'password': 'wrong'}
+        self.client.post(TOKEN_URL, payload)
+        self.client.post(TOKEN_URL, payload)
+
+        with patch('user.serializers.authenticate') as authenticate:
+            res = self.client.post(TOKEN_URL, {
+                'email': ' Throttled@gmail.com',
+                'password': 'santa4521!'
+            })
+
+            # Assertions
+            self.assertEqual(
+                res.status_code,
+                status.HTTP_429_TOO_MANY_REQUESTS
+            )
+            authenticate.assert_not_called()
+
+    def test_attempts_counted_in_shared_cache(self):
+        """
+            Test the attempts are counted in the throttle cache.
+        """
+        payload = {'email': 'throttled@gmail.com', 'password': 'wrong'}
+        self.client.post(TOKEN_URL, payload)
+        key = LoginRateThrottle().key_for(payload['email'])
+
+        # Assertions
+        self.assertIs(LoginRateThrottle().cache, caches['throttle'])
+        self.assertEqual(len(caches['throttle'].get(key)), 1)
+        self.assertIsNone(caches['default'].get(key))
+
+    def test_other_email_not_throttled(self):
+        """
+            Test the attempts for one email do not limit another.
+        """
+        payload = {'email': 'throttled@gmail.com', 'password': 'wrong'}
+        self.client.post(TOKEN_URL, payload)
+        self.client.post(TOKEN_URL, payload)
+
+        res = self.client.post(TOKEN_URL, {
+            'email': 'other@gmail.com',
+            'password': 'wrong'
+        })
+
+        # Assertion
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,50 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LoginRateThrottle(SimpleRateThrottle):
+    """
+        Limit the login attempts for each email address.
+
+        Attempts are counted before the password is checked, so
+        guessing the password of an account cannot keep the hashers
+        busy. The rate is the login entry of DEFAULT_THROTTLE_RATES.
+        The attempts are counted in the cache named by
+        THROTTLE_CACHE_ALIAS, which has to be shared by every worker
+        process for the rate to hold.
+    """
+    scope = 'login'
+
+    @property
+    def cache(self):
+        return caches[getattr(settings, 'THROTTLE_CACHE_ALIAS', 'default')]
+
+    def get_cache_key(self, request, view):
+        """
+            Return the key counting the attempts for the email.
+        """
+        data = request.data
+        email = data.get('email') if hasattr(data, 'get') else None
+        if not isinstance(email, str) or not email.strip():
+            # Let the serializer reject the request
+            return None
+
+        return self.key_for(email)
+
+    def key_for(self, email):
+        """
+            Return the key counting the attempts for an email.
+        """
+        ident = hashlib.sha256(
+            email.strip().lower().encode('utf-8')
+        ).hexdigest()
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def reset(self, email):
+        """
+            Forget the attempts for an email.
+        """
+        self.cache.delete(self.key_for(email))
@@ -1,7 +1,9 @@
-from rest_framework import generics, authentication, permissions
+from rest_framework import generics, permissions
 from rest_framework.authtoken.views import ObtainAuthToken
 from rest_framework.settings import api_settings
 
+from user.authentication import CachedTokenAuthentication
+from user.throttling import LoginRateThrottle
 from user.serializers import UserSerializer, AuthTokenSerializer
 
 
@@ -18,6 +20,7 @@ class CreateTokenView(ObtainAuthToken):
     """
     serializer_class = AuthTokenSerializer
     renderer_classes = api_settings.DEFAULT_RENDERER_CLASSES
+    throttle_classes = (LoginRateThrottle, )
 
 
 class ManageUserView(generics.RetrieveUpdateAPIView):
@@ -25,7 +28,7 @@ class ManageUserView(generics.RetrieveUpdateAPIView):
         Manage the authenticated user.
     """
     serializer_class = UserSerializer
-    authentication_classes = (authentication.TokenAuthentication, )
+    authentication_classes = (CachedTokenAuthentication, )
     permission_classes = (permissions.IsAuthenticated, )
 
     def get_object(self):